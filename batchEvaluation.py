@@ -0,0 +1,145 @@
+# Scores many positions at once with NumPy, the same score smartMoveFinder.evaluate gives one at a time
+# Each position becomes a row of features and the weights of evaluation.py a column, so a whole batch is scored by
+# one matrix multiply. texelTuner.py fits the weights through the same features
+#
+# features of a position, from white's point of view:
+#   material    6 columns, white pieces minus black pieces of each type / 100
+#   middle game 6 * 64 columns, +1 for a white piece and -1 for a black piece on the square of its table (black
+#               pieces mirrored the way evaluation.buildSquareValues does it), times phase / totalPhase / 100
+#   end game    the same occupancy times (1 - phase / totalPhase) / 100
+# and the weights are the piece values and the two sets of piece square tables, all in centipawns
+#
+# Positions are stored compactly until they are scored, see encodeBoards. sparseScores and sparseTranspose do the
+# same sums as the feature matrix straight from that compact form, the tuner uses them on millions of positions
+
+import chessEngine
+import evaluation
+
+try:
+    import numpy as np
+except ImportError:  # only needed by the functions here, the engine itself runs without it
+    np = None
+
+pieceTypes = ('p', 'N', 'B', 'R', 'Q', 'K')
+squareCount = len(pieceTypes) * 64
+featureCount = len(pieceTypes) + 2 * squareCount
+maxPieces = 32
+
+
+def requireNumpy():
+    if np is None:
+        raise ImportError("batch evaluation and tuning need NumPy, pip install numpy")
+
+
+# piece square column of a piece, black pieces use the mirrored square like buildSquareValues
+def squareColumn(piece, r, c):
+    row = r if piece[0] == 'w' else 7 - r
+    return pieceTypes.index(piece[1]) * 64 + row * 8 + c
+
+
+squareColumns = {piece: [squareColumn(piece, r, c) for r in range(8) for c in range(8)]
+                 for piece in chessEngine.pieceSymbols}
+
+
+# board as 8 lists of 8 pieces, from the first field of a FEN
+def boardFromFen(fen):
+    board = []
+    for row in fen.split()[0].split('/'):
+        boardRow = []
+        for symbol in row:
+            if symbol in '12345678':
+                boardRow.extend(chessEngine.emptySquares[symbol])
+            else:
+                boardRow.append(chessEngine.fenPieces[symbol])
+        board.append(boardRow)
+    return board
+
+
+# packs boards into (columns, signs, phases): int16 and int8 arrays of maxPieces entries per board, unused entries
+# have sign 0, and the phase of each board between 0 (end game) and 1 (middle game)
+def encodeBoards(boards):
+    requireNumpy()
+    columns = np.zeros((len(boards), maxPieces), dtype=np.int16)
+    signs = np.zeros((len(boards), maxPieces), dtype=np.int8)
+    phases = np.zeros(len(boards), dtype=np.float32)
+    for index, board in enumerate(boards):
+        pieceColumns, pieceSigns = columns[index], signs[index]
+        count = 0
+        phase = 0
+        sq = 0
+        for boardRow in board:
+            for piece in boardRow:
+                if piece != "--":
+                    pieceColumns[count] = squareColumns[piece][sq]
+                    pieceSigns[count] = 1 if piece[0] == 'w' else -1
+                    phase += evaluation.phaseWeights[piece[1]]
+                    count += 1
+                sq += 1
+        phases[index] = min(phase, evaluation.totalPhase) / evaluation.totalPhase
+    return columns, signs, phases
+
+
+# dense float32 feature matrix of encoded boards, one row per board
+def featureMatrix(columns, signs, phases):
+    requireNumpy()
+    count = len(phases)
+    occupancy = np.zeros((count, squareCount), dtype=np.float32)
+    rows = np.repeat(np.arange(count), maxPieces).reshape(count, maxPieces)
+    # a white and a black piece can share a column (e2 and the mirrored e7) so each colour is added on its own
+    white = signs > 0
+    black = signs < 0
+    occupancy[rows[white], columns[white]] += 1
+    occupancy[rows[black], columns[black]] -= 1
+    material = occupancy.reshape(count, len(pieceTypes), 64).sum(axis=2)
+    phases = phases[:, None]
+    return np.concatenate((material, occupancy * phases, occupancy * (1 - phases)), axis=1) / 100
+
+
+# featureMatrix(columns, signs, phases) @ weights, without building the matrix
+# a piece on a column adds material + endGame + phase * (middleGame - endGame), so two lookups per piece
+def sparseScores(columns, signs, phases, weights):
+    count = len(pieceTypes)
+    middleGame = weights[count:count + squareCount]
+    endGame = weights[count + squareCount:]
+    constant = (np.repeat(weights[:count], 64) + endGame).astype(np.float32)
+    phased = (middleGame - endGame).astype(np.float32)
+    values = constant[columns] + phases[:, None] * phased[columns]
+    return (signs * values).sum(axis=1) / 100
+
+
+# featureMatrix(columns, signs, phases).T @ positionValues, without building the matrix
+def sparseTranspose(columns, signs, phases, positionValues):
+    weighted = signs * (positionValues / 100).astype(np.float32)[:, None]
+    flatColumns = columns.ravel()
+    constant = np.bincount(flatColumns, weighted.ravel(), minlength=squareCount)
+    phased = np.bincount(flatColumns, (weighted * phases[:, None]).ravel(), minlength=squareCount)
+    material = constant.reshape(len(pieceTypes), 64).sum(axis=1)
+    return np.concatenate((material, phased, constant - phased))
+
+
+# the current weights of evaluation.py as one vector in centipawns, in the order of the feature columns
+def weightVector():
+    requireNumpy()
+    material = [evaluation.pieceScore[pieceType] * 100 for pieceType in pieceTypes]
+    middleGame = [value for pieceType in pieceTypes for value in evaluation.middleGameTables[pieceType]]
+    endGame = [value for pieceType in pieceTypes for value in evaluation.endGameTables[pieceType]]
+    return np.array(material + middleGame + endGame, dtype=np.float64)
+
+
+# weight vector back to the dictionaries evaluation.setWeights takes
+def weightsFromVector(weights):
+    count = len(pieceTypes)
+    return {"pieceScore": {pieceType: round(float(weights[index]) / 100, 3)
+                           for index, pieceType in enumerate(pieceTypes)},
+            "middleGame": {pieceType: [int(round(float(value))) for value in
+                                       weights[count + index * 64:count + (index + 1) * 64]]
+                           for index, pieceType in enumerate(pieceTypes)},
+            "endGame": {pieceType: [int(round(float(value))) for value in
+                                    weights[count + squareCount + index * 64:count + squareCount + (index + 1) * 64]]
+                        for index, pieceType in enumerate(pieceTypes)}}
+
+
+# white's score in pawns for every position, boards are GameState.board style lists, weights default to evaluation.py
+def batchEvaluate(boards, weights=None):
+    features = featureMatrix(*encodeBoards(boards))
+    return features @ (weightVector() if weights is None else weights)
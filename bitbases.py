@@ -0,0 +1,250 @@
+# Win/draw bitbases for king and queen, king and rook and king and pawn against a bare king
+# The bare king can never win these endings, so one bit per position is enough: set when the side with the piece
+# wins with best play. smartMoveFinder.negaMaxAlphaBeta probes them and stops searching once a position is in one
+#
+# Positions are seen from the side with the piece, which is called white here, a position where black has the
+# piece is mirrored top to bottom first. The bit of a position is
+#   index = ((sideToMove * 64 + whiteKing) * 64 + blackKing) * 64 + piece, sideToMove 0 for white, squares r * 8 + c
+# so each ending is 2 * 64 * 64 * 64 bits, 64KB on disk. The files are memory mapped when they are first probed
+#
+# python bitbases.py [--folder bitbases] builds the files by retrograde analysis in well under a minute
+# KQK is built first because pawn promotions lead into it
+
+import mmap
+import os
+import time
+
+endings = {'KQK': 'Q', 'KRK': 'R', 'KPK': 'p'}  # file name and the piece of the side that can win
+tableSize = 2 * 64 * 64 * 64
+winScore = 200  # below checkMate, so the search still prefers a mate it can see
+
+openTables = {}  # memory mapped table of each file opened by this process, None when the file doesn't exist
+
+
+def onBoard(r, c):
+    return 0 <= r < 8 and 0 <= c < 8
+
+
+kingSteps = [tuple((r + dr) * 8 + c + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                   if (dr or dc) and onBoard(r + dr, c + dc)) for r in range(8) for c in range(8)]
+
+
+def buildRays(directions):
+    rays = []
+    for r in range(8):
+        for c in range(8):
+            squareRays = []
+            for dr, dc in directions:
+                ray = []
+                row, column = r + dr, c + dc
+                while onBoard(row, column):
+                    ray.append(row * 8 + column)
+                    row, column = row + dr, column + dc
+                if ray:
+                    squareRays.append(tuple(ray))
+            rays.append(tuple(squareRays))
+    return rays
+
+
+rays = {'R': buildRays(((-1, 0), (1, 0), (0, -1), (0, 1))),
+        'Q': buildRays(((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)))}
+# squares a white pawn attacks, white pawns move towards row 0
+pawnAttacks = [tuple((r - 1) * 8 + c + dc for dc in (-1, 1) if onBoard(r - 1, c + dc)) for r in range(8)
+               for c in range(8)]
+
+
+def index(whiteToMove, whiteKing, blackKing, pieceSq):
+    return (((0 if whiteToMove else 1) * 64 + whiteKing) * 64 + blackKing) * 64 + pieceSq
+
+
+# true when the white piece on pieceSq attacks target, only the white king can block it
+def pieceAttacks(pieceType, pieceSq, target, whiteKing):
+    if pieceType == 'p':
+        return target in pawnAttacks[pieceSq]
+    for ray in rays[pieceType][pieceSq]:
+        for sq in ray:
+            if sq == target:
+                return True
+            if sq == whiteKing:
+                break
+    return False
+
+
+def isLegal(whiteToMove, whiteKing, blackKing, pieceSq, pieceType):
+    if whiteKing == blackKing or pieceSq == whiteKing or pieceSq == blackKing or blackKing in kingSteps[whiteKing]:
+        return False
+    if pieceType == 'p' and not 1 <= pieceSq // 8 <= 6:
+        return False
+    # the side that isn't to move can't be in check, the white king can only be attacked by the other king
+    return not whiteToMove or not pieceAttacks(pieceType, pieceSq, blackKing, whiteKing)
+
+
+# squares the black king can move to, capturing the piece included
+def blackKingMoves(whiteKing, blackKing, pieceSq, pieceType):
+    moves = []
+    nearWhiteKing = kingSteps[whiteKing]
+    for sq in kingSteps[blackKing]:
+        if sq == whiteKing or sq in nearWhiteKing:
+            continue
+        if sq == pieceSq or not pieceAttacks(pieceType, pieceSq, sq, whiteKing):
+            moves.append(sq)
+    return moves
+
+
+# squares the white piece could have come from to reach pieceSq, promotions aside
+def pieceOrigins(pieceType, pieceSq, whiteKing, blackKing):
+    origins = []
+    if pieceType == 'p':
+        row = pieceSq // 8
+        if row <= 5 and pieceSq + 8 not in (whiteKing, blackKing):
+            origins.append(pieceSq + 8)
+            if row == 4 and pieceSq + 16 not in (whiteKing, blackKing):
+                origins.append(pieceSq + 16)  # two squares from the starting row
+        return origins
+    for ray in rays[pieceType][pieceSq]:
+        for sq in ray:
+            if sq == whiteKing or sq == blackKing:
+                break
+            origins.append(sq)
+    return origins
+
+
+# bytearray with 1 for every position white wins, by retrograde analysis
+# black to move positions keep count of the moves that haven't been shown to lose yet, when it reaches 0 the
+# position is lost for black, and every position white can reach it from is won for white
+def generate(pieceType, queenTable=None):
+    won = bytearray(tableSize)
+    movesLeft = bytearray(tableSize)
+    queue = []
+    for whiteKing in range(64):
+        for blackKing in range(64):
+            for pieceSq in range(64):
+                if not isLegal(False, whiteKing, blackKing, pieceSq, pieceType):
+                    continue
+                blackIndex = index(False, whiteKing, blackKing, pieceSq)
+                moves = blackKingMoves(whiteKing, blackKing, pieceSq, pieceType)
+                movesLeft[blackIndex] = len(moves)
+                if not moves and pieceAttacks(pieceType, pieceSq, blackKing, whiteKing):  # checkmate
+                    won[blackIndex] = 1
+                    queue.append(blackIndex)
+                # a pawn on the 7th wins straight away if it promotes to a queen that wins
+                if pieceType == 'p' and pieceSq // 8 == 1 and pieceSq - 8 not in (whiteKing, blackKing) and \
+                        isLegal(True, whiteKing, blackKing, pieceSq, pieceType) and \
+                        queenTable[index(False, whiteKing, blackKing, pieceSq - 8)]:
+                    whiteIndex = index(True, whiteKing, blackKing, pieceSq)
+                    won[whiteIndex] = 1
+                    queue.append(whiteIndex)
+    while queue:
+        position = queue.pop()
+        pieceSq = position & 63
+        blackKing = position >> 6 & 63
+        whiteKing = position >> 12 & 63
+        if position >= tableSize // 2:  # black to move and lost, white wins wherever it can move here from
+            predecessors = [index(True, origin, blackKing, pieceSq) for origin in kingSteps[whiteKing]
+                            if isLegal(True, origin, blackKing, pieceSq, pieceType)]
+            predecessors += [index(True, whiteKing, blackKing, origin) for origin in
+                             pieceOrigins(pieceType, pieceSq, whiteKing, blackKing)
+                             if isLegal(True, whiteKing, blackKing, origin, pieceType)]
+            for predecessor in predecessors:
+                if not won[predecessor]:
+                    won[predecessor] = 1
+                    queue.append(predecessor)
+        else:  # white to move and won, one less way out for every black position that moves here
+            for origin in kingSteps[blackKing]:
+                if not isLegal(False, whiteKing, origin, pieceSq, pieceType):
+                    continue
+                predecessor = index(False, whiteKing, origin, pieceSq)
+                if not won[predecessor]:
+                    movesLeft[predecessor] -= 1
+                    if movesLeft[predecessor] == 0:
+                        won[predecessor] = 1
+                        queue.append(predecessor)
+    return won
+
+
+def pack(won):
+    bits = bytearray(tableSize // 8)
+    for position in range(tableSize):
+        if won[position]:
+            bits[position >> 3] |= 1 << (position & 7)
+    return bits
+
+
+# writes every ending to folder
+def generateAll(folder="bitbases", progress=True):
+    os.makedirs(folder, exist_ok=True)
+    queenTable = None
+    for name, pieceType in endings.items():
+        start = time.perf_counter()
+        won = generate(pieceType, queenTable)
+        if pieceType == 'Q':
+            queenTable = won
+        with open(os.path.join(folder, name + ".bin"), "wb") as file:
+            file.write(pack(won))
+        if progress:
+            print("%s: %d won positions in %.1fs" % (name, sum(won), time.perf_counter() - start))
+
+
+# the table of one ending, None when it hasn't been generated
+def getTable(folder, name):
+    fileName = os.path.join(folder, name + ".bin")
+    if fileName not in openTables:
+        table = None
+        if os.path.exists(fileName):
+            with open(fileName, "rb") as file:
+                table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        openTables[fileName] = table
+    return openTables[fileName]
+
+
+# score of gs from the point of view of the side to move when it is one of the endings, otherwise None
+# a win is winScore plus a little for driving the bare king to the edge, bringing the kings together and pushing
+# the pawn, so the search makes progress towards a mate it can see
+def probe(gs, folder="bitbases"):
+    pieceSq = None
+    for r in range(8):
+        for c in range(8):
+            piece = gs.board[r][c]
+            if piece == "--" or piece[1] == 'K':
+                continue
+            if pieceSq is not None or piece[1] not in 'QRp':
+                return None
+            pieceSq = r * 8 + c
+            pieceColour, pieceType = piece[0], piece[1]
+    if pieceSq is None:
+        return None
+    if pieceColour == 'w':
+        pieceKing = gs.whiteKingLoc[0] * 8 + gs.whiteKingLoc[1]
+        bareKing = gs.blackKingLoc[0] * 8 + gs.blackKingLoc[1]
+        pieceToMove = gs.whiteToMove
+    else:  # mirrored so the piece is white and pawns move towards row 0
+        pieceKing = (7 - gs.blackKingLoc[0]) * 8 + gs.blackKingLoc[1]
+        bareKing = (7 - gs.whiteKingLoc[0]) * 8 + gs.whiteKingLoc[1]
+        pieceSq = (7 - pieceSq // 8) * 8 + pieceSq % 8
+        pieceToMove = not gs.whiteToMove
+    table = getTable(folder, 'K' + pieceType.upper() + 'K')
+    if table is None:
+        return None
+    position = index(pieceToMove, pieceKing, bareKing, pieceSq)
+    if not table[position >> 3] >> (position & 7) & 1:
+        return 0
+    # mop-up terms, the bare king's distance from the centre and how close the kings are, both in king steps
+    bareRow, bareColumn = divmod(bareKing, 8)
+    centreDistance = max(3 - bareRow, bareRow - 4) + max(3 - bareColumn, bareColumn - 4)
+    kingDistance = abs(bareRow - pieceKing // 8) + abs(bareColumn - pieceKing % 8)
+    score = winScore + 0.5 * centreDistance - 0.2 * kingDistance
+    if pieceType == 'p':
+        score -= pieceSq // 8  # rows to go before promoting
+    return score if pieceToMove else -score
+
+
+def main():
+    import argparse  # here and not at the top, so a search probing the bitbases never loads it
+    parser = argparse.ArgumentParser(description='Builds the endgame bitbases')
+    parser.add_argument('--folder', default='bitbases')
+    args = parser.parse_args()
+    generateAll(args.folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# Bitboard backend for chessEngine.GameState
+# Every piece type of each colour is stored as a 64 bit python int, bit (r * 8 + c) is set when the piece is on r, c
+# The 8x8 board list is still kept up to date so Move objects, smartMoveFinder and chessMain keep working
+
+import chessEngine
+from chessEngine import Move
+
+pieceNames = ("wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK")
+squareToRowColumn = [divmod(sq, 8) for sq in range(64)]
+notFileA = 0xFEFEFEFEFEFEFEFE  # every column except column 0
+notFileH = 0x7F7F7F7F7F7F7F7F  # every column except column 7
+
+
+def onBoard(r, c):
+    return 0 <= r < 8 and 0 <= c < 8
+
+
+# precomputed attack tables for the pieces that don't slide
+def stepAttacks(steps):
+    table = []
+    for sq in range(64):
+        r, c = squareToRowColumn[sq]
+        mask = 0
+        for d in steps:
+            if onBoard(r + d[0], c + d[1]):
+                mask |= 1 << ((r + d[0]) * 8 + c + d[1])
+        table.append(mask)
+    return table
+
+
+knightAttacks = stepAttacks(chessEngine.GameState.knightSteps)
+kingAttacks = stepAttacks(chessEngine.GameState.allDirections)
+pawnAttacks = {'w': stepAttacks(((-1, -1), (-1, 1))), 'b': stepAttacks(((1, -1), (1, 1)))}
+
+# rays leaving each square in each direction, a direction is positive when it walks towards higher bits
+directions = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+rookDirectionIndexes = (0, 1, 2, 3)
+bishopDirectionIndexes = (4, 5, 6, 7)
+positiveDirection = tuple(d[0] > 0 or (d[0] == 0 and d[1] > 0) for d in directions)
+
+
+def buildRays():
+    table = []
+    for d in directions:
+        directionRays = []
+        for sq in range(64):
+            r, c = squareToRowColumn[sq]
+            mask = 0
+            for i in range(1, 8):
+                if not onBoard(r + d[0] * i, c + d[1] * i):
+                    break
+                mask |= 1 << ((r + d[0] * i) * 8 + c + d[1] * i)
+            directionRays.append(mask)
+        table.append(directionRays)
+    return table
+
+
+# squares strictly between two squares on the same line, 0 when they don't share a line
+def buildBetweenMasks():
+    table = [[0] * 64 for _ in range(64)]
+    for d in directions:
+        for sq in range(64):
+            r, c = squareToRowColumn[sq]
+            mask = 0
+            for i in range(1, 8):
+                endRow, endColumn = r + d[0] * i, c + d[1] * i
+                if not onBoard(endRow, endColumn):
+                    break
+                table[sq][endRow * 8 + endColumn] = mask
+                mask |= 1 << (endRow * 8 + endColumn)
+    return table
+
+
+rays = buildRays()
+betweenMasks = buildBetweenMasks()
+
+
+def slidingAttacks(sq, occupied, directionIndexes):
+    attacks = 0
+    for d in directionIndexes:
+        ray = rays[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            if positiveDirection[d]:  # nearest blocker is the lowest bit
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:  # nearest blocker is the highest bit
+                blocker = blockers.bit_length() - 1
+            ray ^= rays[d][blocker]  # remove the squares behind the blocker
+        attacks |= ray
+    return attacks
+
+
+def rookAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, rookDirectionIndexes)
+
+
+def bishopAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, bishopDirectionIndexes)
+
+
+class GameState(chessEngine.GameState):
+    def initPositionState(self):
+        super().initPositionState()
+        self.initBitboards()
+
+    # builds the bitboards from the 8x8 board, call again after editing self.board by hand
+    def initBitboards(self):
+        self.pieceBitboards = dict.fromkeys(pieceNames, 0)
+        self.colourOccupancy = {'w': 0, 'b': 0}
+        bit = 1
+        for boardRow in self.board:
+            for piece in boardRow:
+                if piece != "--":
+                    self.pieceBitboards[piece] |= bit
+                    self.colourOccupancy[piece[0]] |= bit
+                bit <<= 1
+
+    def makeMove(self, move):
+        super().makeMove(move)
+        self.moveBitboards(move, True)
+
+    def undoMove(self):
+        if len(self.moveLog) != 0:
+            move = self.moveLog[-1]
+            super().undoMove()
+            self.moveBitboards(move, False)
+
+    # applies a move to the bitboards after the board has been updated, every change is an xor so the same
+    # call also takes the move back once undoMove has restored the board
+    def moveBitboards(self, move, forwards):
+        bbs = self.pieceBitboards
+        occupancy = self.colourOccupancy
+        colour = move.pieceMoved[0]
+        startBit = 1 << (move.startRow * 8 + move.startColumn)
+        endBit = 1 << (move.endRow * 8 + move.endColumn)
+        bbs[move.pieceMoved] ^= startBit
+        if move.isPawnPromotion:
+            bbs[colour + 'Q'] ^= endBit
+        else:
+            bbs[move.pieceMoved] ^= endBit
+        occupancy[colour] ^= startBit | endBit
+        if move.pieceCaptured != "--":
+            if move.isEnPassantMove:
+                capturedBit = 1 << (move.startRow * 8 + move.endColumn)
+            else:
+                capturedBit = endBit
+            bbs[move.pieceCaptured] ^= capturedBit
+            occupancy[move.pieceCaptured[0]] ^= capturedBit
+        if move.isCastleMove:
+            if move.endColumn - move.startColumn == 2:  # kingside castle
+                rookFrom, rookTo = move.endColumn + 1, move.endColumn - 1
+            else:  # queenside castle
+                rookFrom, rookTo = move.endColumn - 2, move.endColumn + 1
+            # the board has already been updated, so look up whichever piece makeMove moved with the king
+            rook = self.board[move.endRow][rookTo if forwards else rookFrom]
+            if rook != "--":
+                rookBits = 1 << (move.endRow * 8 + rookFrom) | 1 << (move.endRow * 8 + rookTo)
+                bbs[rook] ^= rookBits
+                occupancy[rook[0]] ^= rookBits
+
+    # bitmask of pieces of colour attacking sq when the board is occupied by occupied
+    def attackersTo(self, sq, colour, occupied):
+        bbs = self.pieceBitboards
+        enemyPawnColour = 'b' if colour == 'w' else 'w'  # a pawn of colour attacks sq from where an enemy pawn would
+        queens = bbs[colour + 'Q']
+        return (pawnAttacks[enemyPawnColour][sq] & bbs[colour + 'p']) | (knightAttacks[sq] & bbs[colour + 'N']) | \
+               (kingAttacks[sq] & bbs[colour + 'K']) | (rookAttacks(sq, occupied) & (bbs[colour + 'R'] | queens)) | \
+               (bishopAttacks(sq, occupied) & (bbs[colour + 'B'] | queens))
+
+    def squareAttackedBy(self, r, c, enemyColour):
+        return self.attackersTo(r * 8 + c, enemyColour, self.colourOccupancy['w'] | self.colourOccupancy['b']) != 0
+
+    def buildAttackMap(self, colour):
+        bbs = self.pieceBitboards
+        occupied = self.colourOccupancy['w'] | self.colourOccupancy['b']
+        pawns = bbs[colour + 'p']
+        if colour == 'w':
+            attacks = ((pawns & notFileA) >> 9) | ((pawns & notFileH) >> 7)
+        else:
+            attacks = ((pawns & notFileA) << 7) | ((pawns & notFileH) << 9)
+        for pieceType, table in (('N', knightAttacks), ('K', kingAttacks)):
+            pieces = bbs[colour + pieceType]
+            while pieces:
+                bit = pieces & -pieces
+                attacks |= table[bit.bit_length() - 1]
+                pieces ^= bit
+        for pieceType, attackFunction in (('R', rookAttacks), ('B', bishopAttacks), ('Q', rookAttacks),
+                                          ('Q', bishopAttacks)):
+            pieces = bbs[colour + pieceType]
+            while pieces:
+                bit = pieces & -pieces
+                attacks |= attackFunction(bit.bit_length() - 1, occupied)
+                pieces ^= bit
+        return attacks & 0xFFFFFFFFFFFFFFFF
+
+    # legal moves straight from the bitboards, no trial make/undo
+    def getValidMoves(self):
+        return self.generateMoves(False)
+
+    # captures and promotions only, doesn't set checkMate or staleMate
+    def getCaptureMoves(self):
+        return self.generateMoves(True)
+
+    def generateMoves(self, capturesOnly):
+        bbs = self.pieceBitboards
+        allyColour, enemyColour = ('w', 'b') if self.whiteToMove else ('b', 'w')
+        own = self.colourOccupancy[allyColour]
+        enemy = self.colourOccupancy[enemyColour]
+        occupied = own | enemy
+        kingBit = bbs[allyColour + 'K']
+        kingSq = kingBit.bit_length() - 1
+        moves = []
+
+        checkers = self.attackersTo(kingSq, enemyColour, occupied)
+        if checkers == 0:
+            checkMask = ~0
+        elif checkers & (checkers - 1) == 0:  # single check, capture the checker or block it
+            checkMask = checkers | betweenMasks[kingSq][checkers.bit_length() - 1]
+        else:  # double check, only the king can move
+            checkMask = 0
+
+        # pinned pieces may only move between the king and the piece pinning them
+        pinMasks = {}
+        enemyQueens = bbs[enemyColour + 'Q']
+        snipers = (rookAttacks(kingSq, 0) & (bbs[enemyColour + 'R'] | enemyQueens)) | \
+                  (bishopAttacks(kingSq, 0) & (bbs[enemyColour + 'B'] | enemyQueens))
+        while snipers:
+            bit = snipers & -snipers
+            snipers ^= bit
+            sniperSq = bit.bit_length() - 1
+            between = betweenMasks[kingSq][sniperSq] & occupied
+            if between and between & (between - 1) == 0 and between & own:
+                pinMasks[between.bit_length() - 1] = betweenMasks[kingSq][sniperSq] | bit
+
+        targetMask = enemy if capturesOnly else ~own
+        if checkMask:
+            self.getBitboardPawnMoves(allyColour, enemy, occupied, checkMask, pinMasks, kingSq, moves, capturesOnly)
+            for pieceType in ('N', 'B', 'R', 'Q'):
+                pieces = bbs[allyColour + pieceType]
+                while pieces:
+                    bit = pieces & -pieces
+                    pieces ^= bit
+                    sq = bit.bit_length() - 1
+                    if pieceType == 'N':
+                        targets = knightAttacks[sq]
+                    elif pieceType == 'B':
+                        targets = bishopAttacks(sq, occupied)
+                    elif pieceType == 'R':
+                        targets = rookAttacks(sq, occupied)
+                    else:
+                        targets = rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)
+                    targets &= targetMask & checkMask & pinMasks.get(sq, ~0)
+                    self.addBitboardMoves(sq, targets, moves)
+
+        # king moves, with the king lifted so it can't hide behind itself
+        occupiedWithoutKing = occupied ^ kingBit
+        targets = kingAttacks[kingSq] & targetMask
+        safeTargets = 0
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            if not self.attackersTo(bit.bit_length() - 1, enemyColour, occupiedWithoutKing):
+                safeTargets |= bit
+        self.addBitboardMoves(kingSq, safeTargets, moves)
+
+        if capturesOnly:
+            return moves
+        if checkers == 0:
+            self.getBitboardCastleMoves(allyColour, enemyColour, kingSq, occupied, moves)
+
+        if len(moves) == 0:  # either checkmate or stalemate
+            if checkers:
+                self.checkMate = True
+            else:
+                self.staleMate = True
+        else:
+            self.checkMate = False
+            self.staleMate = False
+        return moves
+
+    def addBitboardMoves(self, sq, targets, moves):
+        startSq = squareToRowColumn[sq]
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            moves.append(Move(startSq, squareToRowColumn[bit.bit_length() - 1], self.board))
+
+    def getBitboardPawnMoves(self, allyColour, enemy, occupied, checkMask, pinMasks, kingSq, moves, capturesOnly):
+        pawns = self.pieceBitboards[allyColour + 'p']
+        empty = ~occupied
+        if allyColour == 'w':
+            forward, startRow = -8, 6
+        else:
+            forward, startRow = 8, 1
+        enPassantBit = 0
+        if self.enPassantPoss != ():
+            enPassantBit = 1 << (self.enPassantPoss[0] * 8 + self.enPassantPoss[1])
+        while pawns:
+            bit = pawns & -pawns
+            pawns ^= bit
+            sq = bit.bit_length() - 1
+            allowed = checkMask & pinMasks.get(sq, ~0)
+            targets = 0
+            pushSq = sq + forward
+            promotes = not 0 <= pushSq + forward < 64  # push lands on the last row
+            if (promotes or not capturesOnly) and (1 << pushSq) & empty:  # captures only still includes promotions
+                targets |= 1 << pushSq
+                if sq >> 3 == startRow and (1 << (pushSq + forward)) & empty:
+                    targets |= 1 << (pushSq + forward)
+            targets |= pawnAttacks[allyColour][sq] & enemy
+            self.addBitboardMoves(sq, targets & allowed, moves)
+            if pawnAttacks[allyColour][sq] & enPassantBit:
+                self.getBitboardEnPassantMove(sq, enPassantBit, allyColour, kingSq, occupied, moves)
+
+    # en passant takes two pawns off one row, so test the king directly on the resulting occupancy
+    def getBitboardEnPassantMove(self, sq, enPassantBit, allyColour, kingSq, occupied, moves):
+        enemyColour = 'b' if allyColour == 'w' else 'w'
+        endSq = enPassantBit.bit_length() - 1
+        capturedSq = (sq & ~7) | (endSq & 7)  # same row as the pawn, same column as the target
+        occupiedAfter = (occupied ^ (1 << sq) ^ (1 << capturedSq)) | enPassantBit
+        bbs = self.pieceBitboards
+        capturedPawn = bbs[enemyColour + 'p']
+        bbs[enemyColour + 'p'] = capturedPawn ^ (1 << capturedSq)  # the captured pawn can't attack the king
+        legal = not self.attackersTo(kingSq, enemyColour, occupiedAfter)
+        bbs[enemyColour + 'p'] = capturedPawn
+        if legal:
+            moves.append(Move(squareToRowColumn[sq], squareToRowColumn[endSq], self.board, isEnPassantMove=True))
+
+    def getBitboardCastleMoves(self, allyColour, enemyColour, kingSq, occupied, moves):
+        homeRow = 7 if allyColour == 'w' else 0
+        if kingSq != homeRow * 8 + 4:  # king isn't on its starting square
+            return
+        rights = self.castlingRights
+        rooks = self.pieceBitboards[allyColour + 'R']
+        # the rook has to be there too, a right is never left without one but that's cheap to make sure of
+        kingside = rights & (chessEngine.whiteKingside if allyColour == 'w' else chessEngine.blackKingside) and \
+            rooks >> (kingSq + 3) & 1
+        queenside = rights & (chessEngine.whiteQueenside if allyColour == 'w' else chessEngine.blackQueenside) and \
+            rooks >> (kingSq - 4) & 1
+        if kingside and not occupied & (0b11 << (kingSq + 1)):
+            if not self.attackersTo(kingSq + 1, enemyColour, occupied) and \
+                    not self.attackersTo(kingSq + 2, enemyColour, occupied):
+                moves.append(Move((homeRow, 4), (homeRow, 6), self.board, isCastleMove=True))
+        if queenside and not occupied & (0b111 << (kingSq - 3)):
+            if not self.attackersTo(kingSq - 1, enemyColour, occupied) and \
+                    not self.attackersTo(kingSq - 2, enemyColour, occupied):
+                moves.append(Move((homeRow, 4), (homeRow, 2), self.board, isCastleMove=True))
@@ -1,353 +1,942 @@
-# This class will be responsible for storing current and previous states of a chess game. 
-# It will also determine the validity of a move
-
-class GameState:
-    def __init__(self):  # constructor
-        # Board is an 8x8 2d list
-        # First value 'b' or 'w' represent colour
-        # Second value is piece type
-        # '--' represents an empty
-
-        self.board = [
-            ["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
-            ["bp", "bp", "bp", "bp", "bp", "bp", "bp", "bp"],
-            ["--", "--", "--", "--", "--", "--", "--", "--", ],
-            ["--", "--", "--", "--", "--", "--", "--", "--", ],
-            ["--", "--", "--", "--", "--", "--", "--", "--", ],
-            ["--", "--", "--", "--", "--", "--", "--", "--", ],
-            ["wp", "wp", "wp", "wp", "wp", "wp", "wp", "wp"],
-            ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"],
-        ]
-        self.moveFunctions = {'p': self.getPawnMoves, 'R': self.getRookMoves, 'N': self.getKnightMoves,
-                              'B': self.getBishopMoves, 'Q': self.getQueenMoves, 'K': self.getKingMoves}
-        self.whiteToMove = True
-        self.moveLog = []
-        self.whiteKingLoc = (7, 4)
-        self.blackKingLoc = (0, 4)
-        self.checkMate = False
-        self.staleMate = False
-        self.enPassantPoss = () # coordinates of square where en passant is possible
-        self.currentCastlingRights = CastleRights(True,True, True, True)
-        self.castleRightsLog = [CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.bks,
-                                             self.currentCastlingRights.wqs, self.currentCastlingRights.bqs)]
-
-    def makeMove(self, move):
-        self.board[move.startRow][move.startColumn] = "--"  # replaces piece moved with empty space
-        self.board[move.endRow][move.endColumn] = move.pieceMoved  # puts piece moved in new position on board
-        self.moveLog.append(move)  # log the move
-        self.whiteToMove = not self.whiteToMove  # oppositions go
-        # if king moves, update location
-        if move.pieceMoved == "wK":
-            self.whiteKingLoc = (move.endRow, move.endColumn)
-        elif move.pieceMoved == "bK":
-            self.blackKingLoc = (move.endRow, move.endColumn)
-
-        # pawn promotion
-        if move.isPawnPromotion:
-            self.board[move.endRow][move.endColumn] = move.pieceMoved[0] + 'Q'
-
-        # en passant
-        if move.isEnPassantMove:
-            self.board[move.startRow][move.endColumn] = "--" # captures pawn
-        if move.pieceMoved[1] == 'p' and abs(move.startRow - move.endRow) == 2: # if pawn advances two squares
-            self.enPassantPoss = ((move.startRow + move.endRow) // 2, move.startColumn)
-        else:
-            self.enPassantPoss = ()
-
-        # castle move
-        if move.isCastleMove:
-            if move.endColumn - move.startColumn == 2:  # kingside castle
-                self.board[move.endRow][move.endColumn - 1] = self.board[move.endRow][move.endColumn + 1]  # moves rook
-                self.board[move.endRow][move.endColumn + 1] = '--'  # erase old rook
-            else:  # queenside castle
-                self.board[move.endRow][move.endColumn + 1] = self.board[move.endRow][move.endColumn - 2]  # moves rook
-                self.board[move.endRow][move.endColumn - 2] = '--'  # erase old rook
-
-        # update castling rights, when a rook or king moves
-        self.updateCastleRight(move)
-        self.castleRightsLog.append(CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.bks,
-                                             self.currentCastlingRights.wqs, self.currentCastlingRights.bqs))
-
-
-    def undoMove(self):
-        if len(self.moveLog) != 0:
-            move = self.moveLog.pop()  # stores last move and removes it from moveLog
-            self.board[move.startRow][move.startColumn] = move.pieceMoved  # moves piece back
-            self.board[move.endRow][move.endColumn] = move.pieceCaptured  # puts captured piece back on board
-            self.whiteToMove = not self.whiteToMove
-            # if king moves, update location
-            if move.pieceMoved == "wK":
-                self.whiteKingLoc = (move.startRow, move.startColumn)
-            elif move.pieceMoved == "bK":
-                self.blackKingLoc = (move.startRow, move.startColumn)
-            # undo en passant
-            if move.isEnPassantMove:
-                self.board[move.endRow][move.endColumn] = '--'
-                self.board[move.startRow][move.endColumn] = move.pieceCaptured
-                self.enPassantPoss = (move.endRow, move.endColumn)
-            if move.pieceMoved[1] == 'p' and abs(move.startRow - move.endRow) == 2:
-                self.enPassantPoss = ()
-            # undo castle rights
-            self.castleRightsLog.pop() # remove latest castle rights
-            newRights = self.castleRightsLog[-1] # set current rights to last rights
-            self.currentCastlingRights = CastleRights(newRights.wks, newRights.bks, newRights.wqs, newRights.bqs)
-            # undo castle move
-            if move.isCastleMove:
-                if move.endColumn - move.startColumn == 2: # kingside
-                    self.board[move.endRow][move.endColumn + 1] = self.board[move.endRow][move.endColumn - 1]
-                    self.board[move.endRow][move.endColumn - 1] = '--'
-                else: # queenside
-                    self.board[move.endRow][move.endColumn - 2] = self.board[move.endRow][move.endColumn +1]
-                    self.board[move.endRow][move.endColumn + 1] = '--'
-            self.checkMate = False
-            self.staleMate = False
-
-
-    def updateCastleRight(self,move):
-        if move.pieceMoved == 'wK':
-            self.currentCastlingRights.wks = False
-            self.currentCastlingRights.wqs = False
-        elif move.pieceMoved == 'bk':
-            self.currentCastlingRights.bks = False
-            self.currentCastlingRights.bqs = False
-        elif move.pieceMoved == 'wR':
-            if move.startRow == 7:
-                if move.startColumn == 0: # left rook
-                    self.currentCastlingRights.wqs = False
-                elif move.startColumn == 7: # right rook
-                    self.currentCastlingRights.wks = False
-        elif move.pieceMoved == 'bR':
-            if move.startRow == 0:
-                if move.startColumn == 0: # left rook
-                    self.currentCastlingRights.bqs = False
-                elif move.startColumn == 7: # right rook
-                    self.currentCastlingRights.bks = False
-
-    # moves considering checks
-    def getValidMoves(self):
-        tempEnPassantPoss = self.enPassantPoss
-        tempCastleRights = CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.bks,
-                                        self.currentCastlingRights.wqs, self.currentCastlingRights.bqs)
-        # 1. generate all possible moves
-        # 2. for each move, make the move
-        # 3. generate all opponent's moves
-        # 4. for each of opponent's move check if king is being attacked
-        # 5. if they attack your king, not valid move
-        moves = self.allPossibleMoves()
-        if self.whiteToMove:
-            self.getCastleMoves(self.whiteKingLoc[0],self.whiteKingLoc[1], moves)
-        else:
-            self.getCastleMoves(self.blackKingLoc[0],self.blackKingLoc[1], moves)
-        for i in range(len(moves) - 1, -1, -1):  # when removing from a list, iterate backwards
-            self.makeMove(moves[i])
-            self.whiteToMove = not self.whiteToMove
-            if self.inCheck():
-                moves.remove(moves[i])
-            self.whiteToMove = not self.whiteToMove
-            self.undoMove()
-        if len(moves) == 0: # either checkmate or stalemate
-            if self.inCheck():
-                self.checkMate = True
-            else:
-                self.staleMate = True
-        else:
-            self.checkMate = False
-            self.staleMate = False
-        self.enPassantPoss = tempEnPassantPoss
-        self.currentCastlingRights = tempCastleRights
-        return moves
-
-    # determine if current player is in check
-    def inCheck(self):
-        if self.whiteToMove:
-            return self.squareUnderAttack(self.whiteKingLoc[0], self.whiteKingLoc[1])
-        else:
-            return self.squareUnderAttack(self.blackKingLoc[0], self.blackKingLoc[1])
-
-    # determine if enemy can attack the square r, c
-    def squareUnderAttack(self, r, c):
-        self.whiteToMove = not self.whiteToMove # switch to opponent's turn
-        oppMoves = self.allPossibleMoves()
-        self.whiteToMove = not self.whiteToMove  # switch turn back
-        for move in oppMoves:
-            if move.endRow == r and move.endColumn == c: # square is under attack
-                return True
-        return False
-
-    def allPossibleMoves(self):
-        moves = []
-        for r in range(len(self.board)):  # number of rows
-            for c in range(len(self.board[r])):  # number of columns in r
-                colourOfPiece = self.board[r][c][0]  # 1st letter in appropriate square indicates colour of piece
-                if (colourOfPiece == 'w' and self.whiteToMove) or (colourOfPiece == 'b' and not self.whiteToMove):
-                    piece = self.board[r][c][1]  # 2nd letter in piece name indicates type
-                    self.moveFunctions[piece](r, c, moves)
-        return moves
-
-    # Gets all valid pawn moves for the pawn located at row, column and add to list of valid moves
-    def getPawnMoves(self, r, c, moves):
-        if self.whiteToMove:  # white's move
-            if self.board[r - 1][c] == "--":  # 1 square pawn advance
-                moves.append(Move((r, c), (r - 1, c), self.board))
-                if r == 6 and self.board[r - 2][c] == "--":  # 2 square pawn advance
-                    moves.append(Move((r, c), (r - 2, c), self.board))
-            if c >= 1:
-                if self.board[r - 1][c - 1][0] == 'b':  # diagonal capture (left)
-                    moves.append(Move((r, c), (r - 1, c - 1), self.board))
-                elif (r-1,c-1) == self.enPassantPoss:
-                    moves.append(Move((r,c),(r-1,c-1),self.board, isEnPassantMove=True))
-            if c <= 6:
-                if self.board[r - 1][c + 1][0] == 'b':  # diagonal capture (right)
-                    moves.append(Move((r, c), (r - 1, c + 1), self.board))
-                elif (r-1,c+1) == self.enPassantPoss:
-                    moves.append(Move((r,c),(r-1,c+1),self.board, isEnPassantMove=True))
-
-        else:  # black's move
-                if self.board[r + 1][c] == "--":  # 1 square pawn advance
-                    moves.append(Move((r, c), (r + 1, c), self.board))
-                    if r == 1 and self.board[r + 2][c] == "--":  # 2 square pawn advance
-                        moves.append(Move((r, c), (r + 2, c), self.board))
-                if c >= 1:
-                    if self.board[r + 1][c - 1][0] == 'w':  # diagonal capture (left)
-                        moves.append(Move((r, c), (r + 1, c - 1), self.board))
-                    elif (r + 1, c - 1) == self.enPassantPoss:
-                        moves.append(Move((r, c), (r + 1, c - 1), self.board, isEnPassantMove=True))
-                if c <= 6:
-                    if self.board[r + 1][c + 1][0] == 'w':  # diagonal capture (right)
-                        moves.append(Move((r, c), (r + 1, c + 1), self.board))
-                    elif (r + 1, c + 1) == self.enPassantPoss:
-                        moves.append(Move((r, c), (r + 1, c + 1), self.board, isEnPassantMove=True))
-
-    def getRookMoves(self, r, c, moves):
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1))  # nested tuple of directions (up, left, down, right)
-        enemyPiece = 'b' if self.whiteToMove else 'w'
-        for d in directions:
-            for i in range(1, 8):
-                endRow = r + d[0] * i  # where d[i] is the row of ith direction tuple
-                endColumn = c + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endColumn < 8:  # if on board
-                    endPiece = self.board[endRow][endColumn]
-                    if endPiece == "--":  # if end position is empty, valid move
-                        moves.append(Move((r, c), (endRow, endColumn), self.board))
-                    elif endPiece[0] == enemyPiece:  # if end position is enemy, valid move and break
-                        moves.append(Move((r, c), (endRow, endColumn), self.board))
-                        break
-                    else:
-                        break
-                else:
-                    break
-
-    def getKnightMoves(self, r, c, moves):
-        directions = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2))
-        allyColour = 'w' if self.whiteToMove else 'b'
-        for d in directions:
-            endRow = r + d[0]
-            endColumn = c + d[1]
-            if 0 <= endRow < 8 and 0 <= endColumn < 8:
-                if self.board[endRow][endColumn][0] != allyColour:
-                    moves.append(Move((r, c), (endRow, endColumn), self.board))
-
-    def getBishopMoves(self, r, c, moves):
-        directions = ((-1, -1), (-1, 1), (1, 1), (1, -1))
-        enemyPiece = 'b' if self.whiteToMove else 'w'
-        for d in directions:
-            for i in range(1, 8):
-                endRow = r + i * d[0]
-                endColumn = c + i * d[1]
-                if 0 <= endRow < 8 and 0 <= endColumn < 8:
-                    endPiece = self.board[endRow][endColumn]
-                    if endPiece == "--":
-                        moves.append(Move((r, c), (endRow, endColumn), self.board))
-                    elif endPiece[0] == enemyPiece:
-                        moves.append(Move((r, c), (endRow, endColumn), self.board))
-                        break
-                    else:
-                        break
-                else:
-                    break
-
-    def getQueenMoves(self, r, c, moves):
-        self.getRookMoves(r, c, moves)
-        self.getBishopMoves(r, c, moves)
-
-    def getKingMoves(self, r, c, moves):
-        kingMoves = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, 1), (1, -1))
-        allyColour = 'w' if self.whiteToMove else 'b'
-        for i in range(8):
-            endRow = r + kingMoves[i][0]
-            endColumn = c + kingMoves[i][1]
-            if 0 <= endRow < 8 and 0 <= endColumn < 8:
-                endPiece = self.board[endRow][endColumn]
-                if endPiece[0] != allyColour:
-                    moves.append(Move((r, c), (endRow, endColumn), self.board))
-
-    def getCastleMoves(self, r, c, moves):
-        # can't castle in check
-        if self.squareUnderAttack(r,c):
-            return
-        # king side castling
-        if (self.whiteToMove and self.currentCastlingRights.wks) or (not self.whiteToMove and self.currentCastlingRights.bks):
-            self.getKingsideCastleMoves(r, c, moves)
-        # queen side castling
-        if (self.whiteToMove and self.currentCastlingRights.wqs) or (not self.whiteToMove and self.currentCastlingRights.bqs):
-            self.getQueenSideCastleMoves(r, c, moves)
-
-
-    def getKingsideCastleMoves(self, r, c, moves): # todo index error on self.board line
-        if self.board[r][c+1] == '--' and self.board[r][c+2] == '--':
-            if not self.squareUnderAttack(r,c+1) and not self.squareUnderAttack(r,c+2):
-                moves.append(Move((r,c),(r,c+2),self.board, isCastleMove = True))
-
-
-    def getQueenSideCastleMoves(self, r, c, moves):
-        if self.board[r][c-1] == '--' and self.board[r][c-2] == '--' and self.board[r][c-3] == '--':
-            if not self.squareUnderAttack(r,c-1) and not self.squareUnderAttack(r,c-2):
-                moves.append(Move((r,c),(r,c-2),self.board, isCastleMove = True))
-
-
-class CastleRights():
-    def __init__(self,wks,bks,wqs,bqs):
-        self.wks = wks
-        self.bks = bks
-        self.wqs = wqs
-        self.bqs = bqs
-
-# this class converts from matrix to chess notation and back
-class Move:
-    # converts chess notation of ranks to rows
-    ranksToRows = {"1": 7, "2": 6, "3": 5, "4": 4, "5": 3, "6": 2, "7": 1, "8": 0}
-    # flips ranksToRows dictionary
-    rowToRanks = {v: k for k, v in ranksToRows.items()}
-    # convert notation for columns
-    filesToColumns = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7}
-    columnsToFiles = {v: k for k, v in filesToColumns.items()}
-
-    def __init__(self, startSq, endSq, board, isEnPassantMove = False, isCastleMove = False):
-        self.startRow = startSq[0]
-        self.startColumn = startSq[1]
-        self.endRow = endSq[0]
-        self.endColumn = endSq[1]
-        self.pieceMoved = board[self.startRow][self.startColumn]  # stores piece that was moved
-        self.pieceCaptured = board[self.endRow][self.endColumn]  # stores piece that was captured
-        # pawn promotion
-        self.isPawnPromotion = (self.pieceMoved == 'wp' and self.endRow == 0) or (self.pieceMoved == 'bp' and self.endRow == 7)
-        # en passant
-        self.isEnPassantMove = isEnPassantMove
-        if self.isEnPassantMove:
-            self.pieceCaptured = 'wp' if self.pieceMoved == 'bp' else 'bp'
-        # castle move
-        self.isCastleMove = isCastleMove
-        # stores unique ID for each move (like a hash function)
-        self.moveID = self.startRow * 1000 + self.startColumn * 100 + self.endRow * 10 + self.endColumn
-
-    # since move objects are different, overriding the equals method checks if same move for different objects
-    def __eq__(self, other):  # checks if object is equal to another object
-        if isinstance(other, Move):  # checks if other object is an instance of the Move Class
-            return self.moveID == other.moveID  # return true if moveID is equal to other moveID
-        return False
-
-    def getChessNotation(self):
-        return self.getRankFile(self.startRow, self.startColumn) + self.getRankFile(self.endRow, self.endColumn)
-
-    def getRankFile(self, r, c):
-        return self.columnsToFiles[c] + self.rowToRanks[r]
+# This class will be responsible for storing current and previous states of a chess game. 
+# It will also determine the validity of a move
+
+import random
+from array import array
+import evaluation
+
+# Zobrist keys, a position's key is the xor of the keys of everything in it
+# seeded so that keys are the same every run and can be stored
+zobristRandom = random.Random(2022)
+zobristPieces = {colour + pieceType: [zobristRandom.getrandbits(64) for _ in range(64)]
+                 for colour in 'wb' for pieceType in 'pNBRQK'}  # zobristPieces['wp'][r * 8 + c]
+zobristBlackToMove = zobristRandom.getrandbits(64)
+zobristCastlingRights = [zobristRandom.getrandbits(64) for _ in range(4)]  # wks, bks, wqs, bqs
+zobristEnPassant = [zobristRandom.getrandbits(64) for _ in range(8)]  # en passant column
+
+# castling rights are 4 bits of one int, in the same order as zobristCastlingRights
+whiteKingside, blackKingside, whiteQueenside, blackQueenside = 1, 2, 4, 8
+allCastlingRights = 15
+# xor of the keys of every right in each of the 16 combinations
+zobristCastlingKeys = [0] * 16
+for rights in range(16):
+    for bit in range(4):
+        if rights & (1 << bit):
+            zobristCastlingKeys[rights] ^= zobristCastlingRights[bit]
+# FEN letter of each castling right and the square its rook starts on
+castlingRooks = {whiteKingside: ('K', 7, 7), blackKingside: ('k', 0, 7), whiteQueenside: ('Q', 7, 0),
+                 blackQueenside: ('q', 0, 0)}
+# rights that survive a move from or to each square, a king or rook leaving home or a rook captured at home
+castlingMasks = [allCastlingRights] * 64
+castlingMasks[7 * 8 + 4] = allCastlingRights & ~(whiteKingside | whiteQueenside)  # e1
+castlingMasks[7 * 8 + 7] = allCastlingRights & ~whiteKingside  # h1
+castlingMasks[7 * 8 + 0] = allCastlingRights & ~whiteQueenside  # a1
+castlingMasks[0 * 8 + 4] = allCastlingRights & ~(blackKingside | blackQueenside)  # e8
+castlingMasks[0 * 8 + 7] = allCastlingRights & ~blackKingside  # h8
+castlingMasks[0 * 8 + 0] = allCastlingRights & ~blackQueenside  # a8
+
+
+# FEN letters for each piece, upper case is white
+fenPieces = {'P': 'wp', 'N': 'wN', 'B': 'wB', 'R': 'wR', 'Q': 'wQ', 'K': 'wK',
+             'p': 'bp', 'n': 'bN', 'b': 'bB', 'r': 'bR', 'q': 'bQ', 'k': 'bK'}
+pieceSymbols = {piece: symbol for symbol, piece in fenPieces.items()}
+emptySquares = {str(n): ["--"] * n for n in range(1, 9)}
+
+
+class GameState:
+    # directions used when looking outward from a square
+    rookDirections = ((-1, 0), (0, -1), (1, 0), (0, 1))
+    bishopDirections = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+    allDirections = rookDirections + bishopDirections
+    knightSteps = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2))
+    debugZobrist = False  # when True every makeMove and undoMove checks the key against a full recompute
+
+    def __init__(self, fen=None):  # constructor, sets up the starting position or the position in fen
+        # Board is an 8x8 2d list
+        # First value 'b' or 'w' represent colour
+        # Second value is piece type
+        # '--' represents an empty
+
+        self.board = [
+            ["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
+            ["bp", "bp", "bp", "bp", "bp", "bp", "bp", "bp"],
+            ["--", "--", "--", "--", "--", "--", "--", "--", ],
+            ["--", "--", "--", "--", "--", "--", "--", "--", ],
+            ["--", "--", "--", "--", "--", "--", "--", "--", ],
+            ["--", "--", "--", "--", "--", "--", "--", "--", ],
+            ["wp", "wp", "wp", "wp", "wp", "wp", "wp", "wp"],
+            ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"],
+        ]
+        self.moveFunctions = {'p': self.getPawnMoves, 'R': self.getRookMoves, 'N': self.getKnightMoves,
+                              'B': self.getBishopMoves, 'Q': self.getQueenMoves, 'K': self.getKingMoves}
+        self.whiteToMove = True
+        self.whiteKingLoc = (7, 4)
+        self.blackKingLoc = (0, 4)
+        self.enPassantPoss = () # coordinates of square where en passant is possible
+        self.castlingRights = allCastlingRights  # whiteKingside | blackKingside | ... bits still available
+        self.halfMoveClock = 0  # moves since the last capture or pawn move, for the 50 move rule
+        self.fullMoveNumber = 1  # starts at 1 and goes up after each black move
+        if fen is None:
+            self.initPositionState()
+        else:
+            self.loadFen(fen)
+
+    # builds a GameState straight from a FEN string without setting up the starting position first
+    @classmethod
+    def from_fen(cls, fen):
+        return cls(fen)
+
+    # resets the logs and rebuilds everything worked out from the board, call after the position is changed by hand
+    def initPositionState(self):
+        self.moveLog = []
+        self.checkMate = False
+        self.staleMate = False
+        # one tuple per move made, everything the move can't be undone without:
+        # (zobristKey, castlingRights, enPassantPoss, halfMoveClock, the 7 evaluation totals) from before the move
+        self.undoStack = []
+        self.whiteAttackMap = None  # cached attack maps, see getAttackMap
+        self.blackAttackMap = None
+        self.zobristKey = self.computeZobristKey()  # 64 bit key of the position
+        self.computeEvaluation()  # running material and piece square totals
+
+    # replaces the current position with the one in fen, the move history is lost
+    def loadFen(self, fen):
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError("FEN needs at least 4 fields: " + fen)
+        rows = fields[0].split('/')
+        if len(rows) != 8:
+            raise ValueError("FEN board needs 8 rows: " + fen)
+        board = []
+        for r in range(8):
+            boardRow = []
+            for symbol in rows[r]:
+                if symbol in '12345678':
+                    boardRow.extend(emptySquares[symbol])
+                else:
+                    piece = fenPieces.get(symbol)
+                    if piece is None:
+                        raise ValueError("unknown piece " + symbol + " in FEN: " + fen)
+                    if piece == "wK":
+                        self.whiteKingLoc = (r, len(boardRow))
+                    elif piece == "bK":
+                        self.blackKingLoc = (r, len(boardRow))
+                    boardRow.append(piece)
+            if len(boardRow) != 8:
+                raise ValueError("FEN row " + rows[r] + " isn't 8 squares long: " + fen)
+            board.append(boardRow)
+        kings = [piece for boardRow in board for piece in boardRow if piece[1] == 'K']
+        if sorted(kings) != ["bK", "wK"]:
+            raise ValueError("FEN needs one king of each colour: " + fen)
+        if fields[3] != '-' and (len(fields[3]) != 2 or fields[3][0] not in Move.filesToColumns or
+                                 fields[3][1] not in Move.ranksToRows):
+            raise ValueError("bad en passant square " + fields[3] + " in FEN: " + fen)
+        if fields[1] not in ('w', 'b'):
+            raise ValueError("side to move has to be w or b in FEN: " + fen)
+        castling = fields[2]
+        if castling != '-' and not set(castling) <= set('KQkq'):
+            raise ValueError("bad castling rights " + castling + " in FEN: " + fen)
+        self.board = board
+        self.whiteToMove = fields[1] == 'w'
+        # a right is only kept when its king and rook are on their starting squares, like makeMove keeps them
+        self.castlingRights = 0
+        for right, (symbol, r, c) in castlingRooks.items():
+            colour = 'w' if r == 7 else 'b'
+            if symbol in castling and board[r][4] == colour + 'K' and board[r][c] == colour + 'R':
+                self.castlingRights |= right
+        if fields[3] == '-':
+            self.enPassantPoss = ()
+        else:
+            self.enPassantPoss = (Move.ranksToRows[fields[3][1]], Move.filesToColumns[fields[3][0]])
+        self.halfMoveClock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullMoveNumber = int(fields[5]) if len(fields) > 5 else 1
+        self.initPositionState()
+
+    # FEN string of the current position
+    def to_fen(self):
+        rows = []
+        for boardRow in self.board:
+            row = ''
+            empty = 0
+            for piece in boardRow:
+                if piece == "--":
+                    empty += 1
+                else:
+                    if empty:
+                        row += str(empty)
+                        empty = 0
+                    row += pieceSymbols[piece]
+            if empty:
+                row += str(empty)
+            rows.append(row)
+        rights = self.castlingRights
+        castling = ('K' if rights & whiteKingside else '') + ('Q' if rights & whiteQueenside else '') + \
+                   ('k' if rights & blackKingside else '') + ('q' if rights & blackQueenside else '')
+        if self.enPassantPoss == ():
+            enPassant = '-'
+        else:
+            enPassant = Move.columnsToFiles[self.enPassantPoss[1]] + Move.rowToRanks[self.enPassantPoss[0]]
+        return ' '.join(('/'.join(rows), 'w' if self.whiteToMove else 'b', castling or '-', enPassant,
+                         str(self.halfMoveClock), str(self.fullMoveNumber)))
+
+    def makeMove(self, move):
+        self.undoStack.append((self.zobristKey, self.castlingRights, self.enPassantPoss, self.halfMoveClock,
+                               self.materialScore['w'], self.materialScore['b'], self.middleGameScore['w'],
+                               self.middleGameScore['b'], self.endGameScore['w'], self.endGameScore['b'],
+                               self.gamePhase))
+        key = self.zobristKey ^ zobristBlackToMove ^ zobristCastlingKeys[self.castlingRights]
+        if self.enPassantPoss != ():
+            key ^= zobristEnPassant[self.enPassantPoss[1]]
+        startSq = move.startRow * 8 + move.startColumn
+        endSq = move.endRow * 8 + move.endColumn
+        key ^= zobristPieces[move.pieceMoved][startSq]
+        if move.pieceCaptured != "--" and not move.isEnPassantMove:
+            key ^= zobristPieces[move.pieceCaptured][endSq]
+        self.updatePieceEvaluation(move.pieceMoved, startSq, -1)
+        if move.pieceCaptured != "--":
+            capturedSq = move.startRow * 8 + move.endColumn if move.isEnPassantMove else endSq
+            self.updatePieceEvaluation(move.pieceCaptured, capturedSq, -1)
+        self.board[move.startRow][move.startColumn] = "--"  # replaces piece moved with empty space
+        self.board[move.endRow][move.endColumn] = move.pieceMoved  # puts piece moved in new position on board
+        self.moveLog.append(move)  # log the move
+        if move.pieceMoved[1] == 'p' or move.pieceCaptured != "--":
+            self.halfMoveClock = 0
+        else:
+            self.halfMoveClock += 1
+        if not self.whiteToMove:
+            self.fullMoveNumber += 1
+        self.whiteToMove = not self.whiteToMove  # oppositions go
+        self.whiteAttackMap = None
+        self.blackAttackMap = None
+        # if king moves, update location
+        if move.pieceMoved == "wK":
+            self.whiteKingLoc = (move.endRow, move.endColumn)
+        elif move.pieceMoved == "bK":
+            self.blackKingLoc = (move.endRow, move.endColumn)
+
+        # pawn promotion
+        if move.isPawnPromotion:
+            self.board[move.endRow][move.endColumn] = move.pieceMoved[0] + 'Q'
+        key ^= zobristPieces[self.board[move.endRow][move.endColumn]][endSq]
+        self.updatePieceEvaluation(self.board[move.endRow][move.endColumn], endSq, 1)
+
+        # en passant
+        if move.isEnPassantMove:
+            self.board[move.startRow][move.endColumn] = "--" # captures pawn
+            key ^= zobristPieces[move.pieceCaptured][move.startRow * 8 + move.endColumn]
+        if move.pieceMoved[1] == 'p' and abs(move.startRow - move.endRow) == 2: # if pawn advances two squares
+            self.enPassantPoss = ((move.startRow + move.endRow) // 2, move.startColumn)
+            key ^= zobristEnPassant[move.startColumn]
+        else:
+            self.enPassantPoss = ()
+
+        # castle move
+        if move.isCastleMove:
+            if move.endColumn - move.startColumn == 2:  # kingside castle
+                rookFrom, rookTo = move.endColumn + 1, move.endColumn - 1
+            else:  # queenside castle
+                rookFrom, rookTo = move.endColumn - 2, move.endColumn + 1
+            rook = self.board[move.endRow][rookFrom]
+            self.board[move.endRow][rookTo] = rook  # moves rook
+            self.board[move.endRow][rookFrom] = '--'  # erase old rook
+            if rook != '--':
+                key ^= zobristPieces[rook][move.endRow * 8 + rookFrom] ^ zobristPieces[rook][move.endRow * 8 + rookTo]
+                self.updatePieceEvaluation(rook, move.endRow * 8 + rookFrom, -1)
+                self.updatePieceEvaluation(rook, move.endRow * 8 + rookTo, 1)
+
+        # update castling rights, when a king or rook leaves its square or a rook is captured on its square
+        self.castlingRights &= castlingMasks[startSq] & castlingMasks[endSq]
+        self.zobristKey = key ^ zobristCastlingKeys[self.castlingRights]
+        if self.debugZobrist:
+            self.checkZobristKey()
+
+
+    def undoMove(self):
+        if len(self.moveLog) != 0:
+            move = self.moveLog.pop()  # stores last move and removes it from moveLog
+            self.board[move.startRow][move.startColumn] = move.pieceMoved  # moves piece back
+            self.board[move.endRow][move.endColumn] = move.pieceCaptured  # puts captured piece back on board
+            self.whiteToMove = not self.whiteToMove
+            self.zobristKey, self.castlingRights, self.enPassantPoss, self.halfMoveClock, \
+                self.materialScore['w'], self.materialScore['b'], self.middleGameScore['w'], \
+                self.middleGameScore['b'], self.endGameScore['w'], self.endGameScore['b'], \
+                self.gamePhase = self.undoStack.pop()
+            if not self.whiteToMove:
+                self.fullMoveNumber -= 1
+            self.whiteAttackMap = None
+            self.blackAttackMap = None
+            # if king moves, update location
+            if move.pieceMoved == "wK":
+                self.whiteKingLoc = (move.startRow, move.startColumn)
+            elif move.pieceMoved == "bK":
+                self.blackKingLoc = (move.startRow, move.startColumn)
+            # undo en passant
+            if move.isEnPassantMove:
+                self.board[move.endRow][move.endColumn] = '--'
+                self.board[move.startRow][move.endColumn] = move.pieceCaptured
+            # undo castle move
+            if move.isCastleMove:
+                if move.endColumn - move.startColumn == 2: # kingside
+                    self.board[move.endRow][move.endColumn + 1] = self.board[move.endRow][move.endColumn - 1]
+                    self.board[move.endRow][move.endColumn - 1] = '--'
+                else: # queenside
+                    self.board[move.endRow][move.endColumn - 2] = self.board[move.endRow][move.endColumn +1]
+                    self.board[move.endRow][move.endColumn + 1] = '--'
+            self.checkMate = False
+            self.staleMate = False
+            if self.debugZobrist:
+                self.checkZobristKey()
+
+    # true when the current position has come up count times, only positions since the last capture or pawn move
+    # can repeat so the rest of the log isn't looked at
+    def isRepetition(self, count=3):
+        seen = 1
+        first = max(len(self.undoStack) - self.halfMoveClock, 0)
+        for index in range(len(self.undoStack) - 1, first - 1, -1):
+            if self.undoStack[index][0] == self.zobristKey:
+                seen += 1
+        return seen >= count
+
+    # 50 moves by each side without a capture or a pawn move
+    def isFiftyMoveDraw(self):
+        return self.halfMoveClock >= 100
+
+    # neither side can mate: bare kings, a single knight or bishop, or bishops that all stand on one colour
+    def insufficientMaterial(self):
+        pieces = []
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--" and piece[1] != 'K':
+                    if piece[1] in 'pRQ':
+                        return False
+                    pieces.append((piece[1], (r + c) % 2))
+        if len(pieces) <= 1:
+            return True
+        return all(pieceType == 'B' for pieceType, squareColour in pieces) and \
+            len(set(squareColour for pieceType, squareColour in pieces)) == 1
+
+    # passes the turn without moving anything, used by null move pruning in the search
+    # the board, evaluation and attack maps don't change, take it back with undoNullMove and not undoMove
+    def makeNullMove(self):
+        self.undoStack.append((self.zobristKey, self.castlingRights, self.enPassantPoss, self.halfMoveClock,
+                               self.materialScore['w'], self.materialScore['b'], self.middleGameScore['w'],
+                               self.middleGameScore['b'], self.endGameScore['w'], self.endGameScore['b'],
+                               self.gamePhase))
+        key = self.zobristKey ^ zobristBlackToMove
+        if self.enPassantPoss != ():
+            key ^= zobristEnPassant[self.enPassantPoss[1]]
+        self.enPassantPoss = ()
+        self.whiteToMove = not self.whiteToMove
+        self.zobristKey = key
+
+    def undoNullMove(self):
+        self.zobristKey, self.castlingRights, self.enPassantPoss, self.halfMoveClock = self.undoStack.pop()[:4]
+        self.whiteToMove = not self.whiteToMove
+        self.checkMate = False
+        self.staleMate = False
+
+    # adds (sign 1) or removes (sign -1) a piece from the running evaluation totals
+    def updatePieceEvaluation(self, piece, sq, sign):
+        colour = piece[0]
+        self.materialScore[colour] += sign * evaluation.pieceScore[piece[1]]
+        self.middleGameScore[colour] += sign * evaluation.middleGameSquares[piece][sq]
+        self.endGameScore[colour] += sign * evaluation.endGameSquares[piece][sq]
+        self.gamePhase += sign * evaluation.phaseWeights[piece[1]]
+
+    # builds the evaluation totals of the current position from scratch
+    def computeEvaluation(self):
+        self.materialScore = {'w': 0, 'b': 0}  # sum of pieceScore for each side
+        self.middleGameScore = {'w': 0, 'b': 0}  # piece square table totals for each side and game phase
+        self.endGameScore = {'w': 0, 'b': 0}
+        self.gamePhase = 0  # evaluation.totalPhase at the start, 0 when only kings and pawns are left
+        sq = 0
+        for boardRow in self.board:  # sums straight into the totals, this runs for every position loaded from a FEN
+            for piece in boardRow:
+                if piece != "--":
+                    colour = piece[0]
+                    self.materialScore[colour] += evaluation.pieceScore[piece[1]]
+                    self.middleGameScore[colour] += evaluation.middleGameSquares[piece][sq]
+                    self.endGameScore[colour] += evaluation.endGameSquares[piece][sq]
+                    self.gamePhase += evaluation.phaseWeights[piece[1]]
+                sq += 1
+
+    # builds the key of the current position from scratch
+    def computeZobristKey(self):
+        key = 0
+        sq = 0
+        for boardRow in self.board:
+            for piece in boardRow:
+                if piece != "--":
+                    key ^= zobristPieces[piece][sq]
+                sq += 1
+        if not self.whiteToMove:
+            key ^= zobristBlackToMove
+        key ^= zobristCastlingKeys[self.castlingRights]
+        if self.enPassantPoss != ():
+            key ^= zobristEnPassant[self.enPassantPoss[1]]
+        return key
+
+    def checkZobristKey(self):
+        if self.zobristKey != self.computeZobristKey():
+            raise AssertionError("incremental zobrist key " + hex(self.zobristKey) +
+                                 " doesn't match recomputed key " + hex(self.computeZobristKey()))
+
+
+    # moves considering checks
+    def getValidMoves(self):
+        # 1. look outward from the king to find every check and every pinned piece
+        # 2. generate all possible moves
+        # 3. if in double check, only the king can move
+        # 4. if in single check, capture the checking piece, block it or move the king
+        # 5. pinned pieces may only move along the line of the pin
+        # 6. the king may not move onto an attacked square
+        inCheck, pins, checks = self.checkForPinsAndChecks()
+        if self.whiteToMove:
+            kingRow, kingColumn = self.whiteKingLoc
+            enemyColour = 'b'
+        else:
+            kingRow, kingColumn = self.blackKingLoc
+            enemyColour = 'w'
+        if len(checks) > 1:  # double check, king has to move
+            moves = []
+            self.getKingMoves(kingRow, kingColumn, moves)
+        else:
+            moves = self.allPossibleMoves()
+        moves = self.removeIllegalMoves(moves, pins, checks)
+        if not inCheck:
+            castleMoves = []
+            self.getCastleMoves(kingRow, kingColumn, castleMoves)
+            for move in castleMoves:
+                if self.castleIsLegal(move, enemyColour):
+                    moves.append(move)
+        if len(moves) == 0: # either checkmate or stalemate
+            if inCheck:
+                self.checkMate = True
+            else:
+                self.staleMate = True
+        else:
+            self.checkMate = False
+            self.staleMate = False
+        return moves
+
+    # captures and promotions only, for quiescence search
+    # unlike getValidMoves this doesn't set checkMate or staleMate, an empty list just means nothing to capture
+    def getCaptureMoves(self):
+        inCheck, pins, checks = self.checkForPinsAndChecks()
+        return self.removeIllegalMoves(self.allPossibleCaptures(), pins, checks)
+
+    # keeps the moves that don't leave the king in check, using the pins and checks found from the king
+    def removeIllegalMoves(self, moves, pins, checks):
+        if self.whiteToMove:
+            kingRow, kingColumn = self.whiteKingLoc
+            enemyColour = 'b'
+        else:
+            kingRow, kingColumn = self.blackKingLoc
+            enemyColour = 'w'
+        validSquares = None  # squares a non king piece can move to when in check
+        if len(checks) > 1:  # double check, only the king can move
+            validSquares = []
+        elif len(checks) == 1:
+            checkRow, checkColumn, dR, dC = checks[0]
+            if self.board[checkRow][checkColumn][1] == 'N':  # knight must be captured, it can't be blocked
+                validSquares = [(checkRow, checkColumn)]
+            else:
+                validSquares = []
+                for i in range(1, 8):
+                    validSquare = (kingRow + dR * i, kingColumn + dC * i)
+                    validSquares.append(validSquare)
+                    if validSquare == (checkRow, checkColumn):  # stop once at the checking piece
+                        break
+        self.board[kingRow][kingColumn] = "--"  # lift the king so it can't hide behind itself
+        legalMoves = []
+        for move in moves:
+            if move.isEnPassantMove:
+                if self.enPassantIsLegal(move, kingRow, kingColumn, enemyColour):
+                    legalMoves.append(move)
+            elif move.startRow == kingRow and move.startColumn == kingColumn:
+                if not self.squareAttackedBy(move.endRow, move.endColumn, enemyColour):
+                    legalMoves.append(move)
+            else:
+                if validSquares is not None and (move.endRow, move.endColumn) not in validSquares:
+                    continue
+                pin = pins.get((move.startRow, move.startColumn))
+                # a pinned piece has to stay on the line between the king and the pinning piece
+                if pin is not None and (move.endRow - kingRow) * pin[1] != (move.endColumn - kingColumn) * pin[0]:
+                    continue
+                legalMoves.append(move)
+        self.board[kingRow][kingColumn] = ('w' if self.whiteToMove else 'b') + 'K'  # put the king back
+        return legalMoves
+
+    # returns the square of the cheapest piece of colour attacking r, c, or None
+    # pieces on the squares in removed are treated as already gone, so attackers behind them are found (x-rays)
+    def getLeastValuableAttacker(self, r, c, colour, removed=()):
+        bestSquare = None
+        bestRank = 6
+        pieceRanks = {'p': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5}
+        for j in range(len(self.allDirections)):
+            d = self.allDirections[j]
+            for i in range(1, 8):
+                endRow = r + d[0] * i
+                endColumn = c + d[1] * i
+                if not (0 <= endRow < 8 and 0 <= endColumn < 8):
+                    break
+                endPiece = self.board[endRow][endColumn]
+                if endPiece == "--" or (endRow, endColumn) in removed:
+                    continue
+                if endPiece[0] == colour:
+                    pieceType = endPiece[1]
+                    if (0 <= j <= 3 and pieceType == 'R') or (4 <= j <= 7 and pieceType == 'B') or \
+                            (i == 1 and pieceType == 'p' and ((colour == 'w' and 6 <= j <= 7) or
+                                                               (colour == 'b' and 4 <= j <= 5))) or \
+                            pieceType == 'Q' or (i == 1 and pieceType == 'K'):
+                        if pieceRanks[pieceType] < bestRank:
+                            bestRank = pieceRanks[pieceType]
+                            bestSquare = (endRow, endColumn)
+                break
+        if bestRank > 0:  # only a pawn is cheaper than a knight
+            for m in self.knightSteps:
+                endRow = r + m[0]
+                endColumn = c + m[1]
+                if 0 <= endRow < 8 and 0 <= endColumn < 8 and self.board[endRow][endColumn] == colour + 'N' and \
+                        (endRow, endColumn) not in removed:
+                    return (endRow, endColumn)
+        return bestSquare
+
+    # returns if the player is in check, a dictionary of pinned pieces and a list of checks
+    def checkForPinsAndChecks(self):
+        pins = {}  # square of pinned ally piece -> direction from the king
+        checks = []  # (row, column, direction row, direction column) of each checking piece
+        inCheck = False
+        if self.whiteToMove:
+            enemyColour, allyColour = 'b', 'w'
+            startRow, startColumn = self.whiteKingLoc
+        else:
+            enemyColour, allyColour = 'w', 'b'
+            startRow, startColumn = self.blackKingLoc
+        # check outward from king for pins and checks, keep track of pins
+        directions = self.allDirections
+        for j in range(len(directions)):
+            d = directions[j]
+            possiblePin = ()  # reset possible pins
+            for i in range(1, 8):
+                endRow = startRow + d[0] * i
+                endColumn = startColumn + d[1] * i
+                if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                    endPiece = self.board[endRow][endColumn]
+                    if endPiece[0] == allyColour:
+                        if possiblePin == ():  # 1st allied piece could be pinned
+                            possiblePin = (endRow, endColumn)
+                        else:  # 2nd allied piece, so no pin or check possible in this direction
+                            break
+                    elif endPiece[0] == enemyColour:
+                        pieceType = endPiece[1]
+                        # 1. orthogonally away from king and piece is a rook
+                        # 2. diagonally away from king and piece is a bishop
+                        # 3. 1 square diagonally away from king and piece is a pawn attacking the king
+                        # 4. any direction and piece is a queen
+                        # 5. any direction 1 square away and piece is a king
+                        if (0 <= j <= 3 and pieceType == 'R') or (4 <= j <= 7 and pieceType == 'B') or \
+                                (i == 1 and pieceType == 'p' and ((enemyColour == 'w' and 6 <= j <= 7) or
+                                                                   (enemyColour == 'b' and 4 <= j <= 5))) or \
+                                pieceType == 'Q' or (i == 1 and pieceType == 'K'):
+                            if possiblePin == ():  # no piece blocking, so check
+                                inCheck = True
+                                checks.append((endRow, endColumn, d[0], d[1]))
+                            else:  # piece blocking so pin
+                                pins[possiblePin] = d
+                        break  # enemy piece blocks anything further along this direction
+                else:
+                    break  # off board
+        # check for knight checks
+        for m in self.knightSteps:
+            endRow = startRow + m[0]
+            endColumn = startColumn + m[1]
+            if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                if self.board[endRow][endColumn] == enemyColour + 'N':  # enemy knight attacking king
+                    inCheck = True
+                    checks.append((endRow, endColumn, m[0], m[1]))
+        return inCheck, pins, checks
+
+    # determine if a piece of enemyColour attacks the square r, c by looking outward from the square
+    # nothing is allocated, so this is cheap enough to call for check detection and castling
+    def squareAttackedBy(self, r, c, enemyColour):
+        directions = self.allDirections
+        for j in range(len(directions)):
+            d = directions[j]
+            for i in range(1, 8):
+                endRow = r + d[0] * i
+                endColumn = c + d[1] * i
+                if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                    endPiece = self.board[endRow][endColumn]
+                    if endPiece == "--":
+                        continue
+                    if endPiece[0] == enemyColour:
+                        pieceType = endPiece[1]
+                        if (0 <= j <= 3 and pieceType == 'R') or (4 <= j <= 7 and pieceType == 'B') or \
+                                (i == 1 and pieceType == 'p' and ((enemyColour == 'w' and 6 <= j <= 7) or
+                                                                   (enemyColour == 'b' and 4 <= j <= 5))) or \
+                                pieceType == 'Q' or (i == 1 and pieceType == 'K'):
+                            return True
+                    break
+                else:
+                    break
+        for m in self.knightSteps:
+            endRow = r + m[0]
+            endColumn = c + m[1]
+            if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                if self.board[endRow][endColumn] == enemyColour + 'N':
+                    return True
+        return False
+
+    # en passant removes two pawns from the same row, which can uncover a check the pins can't see
+    def enPassantIsLegal(self, move, kingRow, kingColumn, enemyColour):
+        capturedRow, capturedColumn = move.startRow, move.endColumn
+        self.board[move.startRow][move.startColumn] = "--"
+        self.board[capturedRow][capturedColumn] = "--"
+        self.board[move.endRow][move.endColumn] = move.pieceMoved
+        legal = not self.squareAttackedBy(kingRow, kingColumn, enemyColour)
+        self.board[move.startRow][move.startColumn] = move.pieceMoved
+        self.board[capturedRow][capturedColumn] = move.pieceCaptured
+        self.board[move.endRow][move.endColumn] = "--"
+        return legal
+
+    # squares the king passes over are checked by getCastleMoves, this checks where the king lands
+    def castleIsLegal(self, move, enemyColour):
+        r = move.endRow
+        if move.endColumn - move.startColumn == 2:  # kingside castle
+            rookFrom, rookTo = move.endColumn + 1, move.endColumn - 1
+        else:  # queenside castle
+            rookFrom, rookTo = move.endColumn - 2, move.endColumn + 1
+        rook = self.board[r][rookFrom]
+        self.board[r][move.startColumn] = "--"
+        self.board[r][rookFrom] = "--"
+        self.board[r][rookTo] = rook
+        self.board[r][move.endColumn] = move.pieceMoved
+        legal = not self.squareAttackedBy(r, move.endColumn, enemyColour)
+        self.board[r][move.endColumn] = "--"
+        self.board[r][rookTo] = "--"
+        self.board[r][rookFrom] = rook
+        self.board[r][move.startColumn] = move.pieceMoved
+        return legal
+
+    # determine if current player is in check
+    def inCheck(self):
+        if self.whiteToMove:
+            return self.squareUnderAttack(self.whiteKingLoc[0], self.whiteKingLoc[1])
+        else:
+            return self.squareUnderAttack(self.blackKingLoc[0], self.blackKingLoc[1])
+
+    # determine if enemy can attack the square r, c
+    def squareUnderAttack(self, r, c):
+        return self.squareAttackedBy(r, c, 'b' if self.whiteToMove else 'w')
+
+    # returns every square attacked by colour as a 64 bit mask, bit (r * 8 + c) is set when r, c is attacked
+    # the map is cached until the next makeMove or undoMove
+    def getAttackMap(self, colour):
+        if colour == 'w':
+            if self.whiteAttackMap is None:
+                self.whiteAttackMap = self.buildAttackMap('w')
+            return self.whiteAttackMap
+        if self.blackAttackMap is None:
+            self.blackAttackMap = self.buildAttackMap('b')
+        return self.blackAttackMap
+
+    def buildAttackMap(self, colour):
+        attacks = 0
+        pawnDirection = -1 if colour == 'w' else 1
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece[0] != colour:
+                    continue
+                pieceType = piece[1]
+                if pieceType == 'p':
+                    endRow = r + pawnDirection
+                    if 0 <= endRow < 8:
+                        if c >= 1:
+                            attacks |= 1 << (endRow * 8 + c - 1)
+                        if c <= 6:
+                            attacks |= 1 << (endRow * 8 + c + 1)
+                elif pieceType == 'N' or pieceType == 'K':
+                    steps = self.knightSteps if pieceType == 'N' else self.allDirections
+                    for d in steps:
+                        endRow = r + d[0]
+                        endColumn = c + d[1]
+                        if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                            attacks |= 1 << (endRow * 8 + endColumn)
+                else:
+                    if pieceType == 'R':
+                        directions = self.rookDirections
+                    elif pieceType == 'B':
+                        directions = self.bishopDirections
+                    else:
+                        directions = self.allDirections
+                    for d in directions:
+                        for i in range(1, 8):
+                            endRow = r + d[0] * i
+                            endColumn = c + d[1] * i
+                            if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                                attacks |= 1 << (endRow * 8 + endColumn)
+                                if self.board[endRow][endColumn] != "--":  # ray stops at the first piece
+                                    break
+                            else:
+                                break
+        return attacks
+
+    def allPossibleMoves(self):
+        moves = []
+        for r in range(len(self.board)):  # number of rows
+            for c in range(len(self.board[r])):  # number of columns in r
+                colourOfPiece = self.board[r][c][0]  # 1st letter in appropriate square indicates colour of piece
+                if (colourOfPiece == 'w' and self.whiteToMove) or (colourOfPiece == 'b' and not self.whiteToMove):
+                    piece = self.board[r][c][1]  # 2nd letter in piece name indicates type
+                    self.moveFunctions[piece](r, c, moves)
+        return moves
+
+    # pseudo legal captures and promotions, without building the quiet moves
+    def allPossibleCaptures(self):
+        moves = []
+        allyColour, enemyColour = ('w', 'b') if self.whiteToMove else ('b', 'w')
+        pawnDirection = -1 if self.whiteToMove else 1
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece[0] != allyColour:
+                    continue
+                pieceType = piece[1]
+                if pieceType == 'p':
+                    endRow = r + pawnDirection
+                    for endColumn in (c - 1, c + 1):
+                        if 0 <= endColumn < 8:
+                            if self.board[endRow][endColumn][0] == enemyColour:
+                                moves.append(Move((r, c), (endRow, endColumn), self.board))
+                            elif (endRow, endColumn) == self.enPassantPoss:
+                                moves.append(Move((r, c), (endRow, endColumn), self.board, isEnPassantMove=True))
+                    if (endRow == 0 or endRow == 7) and self.board[endRow][c] == "--":  # promotion push
+                        moves.append(Move((r, c), (endRow, c), self.board))
+                elif pieceType == 'N' or pieceType == 'K':
+                    for d in (self.knightSteps if pieceType == 'N' else self.allDirections):
+                        endRow = r + d[0]
+                        endColumn = c + d[1]
+                        if 0 <= endRow < 8 and 0 <= endColumn < 8 and self.board[endRow][endColumn][0] == enemyColour:
+                            moves.append(Move((r, c), (endRow, endColumn), self.board))
+                else:
+                    if pieceType == 'R':
+                        directions = self.rookDirections
+                    elif pieceType == 'B':
+                        directions = self.bishopDirections
+                    else:
+                        directions = self.allDirections
+                    for d in directions:
+                        for i in range(1, 8):
+                            endRow = r + d[0] * i
+                            endColumn = c + d[1] * i
+                            if not (0 <= endRow < 8 and 0 <= endColumn < 8):
+                                break
+                            endPiece = self.board[endRow][endColumn]
+                            if endPiece != "--":
+                                if endPiece[0] == enemyColour:
+                                    moves.append(Move((r, c), (endRow, endColumn), self.board))
+                                break
+        return moves
+
+    # Gets all valid pawn moves for the pawn located at row, column and add to list of valid moves
+    def getPawnMoves(self, r, c, moves):
+        if self.whiteToMove:  # white's move
+            if self.board[r - 1][c] == "--":  # 1 square pawn advance
+                moves.append(Move((r, c), (r - 1, c), self.board))
+                if r == 6 and self.board[r - 2][c] == "--":  # 2 square pawn advance
+                    moves.append(Move((r, c), (r - 2, c), self.board))
+            if c >= 1:
+                if self.board[r - 1][c - 1][0] == 'b':  # diagonal capture (left)
+                    moves.append(Move((r, c), (r - 1, c - 1), self.board))
+                elif (r-1,c-1) == self.enPassantPoss:
+                    moves.append(Move((r,c),(r-1,c-1),self.board, isEnPassantMove=True))
+            if c <= 6:
+                if self.board[r - 1][c + 1][0] == 'b':  # diagonal capture (right)
+                    moves.append(Move((r, c), (r - 1, c + 1), self.board))
+                elif (r-1,c+1) == self.enPassantPoss:
+                    moves.append(Move((r,c),(r-1,c+1),self.board, isEnPassantMove=True))
+
+        else:  # black's move
+                if self.board[r + 1][c] == "--":  # 1 square pawn advance
+                    moves.append(Move((r, c), (r + 1, c), self.board))
+                    if r == 1 and self.board[r + 2][c] == "--":  # 2 square pawn advance
+                        moves.append(Move((r, c), (r + 2, c), self.board))
+                if c >= 1:
+                    if self.board[r + 1][c - 1][0] == 'w':  # diagonal capture (left)
+                        moves.append(Move((r, c), (r + 1, c - 1), self.board))
+                    elif (r + 1, c - 1) == self.enPassantPoss:
+                        moves.append(Move((r, c), (r + 1, c - 1), self.board, isEnPassantMove=True))
+                if c <= 6:
+                    if self.board[r + 1][c + 1][0] == 'w':  # diagonal capture (right)
+                        moves.append(Move((r, c), (r + 1, c + 1), self.board))
+                    elif (r + 1, c + 1) == self.enPassantPoss:
+                        moves.append(Move((r, c), (r + 1, c + 1), self.board, isEnPassantMove=True))
+
+    def getRookMoves(self, r, c, moves):
+        directions = ((-1, 0), (0, -1), (1, 0), (0, 1))  # nested tuple of directions (up, left, down, right)
+        enemyPiece = 'b' if self.whiteToMove else 'w'
+        for d in directions:
+            for i in range(1, 8):
+                endRow = r + d[0] * i  # where d[i] is the row of ith direction tuple
+                endColumn = c + d[1] * i
+                if 0 <= endRow < 8 and 0 <= endColumn < 8:  # if on board
+                    endPiece = self.board[endRow][endColumn]
+                    if endPiece == "--":  # if end position is empty, valid move
+                        moves.append(Move((r, c), (endRow, endColumn), self.board))
+                    elif endPiece[0] == enemyPiece:  # if end position is enemy, valid move and break
+                        moves.append(Move((r, c), (endRow, endColumn), self.board))
+                        break
+                    else:
+                        break
+                else:
+                    break
+
+    def getKnightMoves(self, r, c, moves):
+        directions = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2))
+        allyColour = 'w' if self.whiteToMove else 'b'
+        for d in directions:
+            endRow = r + d[0]
+            endColumn = c + d[1]
+            if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                if self.board[endRow][endColumn][0] != allyColour:
+                    moves.append(Move((r, c), (endRow, endColumn), self.board))
+
+    def getBishopMoves(self, r, c, moves):
+        directions = ((-1, -1), (-1, 1), (1, 1), (1, -1))
+        enemyPiece = 'b' if self.whiteToMove else 'w'
+        for d in directions:
+            for i in range(1, 8):
+                endRow = r + i * d[0]
+                endColumn = c + i * d[1]
+                if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                    endPiece = self.board[endRow][endColumn]
+                    if endPiece == "--":
+                        moves.append(Move((r, c), (endRow, endColumn), self.board))
+                    elif endPiece[0] == enemyPiece:
+                        moves.append(Move((r, c), (endRow, endColumn), self.board))
+                        break
+                    else:
+                        break
+                else:
+                    break
+
+    def getQueenMoves(self, r, c, moves):
+        self.getRookMoves(r, c, moves)
+        self.getBishopMoves(r, c, moves)
+
+    def getKingMoves(self, r, c, moves):
+        kingMoves = ((-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (-1, 1), (1, 1), (1, -1))
+        allyColour = 'w' if self.whiteToMove else 'b'
+        for i in range(8):
+            endRow = r + kingMoves[i][0]
+            endColumn = c + kingMoves[i][1]
+            if 0 <= endRow < 8 and 0 <= endColumn < 8:
+                endPiece = self.board[endRow][endColumn]
+                if endPiece[0] != allyColour:
+                    moves.append(Move((r, c), (endRow, endColumn), self.board))
+
+    def getCastleMoves(self, r, c, moves):
+        # can't castle in check
+        if self.squareUnderAttack(r,c):
+            return
+        # king side castling
+        if self.castlingRights & (whiteKingside if self.whiteToMove else blackKingside):
+            self.getKingsideCastleMoves(r, c, moves)
+        # queen side castling
+        if self.castlingRights & (whiteQueenside if self.whiteToMove else blackQueenside):
+            self.getQueenSideCastleMoves(r, c, moves)
+
+
+    def getKingsideCastleMoves(self, r, c, moves):
+        if self.board[r][c+1] == '--' and self.board[r][c+2] == '--':
+            if not self.squareUnderAttack(r,c+1) and not self.squareUnderAttack(r,c+2):
+                moves.append(Move((r,c),(r,c+2),self.board, isCastleMove = True))
+
+
+    def getQueenSideCastleMoves(self, r, c, moves):
+        if self.board[r][c-1] == '--' and self.board[r][c-2] == '--' and self.board[r][c-3] == '--':
+            if not self.squareUnderAttack(r,c-1) and not self.squareUnderAttack(r,c-2):
+                moves.append(Move((r,c),(r,c-2),self.board, isCastleMove = True))
+
+
+# this class converts from matrix to chess notation and back
+# __slots__ keeps each move small, thousands are made for every node searched
+# a move can also be packed into a 16 bit int (see encode), so lists of moves can be kept in array('H') buffers
+class Move:
+    __slots__ = ('startRow', 'startColumn', 'endRow', 'endColumn', 'pieceMoved', 'pieceCaptured', 'isPawnPromotion',
+                 'isEnPassantMove', 'isCastleMove', 'moveID')
+    # converts chess notation of ranks to rows
+    ranksToRows = {"1": 7, "2": 6, "3": 5, "4": 4, "5": 3, "6": 2, "7": 1, "8": 0}
+    # flips ranksToRows dictionary
+    rowToRanks = {v: k for k, v in ranksToRows.items()}
+    # convert notation for columns
+    filesToColumns = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7}
+    columnsToFiles = {v: k for k, v in filesToColumns.items()}
+    # packed move layout: bits 0-5 start square, 6-11 end square (r * 8 + c), 12-13 flag, 14-15 promotion piece
+    normalFlag, enPassantFlag, castleFlag, promotionFlag = 0, 1, 2, 3
+    promotionPieces = ('N', 'B', 'R', 'Q')
+
+    def __init__(self, startSq, endSq, board, isEnPassantMove = False, isCastleMove = False):
+        startRow, startColumn = startSq
+        endRow, endColumn = endSq
+        self.startRow = startRow
+        self.startColumn = startColumn
+        self.endRow = endRow
+        self.endColumn = endColumn
+        pieceMoved = board[startRow][startColumn]  # stores piece that was moved
+        self.pieceMoved = pieceMoved
+        # pawn promotion
+        self.isPawnPromotion = (endRow == 0 and pieceMoved == 'wp') or (endRow == 7 and pieceMoved == 'bp')
+        # en passant
+        self.isEnPassantMove = isEnPassantMove
+        if isEnPassantMove:
+            self.pieceCaptured = 'wp' if pieceMoved == 'bp' else 'bp'
+        else:
+            self.pieceCaptured = board[endRow][endColumn]  # stores piece that was captured
+        # castle move
+        self.isCastleMove = isCastleMove
+        # stores unique ID for each move (like a hash function)
+        self.moveID = startRow * 1000 + startColumn * 100 + endRow * 10 + endColumn
+
+    # packs the move into a 16 bit int, pieces aren't included so the board is needed to unpack it
+    def encode(self):
+        code = self.startRow * 8 + self.startColumn | (self.endRow * 8 + self.endColumn) << 6
+        if self.isEnPassantMove:
+            code |= self.enPassantFlag << 12
+        elif self.isCastleMove:
+            code |= self.castleFlag << 12
+        elif self.isPawnPromotion:
+            code |= self.promotionFlag << 12 | self.promotionPieces.index('Q') << 14  # always promotes to a queen
+        return code
+
+    # rebuilds the move from encode(), board has to be the position the move is played from
+    @classmethod
+    def decode(cls, code, board):
+        flag = code >> 12 & 3
+        startSq = divmod(code & 63, 8)
+        endSq = divmod(code >> 6 & 63, 8)
+        return cls(startSq, endSq, board, isEnPassantMove=flag == cls.enPassantFlag, isCastleMove=flag == cls.castleFlag)
+
+    # since move objects are different, overriding the equals method checks if same move for different objects
+    def __eq__(self, other):  # checks if object is equal to another object
+        if isinstance(other, Move):  # checks if other object is an instance of the Move Class
+            return self.moveID == other.moveID  # return true if moveID is equal to other moveID
+        return False
+
+    def getChessNotation(self):
+        return self.getRankFile(self.startRow, self.startColumn) + self.getRankFile(self.endRow, self.endColumn)
+
+    def getRankFile(self, r, c):
+        return self.columnsToFiles[c] + self.rowToRanks[r]
+
+
+# packs a list of moves into an array('H'), two bytes per move
+def encodeMoves(moves):
+    return array('H', [move.encode() for move in moves])
+
+
+def decodeMoves(codes, board):
+    return [Move.decode(code, board) for code in codes]
@@ -1,237 +1,365 @@
-# This is the main file.
-# It will handle user input and display the current GameState object
-
-import pygame as p  # import pygame library
-import chessEngine, smartMoveFinder  # import chessEngine.py
-
-p.init()  # initialise pygame
-width = height = 512  # pixels
-dimension = 8  # dimension of a chess board
-sqSize = height // dimension
-maxFps = 15  # for animations
-images = {}  # dictionary of images
-sqSelected = ()  # keeps track of last click of user (row,column)
-
-
-# initialise global directory of images only once
-# loads and scales the images for all the pieces
-# access image using images['wp'] etc.
-def loadImages(folder="images"):
-    pieces = ["wR", "wN", "wB", "wQ", "wK", "wB", "wp", "bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR", "bp"]
-    for piece in pieces:
-        images[piece] = p.transform.scale(p.image.load(folder + "/" + piece + ".png"), (sqSize, sqSize))
-
-
-# main module for chess, handling user input and updating graphics
-def main():
-    global sqSelected, undoMove, flip
-    undoMove = False
-
-    screen = p.display.set_mode((width, height))  # sets dimensions of console/canvas
-    p.display.set_caption('Chess Match')  # console title
-    clock = p.time.Clock()
-    screen.fill(p.Color("white"))
-    gs = chessEngine.GameState()
-    validMoves = gs.getValidMoves()  # gets valid moves from chessEngine
-    moveMade = False  # flag for when valid move is made
-    loadImages("images2")
-    running = True
-    playerClicks = []  # keep track of player clicks (two tuples [(x1,y1),(x2,y2)
-    gameOver = False
-
-    '''
-    Settings
-    '''
-    playerOne = True # true when human playing white
-    playerTwo = False # true when human playing black
-    flip = False  # Flip Board
-    animateMoves = True
-    '''
-    End of Settings
-    '''
-
-    while running:
-        humanTurn = (gs.whiteToMove and playerOne ) or (not gs.whiteToMove and playerTwo)
-        for e in p.event.get():
-            if e.type == p.QUIT:  # if user closes console, stop playing
-                running = False
-
-            # mouse handler
-            elif e.type == p.MOUSEBUTTONDOWN:  # if mouse click
-                if not gameOver and humanTurn:
-                    location = p.mouse.get_pos()  # gets (x,y) coordinates of mouse
-                    if not gs.whiteToMove and flip:
-                        column = 7 - location[0] // sqSize  # finds square which mouse is selecting
-                        row = 7 - location[1] // sqSize
-                    else:
-                        column = location[0] // sqSize  # finds square which mouse is selecting
-                        row = location[1] // sqSize
-                    if sqSelected == (row, column):  # if user clicks same square twice
-                        sqSelected = ()  # deselects clicks
-                        playerClicks = []  # clear player clicks
-                    else:
-                        sqSelected = (row, column)
-                        playerClicks.append(sqSelected)  # append for both 1st and 2nd clicks
-                    if len(playerClicks) == 2:  # after 2nd click
-                        move = chessEngine.Move(playerClicks[0], playerClicks[1], gs.board)
-                        for i in range(len(validMoves)):
-                            if move == validMoves[i]:
-                                gs.makeMove(validMoves[i])
-                                moveMade = True
-                                animate = True
-                                undoMove = False
-                                sqSelected = ()  # reset user click
-                                playerClicks = []
-                        if not moveMade:
-                            playerClicks = [sqSelected]
-
-            # keyboard handler
-            elif e.type == p.KEYDOWN:
-                if e.key == p.K_LEFT:  # undo move when left arrow pressed
-                    gs.undoMove()
-                    undoMove = True
-                    moveMade = True
-                    animate = False
-                    gameOver = False
-
-
-        # AI move finder
-        if not gameOver and not humanTurn:
-            AIMove = smartMoveFinder.findBestMove(gs, validMoves)
-            if AIMove is None:
-                AIMove = smartMoveFinder.findRandomMove(validMoves)
-            gs.makeMove(AIMove)
-            moveMade = True
-            animate = True
-
-
-        #  valid moves can be updated for next go
-        if moveMade:
-            if animate and animateMoves:
-                animateMove(gs.moveLog[-1], screen, gs.board, clock, gs.whiteToMove)
-            if gs.inCheck():
-                colour = "White" if gs.whiteToMove else "Black"
-                print(colour + " is in check")
-            validMoves = gs.getValidMoves()
-            moveMade = False
-            animate = False
-
-        drawGameState(screen, validMoves, gs)
-        if gs.checkMate:
-            gameOver = True
-            if gs.whiteToMove:
-                drawText(screen, 'Black wins by checkmate')
-            else:
-                drawText(screen, 'White wins by checkmate')
-        elif gs.staleMate:
-            gameOver = True
-            drawText(screen, 'StaleMate')
-        clock.tick(maxFps)
-        p.display.flip()
-
-
-# graphics module
-def drawGameState(screen, validMoves, gs):
-    drawBoard(screen)  # draw squares on board
-    highlightSq(sqSelected, screen, gs)
-    drawPieces(screen, gs.board, gs.whiteToMove)  # draw pieces ontop of squares
-    highlightMoves(sqSelected, screen, validMoves, gs)  # draw moves ontop of pieces
-
-
-def drawBoard(screen):
-    global colours
-    colours = [p.Color("white"), p.Color("light grey")]
-    for row in range(dimension):
-        for column in range(dimension):
-            colour = colours[((row + column) % 2)]
-            p.draw.rect(screen, colour, p.Rect(column * sqSize, row * sqSize, sqSize, sqSize))
-
-
-def drawPieces(screen, board, whiteToMove):
-    for r in range(dimension):
-        for c in range(dimension):
-            if not whiteToMove and flip:
-                piece = board[7 - r][7 - c]  # piece is equal to a particular part in the 8x8 list in gameState
-            else:
-                piece = board[r][c]  # piece is equal to a particular part in the 8x8 list in gameState
-            if piece != "--":  # not empty square
-                screen.blit(images[piece],
-                            p.Rect(c * sqSize, r * sqSize, sqSize, sqSize))  # overlays image over board
-
-
-def animateMove(move, screen, board, clock, whiteToMove):
-    global colours
-    dR = move.endRow - move.startRow
-    dC = move.endColumn - move.startColumn
-    framesPerSquare = 10  # frames to move one square
-    frameCount = (abs(dR) + abs(dC)) * framesPerSquare
-    for frame in range(frameCount + 1):
-        # increments r and c from start to end of animation
-        r, c = (move.startRow + dR * frame / frameCount, move.startColumn + dC * frame / frameCount)
-        drawBoard(screen)  # draws board and pieces normally
-        drawPieces(screen, board, whiteToMove)
-        # draws over end square whilst animation is occurring, otherwise piece already visible
-        colour = colours[(move.endRow + move.endColumn) % 2]
-        if not whiteToMove and flip:
-            endSquare = p.Rect((7 - move.endColumn) * sqSize, (7 - move.endRow) * sqSize, sqSize, sqSize)
-        else:
-            endSquare = p.Rect(move.endColumn * sqSize, move.endRow * sqSize, sqSize, sqSize)
-        p.draw.rect(screen, colour, endSquare)
-        # if piece is captured, keep piece on board whilst doing the animation
-        if move.pieceCaptured != '--':
-            screen.blit(images[move.pieceCaptured], endSquare)
-        if not whiteToMove and flip:
-            screen.blit(images[move.pieceMoved], p.Rect((7 - c) * sqSize, (7 - r) * sqSize, sqSize, sqSize))
-        else:
-            screen.blit(images[move.pieceMoved], p.Rect(c * sqSize, r * sqSize, sqSize, sqSize))
-        p.display.flip()  # update display
-        clock.tick(120)  # limits time taken for each frame
-
-
-def highlightSq(square, screen, gs):
-    if square != ():  # if square selected
-        r, c = square
-        rUsr, cUsr = square
-        if not gs.whiteToMove and flip:
-            rUsr = 7 - r
-            cUsr = 7 - c
-        if gs.board[r][c][0] == ('w' if gs.whiteToMove else 'b'):  # nested if statement, if piece is own, highlight
-            p.draw.rect(screen, "yellow", p.Rect(cUsr * sqSize, rUsr * sqSize, sqSize, sqSize))
-
-
-def highlightMoves(square, screen, validMoves, gs):
-    if square != ():  # if square selected
-        r, c = square
-        for move in validMoves:
-            if move.startRow == r and move.startColumn == c:
-                if move.pieceCaptured == '--':
-                    if not gs.whiteToMove and flip:
-                        p.draw.circle(screen, "red", (((7 * sqSize) - (move.endColumn * sqSize) + sqSize // 2),
-                                                      ((7 * sqSize) - (move.endRow * sqSize) + sqSize // 2)),
-                                      sqSize // 5)
-                    else:
-                        p.draw.circle(screen, "red", ((move.endColumn * sqSize) + sqSize // 2,
-                                                      (move.endRow * sqSize) + sqSize // 2), sqSize // 5)
-
-                else:
-                    if not gs.whiteToMove and flip:
-                        p.draw.circle(screen, "blue", (((7 * sqSize) - (move.endColumn * sqSize) + sqSize // 2),
-                                                       ((7 * sqSize) - (move.endRow * sqSize) + sqSize // 2)),
-                                      sqSize // 5)
-                    else:
-                        p.draw.circle(screen, "blue", ((move.endColumn * sqSize) + sqSize // 2,
-                                                       (move.endRow * sqSize) + sqSize // 2), sqSize // 5)
-
-
-def drawText(screen, text):
-    font = p.font.SysFont("Helvitca", 42, True, False)  # bold, 32 font
-    textObject = font.render(text, False, p.Color('Gray'))
-    textLocation = p.Rect(0, 0, width, height).move(width / 2 - textObject.get_width() / 2,
-                                                    height / 2 - textObject.get_height() / 2)  # adds shadow
-    screen.blit(textObject, textLocation)
-    textObject = font.render(text, False, p.Color('Black'))
-    screen.blit(textObject, textLocation.move(2, 2))
-
-
-if __name__ == "__main__":  # convention if chessMain is imported elsewhere
-    main()
+# This is the main file.
+# It will handle user input and display the current GameState object
+
+import sys
+import threading
+import pygame as p  # import pygame library
+import chessEngine, smartMoveFinder  # import chessEngine.py
+import bitboardEngine
+import spriteAtlas
+
+width = height = 512  # pixels
+dimension = 8  # dimension of a chess board
+sqSize = height // dimension
+maxFps = 15  # how often the window checks on the AI while it thinks
+images = {}  # dictionary of images
+sqSelected = ()  # keeps track of last click of user (row,column)
+
+
+# initialise global directory of images only once
+# the pieces come scaled to sqSize from the sprite atlas of the folder, see spriteAtlas.py
+# access image using images['wp'] etc.
+def loadImages(folder="images"):
+    images.update(spriteAtlas.loadPieces(folder, sqSize))
+
+
+# starts only the parts of pygame the window uses, sound and joysticks are never initialised
+def initDisplay():
+    p.display.init()
+    p.font.init()
+    screen = p.display.set_mode((width, height))  # sets dimensions of console/canvas
+    p.display.set_caption('Chess Match')  # console title
+    loadImages("images2")
+    return screen
+
+
+# main module for chess, handling user input and updating graphics
+def main():
+    global sqSelected, undoMove, flip
+    undoMove = False
+
+    screen = initDisplay()
+    clock = p.time.Clock()
+    screen.fill(p.Color("white"))
+    moveMade = False  # flag for when valid move is made
+    running = True
+    playerClicks = []  # keep track of player clicks (two tuples [(x1,y1),(x2,y2)
+    gameOver = False
+
+    '''
+    Settings
+    '''
+    playerOne = True # true when human playing white
+    playerTwo = False # true when human playing black
+    flip = False  # Flip Board
+    animateMoves = True
+    useBitboards = True  # bitboard move generation (bitboardEngine), False for the original 8x8 list engine
+    searchProcesses = 1  # more than 1 runs the AI search on that many processes (parallelSearch)
+    '''
+    End of Settings
+    '''
+    gs = bitboardEngine.GameState() if useBitboards else chessEngine.GameState()
+    validMoves = gs.getValidMoves()  # gets valid moves from chessEngine
+    searcher = smartMoveFinder.Searcher()  # keeps its transposition table between the AI's moves
+    aiSearch = None  # AISearch while the AI is thinking
+    cancelledSearch = None  # a cancelled AISearch that may still be running, see AISearch.cancel
+    shownState = None  # frameState of what the window shows now
+    waitForEvent = False
+
+    while running:
+        humanTurn = (gs.whiteToMove and playerOne ) or (not gs.whiteToMove and playerTwo)
+        events = p.event.get()
+        if not events and waitForEvent:
+            events = [p.event.wait()]  # sleeps, so an idle window uses no CPU
+        for e in events:
+            if e.type == p.QUIT:  # if user closes console, stop playing
+                running = False
+                if aiSearch is not None:
+                    aiSearch.cancel()
+
+            # mouse handler
+            elif e.type == p.MOUSEBUTTONDOWN:  # if mouse click
+                if not gameOver and humanTurn:
+                    location = p.mouse.get_pos()  # gets (x,y) coordinates of mouse
+                    if not gs.whiteToMove and flip:
+                        column = 7 - location[0] // sqSize  # finds square which mouse is selecting
+                        row = 7 - location[1] // sqSize
+                    else:
+                        column = location[0] // sqSize  # finds square which mouse is selecting
+                        row = location[1] // sqSize
+                    if sqSelected == (row, column):  # if user clicks same square twice
+                        sqSelected = ()  # deselects clicks
+                        playerClicks = []  # clear player clicks
+                    else:
+                        sqSelected = (row, column)
+                        playerClicks.append(sqSelected)  # append for both 1st and 2nd clicks
+                    if len(playerClicks) == 2:  # after 2nd click
+                        move = chessEngine.Move(playerClicks[0], playerClicks[1], gs.board)
+                        for i in range(len(validMoves)):
+                            if move == validMoves[i]:
+                                gs.makeMove(validMoves[i])
+                                moveMade = True
+                                animate = True
+                                undoMove = False
+                                sqSelected = ()  # reset user click
+                                playerClicks = []
+                        if not moveMade:
+                            playerClicks = [sqSelected]
+
+            # keyboard handler
+            elif e.type == p.KEYDOWN:
+                if e.key == p.K_LEFT:  # undo move when left arrow pressed
+                    if aiSearch is not None:  # the position being searched is gone
+                        aiSearch.cancel()
+                        cancelledSearch = aiSearch
+                        aiSearch = None
+                    gs.undoMove()
+                    undoMove = True
+                    moveMade = True
+                    animate = False
+                    gameOver = False
+
+            elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):  # the window was covered up, draw all of it again
+                shownState = None
+
+
+        # AI move finder, runs in the background and the move is played once the search has finished
+        if not gameOver and not humanTurn and running and not moveMade:
+            if aiSearch is None:
+                # two searches mustn't run at once on the searcher or the worker processes
+                if cancelledSearch is None or not cancelledSearch.thread.is_alive():
+                    cancelledSearch = None
+                    aiSearch = AISearch(searcher, gs, searchProcesses)
+            elif aiSearch.finished and aiSearch.zobristKey != gs.zobristKey:  # searched a position that's gone
+                aiSearch = None
+            elif aiSearch.finished:
+                AIMove = None
+                for move in validMoves:  # the search ran on a copy, so use the matching move of this position
+                    if move == aiSearch.move:
+                        AIMove = move
+                if AIMove is None:
+                    AIMove = smartMoveFinder.findRandomMove(validMoves)
+                aiSearch = None
+                gs.makeMove(AIMove)
+                moveMade = True
+                animate = True
+
+
+        #  valid moves can be updated for next go
+        if moveMade:
+            if animate and animateMoves:
+                animateMove(gs.moveLog[-1], screen, gs.board, clock, gs.whiteToMove)
+            if gs.inCheck():
+                colour = "White" if gs.whiteToMove else "Black"
+                print(colour + " is in check")
+            validMoves = gs.getValidMoves()
+            moveMade = False
+            animate = False
+
+        message = None
+        if gs.checkMate:
+            gameOver = True
+            message = 'Black wins by checkmate' if gs.whiteToMove else 'White wins by checkmate'
+        elif gs.staleMate:
+            gameOver = True
+            message = 'StaleMate'
+        progress = aiSearch.progress if aiSearch is not None else None
+        # everything the window shows, it is only drawn again when this changes
+        frameState = (gs.zobristKey, len(gs.moveLog), sqSelected, progress, message)
+        if frameState != shownState:
+            drawGameState(screen, validMoves, gs)
+            if progress is not None:
+                drawProgress(screen, progress)
+            if message is not None:
+                drawText(screen, message)
+            p.display.flip()
+            shownState = frameState
+        # nothing can change until the user does something, so wait for an event instead of polling
+        humanTurn = (gs.whiteToMove and playerOne) or (not gs.whiteToMove and playerTwo)
+        waitForEvent = aiSearch is None and (gameOver or humanTurn)
+        if not waitForEvent:
+            clock.tick(maxFps)
+    if 'parallelSearch' in sys.modules:  # its worker processes only exist once a parallel search has run
+        sys.modules['parallelSearch'].closePool()
+
+
+# runs the AI search on a background thread, so the window keeps drawing and handling events while it thinks
+# the search works on its own copy of the position, so the board on screen never changes under it
+class AISearch:
+    def __init__(self, searcher, gs, processes):
+        self.searcher = searcher
+        self.gs = type(gs).from_fen(gs.to_fen())
+        self.zobristKey = gs.zobristKey  # the position the search is for
+        self.processes = processes
+        self.move = None
+        self.finished = False
+        self.progress = "Thinking..."  # updated after every completed depth
+        searcher.stopRequested = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        validMoves = self.gs.getValidMoves()
+        if self.processes > 1:
+            import parallelSearch  # multiprocessing is only loaded when the AI searches on several processes
+            self.move = parallelSearch.findBestMove(self.gs, validMoves, callback=self.update, workers=self.processes,
+                                                    searcher=self.searcher)
+        else:
+            self.move = self.searcher.findBestMove(self.gs, validMoves, callback=self.update)
+        self.finished = True
+
+    def update(self, stats):
+        self.progress = "Depth %d  score %.2f  %d nodes  %s" % (
+            stats.depth(), stats.score(), stats.nodes, " ".join(move.getChessNotation() for move in stats.pv()[:4]))
+
+    # the single process search stops at its next node and is waited for, so a new search can start on the
+    # searcher straight away. A parallel search can't be stopped, its move is ignored and main doesn't start
+    # the next search until its thread has finished
+    def cancel(self):
+        self.searcher.stop()
+        if self.processes <= 1:
+            self.thread.join()
+
+
+# graphics module
+# the window is only drawn again when what it shows changes, see frameState in main, and everything that doesn't
+# change between frames (the empty board, fonts, text) is rendered once and kept
+lightColour = p.Color("white")
+darkColour = p.Color("light grey")
+boardSurface = None  # the empty board, the same both ways up as turning it round keeps the colour of every square
+fonts = {}  # (size, bold) -> font
+textSurfaces = {}  # (text, size, bold, colour, background) -> rendered text
+maxTextSurfaces = 64  # progress lines change with every depth, so the cache is emptied when it gets this big
+
+
+def flipped(whiteToMove):
+    return not whiteToMove and flip
+
+
+# where square (r, c) of the board is drawn on the screen
+def squareRect(r, c, whiteToMove):
+    if flipped(whiteToMove):
+        r, c = 7 - r, 7 - c
+    return p.Rect(c * sqSize, r * sqSize, sqSize, sqSize)
+
+
+def getBoardSurface():
+    global boardSurface
+    if boardSurface is None:
+        boardSurface = p.Surface((width, height)).convert()
+        for row in range(dimension):
+            for column in range(dimension):
+                colour = darkColour if (row + column) % 2 else lightColour
+                boardSurface.fill(colour, p.Rect(column * sqSize, row * sqSize, sqSize, sqSize))
+    return boardSurface
+
+
+# pygame's default font, which is what SysFont("Helvitca") ended up with, without SysFont listing the system fonts
+def getFont(size, bold):
+    if (size, bold) not in fonts:
+        font = p.font.Font(None, size)
+        font.set_bold(bold)
+        fonts[(size, bold)] = font
+    return fonts[(size, bold)]
+
+
+def renderText(text, size, bold, colour, background=None, antialias=False):
+    key = (text, size, bold, colour, background)
+    if key not in textSurfaces:
+        if len(textSurfaces) >= maxTextSurfaces:
+            textSurfaces.clear()
+        font = getFont(size, bold)
+        if background is None:
+            textSurfaces[key] = font.render(text, antialias, p.Color(colour))
+        else:
+            textSurfaces[key] = font.render(text, antialias, p.Color(colour), p.Color(background))
+    return textSurfaces[key]
+
+
+def drawGameState(screen, validMoves, gs):
+    drawBoard(screen)  # draw squares on board
+    highlightSq(sqSelected, screen, gs)
+    drawPieces(screen, gs.board, gs.whiteToMove)  # draw pieces ontop of squares
+    highlightMoves(sqSelected, screen, validMoves, gs)  # draw moves ontop of pieces
+
+
+def drawBoard(screen):
+    screen.blit(getBoardSurface(), (0, 0))
+
+
+def drawPieces(screen, board, whiteToMove):
+    for r in range(dimension):
+        for c in range(dimension):
+            piece = board[r][c]
+            if piece != "--":  # not empty square
+                screen.blit(images[piece], squareRect(r, c, whiteToMove))  # overlays image over board
+
+
+# slides the moved piece from its start square to its end square, board is the position after the move
+# everything but the moving piece is drawn once, each frame only puts back the background where the piece was and
+# draws it where it is now, and only those two squares are sent to the display
+def animateMove(move, screen, board, clock, whiteToMove):
+    dR = move.endRow - move.startRow
+    dC = move.endColumn - move.startColumn
+    framesPerSquare = 10  # frames to move one square
+    frameCount = (abs(dR) + abs(dC)) * framesPerSquare
+    drawBoard(screen)
+    drawPieces(screen, board, whiteToMove)
+    # draws over end square whilst animation is occurring, otherwise piece already visible
+    endSquare = squareRect(move.endRow, move.endColumn, whiteToMove)
+    screen.blit(getBoardSurface(), endSquare, endSquare)
+    # if piece is captured, keep piece on board whilst doing the animation
+    if move.pieceCaptured != '--':
+        screen.blit(images[move.pieceCaptured], endSquare)
+    background = screen.copy()
+    p.display.flip()
+    previous = None
+    for frame in range(frameCount + 1):
+        # increments r and c from start to end of animation
+        r, c = (move.startRow + dR * frame / frameCount, move.startColumn + dC * frame / frameCount)
+        if flipped(whiteToMove):
+            r, c = 7 - r, 7 - c
+        pieceRect = p.Rect(round(c * sqSize), round(r * sqSize), sqSize, sqSize)
+        dirty = pieceRect
+        if previous is not None:
+            screen.blit(background, previous, previous)
+            dirty = pieceRect.union(previous)
+        screen.blit(images[move.pieceMoved], pieceRect)
+        p.display.update(dirty)  # update only the part of the display that changed
+        previous = pieceRect
+        clock.tick(120)  # limits time taken for each frame
+
+
+def highlightSq(square, screen, gs):
+    if square != ():  # if square selected
+        r, c = square
+        if gs.board[r][c][0] == ('w' if gs.whiteToMove else 'b'):  # nested if statement, if piece is own, highlight
+            screen.fill("yellow", squareRect(r, c, gs.whiteToMove))
+
+
+def highlightMoves(square, screen, validMoves, gs):
+    if square != ():  # if square selected
+        r, c = square
+        for move in validMoves:
+            if move.startRow == r and move.startColumn == c:
+                colour = "red" if move.pieceCaptured == '--' else "blue"
+                p.draw.circle(screen, colour, squareRect(move.endRow, move.endColumn, gs.whiteToMove).center,
+                              sqSize // 5)
+
+
+# small line of text at the bottom of the board showing how the AI search is going
+def drawProgress(screen, text):
+    textObject = renderText(text, 20, False, 'Black', 'White', True)
+    screen.blit(textObject, (4, height - textObject.get_height() - 4))
+
+
+def drawText(screen, text):
+    textObject = renderText(text, 42, True, 'Gray')  # bold, 42 font
+    textLocation = p.Rect(0, 0, width, height).move(width / 2 - textObject.get_width() / 2,
+                                                    height / 2 - textObject.get_height() / 2)  # adds shadow
+    screen.blit(textObject, textLocation)
+    screen.blit(renderText(text, 42, True, 'Black'), textLocation.move(2, 2))
+
+
+if __name__ == "__main__":  # convention if chessMain is imported elsewhere
+    main()
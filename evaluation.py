@@ -0,0 +1,132 @@
+# Evaluation weights shared by chessEngine (which keeps running totals) and smartMoveFinder (which scores positions)
+# Scores are in pawns, positive is good for the side that owns the piece
+
+import json
+
+pieceScore = {"K": 0, "Q": 9, "R": 5, "B": 3.25, "N": 3, "p": 1}
+
+# how much each piece counts towards the middle game, 24 with all pieces on the board and 0 with only kings and pawns
+phaseWeights = {"K": 0, "Q": 4, "R": 2, "B": 1, "N": 1, "p": 0}
+totalPhase = 24
+
+# piece square tables for white, laid out like GameState.board so row 0 is the 8th rank
+# black uses the same tables mirrored top to bottom
+middleGameTables = {
+    "p": [0, 0, 0, 0, 0, 0, 0, 0,
+          50, 50, 50, 50, 50, 50, 50, 50,
+          10, 10, 20, 30, 30, 20, 10, 10,
+          5, 5, 10, 25, 25, 10, 5, 5,
+          0, 0, 0, 20, 20, 0, 0, 0,
+          5, -5, -10, 0, 0, -10, -5, 5,
+          5, 10, 10, -20, -20, 10, 10, 5,
+          0, 0, 0, 0, 0, 0, 0, 0],
+    "N": [-50, -40, -30, -30, -30, -30, -40, -50,
+          -40, -20, 0, 0, 0, 0, -20, -40,
+          -30, 0, 10, 15, 15, 10, 0, -30,
+          -30, 5, 15, 20, 20, 15, 5, -30,
+          -30, 0, 15, 20, 20, 15, 0, -30,
+          -30, 5, 10, 15, 15, 10, 5, -30,
+          -40, -20, 0, 5, 5, 0, -20, -40,
+          -50, -40, -30, -30, -30, -30, -40, -50],
+    "B": [-20, -10, -10, -10, -10, -10, -10, -20,
+          -10, 0, 0, 0, 0, 0, 0, -10,
+          -10, 0, 5, 10, 10, 5, 0, -10,
+          -10, 5, 5, 10, 10, 5, 5, -10,
+          -10, 0, 10, 10, 10, 10, 0, -10,
+          -10, 10, 10, 10, 10, 10, 10, -10,
+          -10, 5, 0, 0, 0, 0, 5, -10,
+          -20, -10, -10, -10, -10, -10, -10, -20],
+    "R": [0, 0, 0, 0, 0, 0, 0, 0,
+          5, 10, 10, 10, 10, 10, 10, 5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          0, 0, 0, 5, 5, 0, 0, 0],
+    "Q": [-20, -10, -10, -5, -5, -10, -10, -20,
+          -10, 0, 0, 0, 0, 0, 0, -10,
+          -10, 0, 5, 5, 5, 5, 0, -10,
+          -5, 0, 5, 5, 5, 5, 0, -5,
+          0, 0, 5, 5, 5, 5, 0, -5,
+          -10, 5, 5, 5, 5, 5, 0, -10,
+          -10, 0, 5, 0, 0, 0, 0, -10,
+          -20, -10, -10, -5, -5, -10, -10, -20],
+    "K": [-30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -20, -30, -30, -40, -40, -30, -30, -20,
+          -10, -20, -20, -20, -20, -20, -20, -10,
+          20, 20, 0, 0, 0, 0, 20, 20,
+          20, 30, 10, 0, 0, 10, 30, 20],
+}
+endGameTables = dict(middleGameTables)
+endGameTables["p"] = [0, 0, 0, 0, 0, 0, 0, 0,
+                      80, 80, 80, 80, 80, 80, 80, 80,
+                      50, 50, 50, 50, 50, 50, 50, 50,
+                      30, 30, 30, 30, 30, 30, 30, 30,
+                      20, 20, 20, 20, 20, 20, 20, 20,
+                      10, 10, 10, 10, 10, 10, 10, 10,
+                      10, 10, 10, 10, 10, 10, 10, 10,
+                      0, 0, 0, 0, 0, 0, 0, 0]
+endGameTables["K"] = [-50, -40, -30, -20, -20, -30, -40, -50,
+                      -30, -20, -10, 0, 0, -10, -20, -30,
+                      -30, -10, 20, 30, 30, 20, -10, -30,
+                      -30, -10, 30, 40, 40, 30, -10, -30,
+                      -30, -10, 30, 40, 40, 30, -10, -30,
+                      -30, -10, 20, 30, 30, 20, -10, -30,
+                      -30, -30, 0, 0, 0, 0, -30, -30,
+                      -50, -30, -30, -30, -30, -30, -30, -50]
+
+
+# turns the tables above into pawns for every piece of both colours, indexed by r * 8 + c
+def buildSquareValues(tables):
+    squareValues = {}
+    for pieceType, table in tables.items():
+        squareValues['w' + pieceType] = [value / 100 for value in table]
+        squareValues['b' + pieceType] = [table[(7 - sq // 8) * 8 + sq % 8] / 100 for sq in range(64)]
+    return squareValues
+
+
+middleGameSquares = buildSquareValues(middleGameTables)
+endGameSquares = buildSquareValues(endGameTables)
+defaultPieceScore = dict(pieceScore)
+defaultMiddleGameTables = dict(middleGameTables)
+defaultEndGameTables = dict(endGameTables)
+
+
+# swaps in other weights, e.g. to play differently tuned versions against each other
+# each argument is a dictionary of the piece values or tables to change, anything not given goes back to the default
+# the dictionaries are changed in place so modules holding a reference to them see the new values
+# GameState keeps running totals, so only states built or reloaded after the change use the new weights
+def setWeights(pieceValues=None, middleGame=None, endGame=None):
+    pieceScore.clear()
+    pieceScore.update(defaultPieceScore)
+    pieceScore.update(pieceValues or {})
+    middleGameTables.clear()
+    middleGameTables.update(defaultMiddleGameTables)
+    middleGameTables.update(middleGame or {})
+    endGameTables.clear()
+    endGameTables.update(defaultEndGameTables)
+    endGameTables.update(endGame or {})
+    middleGameSquares.update(buildSquareValues(middleGameTables))
+    endGameSquares.update(buildSquareValues(endGameTables))
+
+
+# weights saved as JSON by texelTuner.py, {"pieceScore": {...}, "middleGame": {...}, "endGame": {...}}
+def readWeights(fileName):
+    with open(fileName) as file:
+        return json.load(file)
+
+
+# swaps in the weights saved in fileName, with the same caveat as setWeights
+def loadWeights(fileName):
+    weights = readWeights(fileName)
+    setWeights(weights.get("pieceScore"), weights.get("middleGame"), weights.get("endGame"))
+
+
+# blends the middle and end game scores by how much material is left
+def taperedScore(middleGame, endGame, phase):
+    phase = min(phase, totalPhase)  # promotions can push the phase past the starting total
+    return (middleGame * phase + endGame * (totalPhase - phase)) / totalPhase
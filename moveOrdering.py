@@ -0,0 +1,69 @@
+# Move ordering for negaMaxAlphaBeta
+# Alpha beta prunes the most when the best move is searched first, moves are tried in these stages:
+# 1. hash move from the transposition table (the principal variation move)
+# 2. captures, most valuable victim first and then least valuable attacker (MVV-LVA)
+# 3. promotions
+# 4. killer moves, quiet moves that caused a cutoff at the same ply elsewhere in the tree
+# 5. other quiet moves, sorted by how often they caused cutoffs before (history heuristic)
+
+hashMoveScore = 1000000
+captureScore = 100000
+promotionScore = 90000
+killerScore = 80000  # first killer, the second gets one less
+maxPly = 64
+
+
+class MoveOrdering:
+    def __init__(self, pieceScore):
+        self.pieceScore = pieceScore  # material values used for MVV-LVA, e.g. smartMoveFinder.pieceScore
+        self.killers = [[-1, -1] for _ in range(maxPly)]  # two killer moveIDs per ply
+        self.history = {colour + pieceType: [0] * 64 for colour in 'wb' for pieceType in 'pNBRQK'}
+        self.cutoffs = 0  # number of beta cutoffs
+        self.firstMoveCutoffs = 0  # number of beta cutoffs caused by the first move searched
+
+    # call between searches, killers belong to one tree and old history counts slowly fade away
+    def newSearch(self):
+        self.killers = [[-1, -1] for _ in range(maxPly)]
+        for pieceHistory in self.history.values():
+            for sq in range(64):
+                pieceHistory[sq] //= 2
+
+    def scoreMove(self, move, ply, hashMoveID):
+        if move.moveID == hashMoveID:
+            return hashMoveScore
+        if move.pieceCaptured != "--":
+            return captureScore + 10 * self.pieceScore[move.pieceCaptured[1]] - self.pieceScore[move.pieceMoved[1]]
+        if move.isPawnPromotion:
+            return promotionScore
+        if ply < maxPly:
+            if move.moveID == self.killers[ply][0]:
+                return killerScore
+            if move.moveID == self.killers[ply][1]:
+                return killerScore - 1
+        return min(self.history[move.pieceMoved][move.endRow * 8 + move.endColumn], killerScore - 2)
+
+    # returns the moves in the order they should be searched
+    def orderMoves(self, moves, ply, hashMoveID=-1):
+        return sorted(moves, key=lambda move: self.scoreMove(move, ply, hashMoveID), reverse=True)
+
+    # records a beta cutoff, moveIndex is the position of the move in the ordered list
+    def cutoff(self, move, ply, depth, moveIndex):
+        self.cutoffs += 1
+        if moveIndex == 0:
+            self.firstMoveCutoffs += 1
+        if move.pieceCaptured != "--" or move.isPawnPromotion:  # only quiet moves become killers
+            return
+        if ply < maxPly and self.killers[ply][0] != move.moveID:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move.moveID
+        self.history[move.pieceMoved][move.endRow * 8 + move.endColumn] += depth * depth
+
+    # fraction of cutoffs that came from the first move, close to 1 means the ordering is good
+    def firstMoveCutoffRatio(self):
+        if self.cutoffs == 0:
+            return 0.0
+        return self.firstMoveCutoffs / self.cutoffs
+
+    def resetCounters(self):
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
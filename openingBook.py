@@ -0,0 +1,140 @@
+# Opening book, so the first moves of a game are played straight away instead of being searched
+# The file is laid out like a Polyglot book: 16 byte entries of key (8 bytes), move (2), weight (2) and learn (4),
+# big endian and sorted by key. The key is GameState.zobristKey and the move is Move.encode(), so books have to be
+# built with buildBook below, Polyglot books made by other programs use different keys
+# Books are memory mapped, opening one reads nothing and worker processes share the pages through the OS
+#
+# python openingBook.py games.pgn [more.pgn ...] --output book.bin --plies 20
+# then set smartMoveFinder.openingBookFile = "book.bin"
+
+import mmap
+import os
+import random
+import struct
+
+import bitboardEngine
+import chessEngine
+import pgn
+
+entry = struct.Struct(">QHHI")  # key, move, weight, learn
+keyFormat = struct.Struct(">Q")
+maxWeight = 65535
+
+openBooks = {}  # OpeningBook of each file opened by this process, see getBook
+
+
+class OpeningBook:
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.file = open(fileName, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size % entry.size:
+            self.file.close()
+            raise ValueError(fileName + " isn't a book, its size isn't a multiple of %d bytes" % entry.size)
+        self.count = size // entry.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    # (move code, weight) of every book move of the position with this key, binary search for the first entry
+    def entries(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if keyFormat.unpack_from(self.data, middle * entry.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        for index in range(low, self.count):
+            entryKey, code, weight, learn = entry.unpack_from(self.data, index * entry.size)
+            if entryKey != key:
+                break
+            found.append((code, weight))
+        return found
+
+    # legal book moves of gs with their weights
+    def moves(self, gs, validMoves):
+        movesByID = {move.moveID: move for move in validMoves}
+        found = []
+        for code, weight in self.entries(gs.zobristKey):
+            move = movesByID.get(chessEngine.Move.decode(code, gs.board).moveID)
+            if move is not None and weight > 0:
+                found.append((move, weight))
+        return found
+
+    # a book move picked at random, moves with a bigger weight more often, or None when the position isn't in the book
+    def chooseMove(self, gs, validMoves, rng=random):
+        found = self.moves(gs, validMoves)
+        if not found:
+            return None
+        pick = rng.randrange(sum(weight for move, weight in found))
+        for move, weight in found:
+            pick -= weight
+            if pick < 0:
+                return move
+
+
+# the book in fileName, opened once per process
+def getBook(fileName):
+    if fileName not in openBooks:
+        openBooks[fileName] = OpeningBook(fileName)
+    return openBooks[fileName]
+
+
+# book move for gs from fileName, or None when there's no book or the position isn't in it
+def probe(fileName, gs, validMoves):
+    if fileName is None:
+        return None
+    return getBook(fileName).chooseMove(gs, validMoves)
+
+
+# builds a book from the first plies of every game in the PGN files
+# a move is weighted 2 for every game its side went on to win and 1 for every draw, so moves that only
+# ever lost are left out, as are moves played in fewer than minGames games
+def buildBook(pgnFiles, outputFile, plies=20, minGames=1):
+    counts = {}  # (key, move code) -> [games, weight]
+    games = 0
+    for fileName in pgnFiles:
+        with open(fileName, errors="replace") as file:
+            for headers, sanMoves, result in pgn.readGames(file):
+                gs = bitboardEngine.GameState.from_fen(headers.get("FEN", pgn.startFen))
+                games += 1
+                for san in sanMoves[:plies]:
+                    validMoves = gs.getValidMoves()
+                    move = pgn.sanToMove(gs, san, validMoves)
+                    if move is None:  # an error in the file or an under promotion, the rest of the game is skipped
+                        break
+                    won = result == ("1-0" if gs.whiteToMove else "0-1")
+                    count = counts.setdefault((gs.zobristKey, move.encode()), [0, 0])
+                    count[0] += 1
+                    count[1] += 2 if won else 1 if result == "1/2-1/2" else 0
+                    gs.makeMove(move)
+    entries = [(key, code, weight) for (key, code), (played, weight) in counts.items()
+               if played >= minGames and weight > 0]
+    # weights have to fit in 16 bits, when one doesn't every weight is scaled down together
+    scale = max([weight for key, code, weight in entries] + [maxWeight]) / maxWeight
+    entries.sort(key=lambda item: (item[0], -item[2]))
+    with open(outputFile, "wb") as file:
+        for key, code, weight in entries:
+            file.write(entry.pack(key, code, max(int(weight / scale), 1), 0))
+    return games, len(entries)
+
+
+def main():
+    import argparse  # only building a book needs it, not looking moves up during a search
+    parser = argparse.ArgumentParser(description='Builds an opening book from PGN files')
+    parser.add_argument('pgn', nargs='+', help='PGN files to read the games from')
+    parser.add_argument('--output', default='book.bin')
+    parser.add_argument('--plies', type=int, default=20, help='moves of each game put in the book, white and black')
+    parser.add_argument('--min-games', type=int, default=1, help='moves played in fewer games are left out')
+    args = parser.parse_args()
+    games, positions = buildBook(args.pgn, args.output, args.plies, args.min_games)
+    print("%d games, %d book moves written to %s" % (games, positions, args.output))
+
+
+if __name__ == "__main__":
+    main()
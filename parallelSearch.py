@@ -0,0 +1,272 @@
+# Runs smartMoveFinder's search on several processes, python threads can't search in parallel because of the GIL
+# Two modes:
+# 'lazy' (Lazy SMP) has every worker search the whole position at the same time, they help each other through
+#        a transposition table kept in shared memory
+# 'root' splits the root moves between the workers, each worker rebuilds the position from a FEN string,
+#        plays its move and searches the reply with the best score found so far (alpha) shared between all of them.
+#        Experimental, alpha is only read when a worker starts a root move and every worker has its own table, so
+#        it searches more nodes than a single process and is usually slower
+# Worker processes are started by the first search and kept for the next ones, see closePool
+
+import multiprocessing
+import time
+
+import chessEngine
+import moveOrdering
+import openingBook
+import searchStats
+import smartMoveFinder
+import transpositionTable
+
+processes = None  # number of worker processes, None uses every core
+mode = 'lazy'
+workerTableSizeMB = 8  # private transposition table of each worker in root mode, cleared for every root move
+sharedTableSizeMB = 64  # the one table all workers use in lazy mode
+tieMargin = 1e-6  # root moves are searched with alpha lowered by this, so moves as good as the best get exact scores
+
+pool = None
+poolSettings = None  # (processes, mode) the pool was started with
+sharedAlpha = None  # best score at the root so far, from the point of view of the side to move
+workerSearcher = None  # smartMoveFinder.Searcher of a worker process
+
+
+# starts the worker processes, or reuses them if they were started with the same settings
+def getPool(workerCount, searchMode):
+    global pool, poolSettings, sharedAlpha
+    if pool is not None and poolSettings == (workerCount, searchMode):
+        return pool
+    closePool()
+    sharedAlpha = multiprocessing.Value('d', -smartMoveFinder.checkMate)
+    sharedTable = None
+    if searchMode == 'lazy':
+        sharedTable = transpositionTable.TranspositionTable(sharedTableSizeMB, shared=True)
+    pool = multiprocessing.Pool(workerCount, initializer=initWorker, initargs=(sharedAlpha, sharedTable))
+    poolSettings = (workerCount, searchMode)
+    return pool
+
+
+def closePool():
+    global pool, poolSettings
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+    pool = None
+    poolSettings = None
+
+
+# runs once in every worker process
+def initWorker(alpha, sharedTable):
+    global sharedAlpha, workerSearcher
+    sharedAlpha = alpha
+    workerSearcher = smartMoveFinder.Searcher(sharedTable)
+
+
+# the settings of searcher, or the module settings of smartMoveFinder without one, sent with every task so changes
+# made between searches reach the workers
+def searchSettings(searcher=None):
+    source = searcher if searcher is not None else smartMoveFinder
+    return {name: getattr(source, name) for name in smartMoveFinder.settingNames}
+
+
+def applySettings(settings):
+    for name, value in settings.items():
+        setattr(workerSearcher, name, value)
+
+
+# same arguments and result as smartMoveFinder.findBestMove, plus the number of processes, the mode and the
+# smartMoveFinder.Searcher whose settings the workers search with (the module settings without one)
+# node_limit counts the nodes of every worker together. Lazy workers get an equal share each, in root mode it is
+# checked between iterations so the last one can go over it
+# in root mode the move returned doesn't depend on which worker finished first, ties go to the earlier root move
+def findBestMove(gs, validMoves, time_limit=None, node_limit=None, callback=None, return_stats=False, workers=None,
+                 searchMode=None, searcher=None):
+    workerCount = workers or processes or multiprocessing.cpu_count()
+    searchMode = searchMode or mode
+    if searchMode not in ('root', 'lazy'):
+        raise ValueError("unknown parallel search mode " + str(searchMode))
+    stats = searchStats.SearchStats()
+    if len(validMoves) == 0:
+        return (None, stats) if return_stats else None
+    settings = searchSettings(searcher)
+    bookMove = openingBook.probe(settings['openingBookFile'], gs, validMoves)
+    if bookMove is not None:
+        stats.bookMove = True
+        stats.bestMove = bookMove
+        smartMoveFinder.stats = stats
+        return (bookMove, stats) if return_stats else bookMove
+    deadline = time.time() + time_limit if time_limit is not None else None  # wall clock, comparable across processes
+    if searchMode == 'root':
+        bestMove = searchRoot(gs, validMoves, getPool(workerCount, searchMode), deadline, node_limit, settings,
+                              callback, stats)
+    else:
+        bestMove = searchLazy(gs, validMoves, getPool(workerCount, searchMode), workerCount, deadline, node_limit,
+                              settings, stats)
+        if callback is not None:  # the workers' iterations aren't seen until the end, so it is called once
+            callback(stats)
+    smartMoveFinder.stats = stats
+    return (bestMove, stats) if return_stats else bestMove
+
+
+def searchRoot(gs, validMoves, workerPool, deadline, nodeLimit, settings, callback, stats):
+    searchStart = time.perf_counter()
+    fen = gs.to_fen()
+    engine = type(gs)
+    movesByCode = {move.encode(): move for move in validMoves}
+    # a fresh MoveOrdering so the first order only depends on the position
+    rootMoves = moveOrdering.MoveOrdering(smartMoveFinder.pieceScore).orderMoves(validMoves, 0)
+    settings = dict(settings, transpositionTableSizeMB=workerTableSizeMB)
+    finalDepth = settings['maxDepth'] if deadline is None and nodeLimit is None else settings['maxIterativeDepth']
+    bestMove = None
+    for depth in range(1, finalDepth + 1):
+        if bestMove is not None and (outOfTime(deadline) or nodeLimit is not None and stats.nodes >= nodeLimit):
+            stats.stopped = True
+            break
+        iterationStart = time.perf_counter()
+        iterationNodes = stats.nodes
+        with sharedAlpha.get_lock():
+            sharedAlpha.value = -smartMoveFinder.checkMate
+        taskNodes = nodeLimit - stats.nodes if nodeLimit is not None else None
+        tasks = [(engine, fen, move.encode(), depth, deadline, taskNodes, settings) for move in rootMoves]
+        # the first move is searched on its own so the others start with a real alpha to prune against
+        results = [workerPool.apply(searchRootMove, (tasks[0],))]
+        if depth > 1 and outOfTime(deadline):
+            results.append((None, None, False, [], searchStats.SearchStats()))
+        else:
+            results += workerPool.map(searchRootMove, tasks[1:], chunksize=1)
+        for result in results:
+            stats.add(result[4])
+        if any(result[1] is None for result in results):  # ran out of time before every move was searched
+            stats.stopped = True
+            break
+        # best exact score wins, results are in root move order so the earlier move wins a tie
+        bestIndex = None
+        for index, (code, score, exact, pv, workerStats) in enumerate(results):
+            if exact and (bestIndex is None or score > results[bestIndex][1]):
+                bestIndex = index
+        code, score, exact, pv, workerStats = results[bestIndex]
+        bestMove = movesByCode[code]
+        stats.addIteration(depth, score, decodeLine(gs, [code] + pv), stats.nodes - iterationNodes,
+                           time.perf_counter() - iterationStart)
+        if callback is not None:
+            stats.totalTime = time.perf_counter() - searchStart
+            callback(stats)
+        if abs(score) >= smartMoveFinder.mateScore:
+            break
+        # next iteration searches the best moves first, sorted() keeps the order of moves with the same score
+        order = sorted(range(len(results)), key=lambda index: (not results[index][2], -results[index][1]))
+        rootMoves = [movesByCode[results[index][0]] for index in order]
+    stats.bestMove = bestMove
+    stats.totalTime = time.perf_counter() - searchStart
+    return bestMove
+
+
+def outOfTime(deadline):
+    return deadline is not None and time.time() >= deadline
+
+
+# searches one root move in a worker, returns (move code, score or None if stopped, exact, pv codes, stats)
+def searchRootMove(task):
+    engine, fen, code, depth, deadline, nodeLimit, settings = task
+    if depth > 1 and outOfTime(deadline):  # the moves still queued when time runs out return straight away
+        return code, None, False, [], searchStats.SearchStats()
+    gs = engine.from_fen(fen)
+    move = chessEngine.Move.decode(code, gs.board)
+    applySettings(settings)
+    resetWorkerSearch(depth, deadline, nodeLimit)
+    with sharedAlpha.get_lock():
+        alpha = sharedAlpha.value - tieMargin
+    workerSearcher.rootInBitbase = workerSearcher.probeBitbase(gs) is not None
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    gs.makeMove(move)
+    score = -workerSearcher.negaMaxAlphaBeta(gs, gs.getValidMoves(), depth - 1, -smartMoveFinder.checkMate,
+                                             -alpha, -turnMultiplier, 1)
+    gs.undoMove()
+    workerStats = finishWorkerSearch()
+    if workerSearcher.searchStopped:
+        return code, None, False, [], workerStats
+    exact = score > alpha
+    if exact:
+        with sharedAlpha.get_lock():
+            if score > sharedAlpha.value:
+                sharedAlpha.value = score
+    pv = [pvMove.encode() for pvMove in workerSearcher.principalVariation(gs, move, depth)[1:]]
+    return code, score, exact, pv, workerStats
+
+
+# sets the worker's searcher up to search below the root, the root itself is searched by searchRoot
+# nothing is kept from the last task, so the result doesn't depend on which worker gets a move
+def resetWorkerSearch(depth, deadline, nodeLimit):
+    workerSearcher.rootDepth = depth
+    workerSearcher.rootBestMoveID = transpositionTable.noMove
+    workerSearcher.deadline = time.perf_counter() + deadline - time.time() if deadline is not None else None
+    workerSearcher.nodeLimit = nodeLimit
+    workerSearcher.nodes = 0
+    workerSearcher.searchStopped = False
+    workerSearcher.stopRequested = False
+    workerSearcher.stats = searchStats.SearchStats()
+    workerSearcher.ordering = moveOrdering.MoveOrdering(smartMoveFinder.pieceScore)
+    table = workerSearcher.getTranspositionTable()
+    table.clear()
+    table.probes = table.hits = 0
+
+
+def finishWorkerSearch():
+    workerStats = workerSearcher.stats
+    workerStats.nodes = workerSearcher.nodes
+    workerStats.cutoffs = workerSearcher.ordering.cutoffs
+    workerStats.firstMoveCutoffs = workerSearcher.ordering.firstMoveCutoffs
+    workerStats.tableProbes = workerSearcher.table.probes
+    workerStats.tableHits = workerSearcher.table.hits
+    workerSearcher.deadline = None
+    workerSearcher.nodeLimit = None
+    return workerStats
+
+
+def searchLazy(gs, validMoves, workerPool, workerCount, deadline, nodeLimit, settings, stats):
+    searchStart = time.perf_counter()
+    workerNodes = max(nodeLimit // workerCount, 1) if nodeLimit is not None else None
+    tasks = [(type(gs), gs.to_fen(), deadline, workerNodes, worker, settings) for worker in range(workerCount)]
+    results = workerPool.map(searchWholePosition, tasks, chunksize=1)
+    movesByCode = {move.encode(): move for move in validMoves}
+    # deepest search wins, ties go to the lowest worker number
+    best = None
+    for result in results:
+        stats.add(result[3])
+        if result[0] is not None and (best is None or result[3].depth() > best[3].depth()):
+            best = result
+    bestMove = movesByCode[best[0]]
+    stats.iterations = [dict(iteration, pv=decodeLine(gs, pv))
+                        for iteration, pv in zip(best[3].iterations, best[2])]
+    stats.bestMove = bestMove
+    stats.totalTime = time.perf_counter() - searchStart
+    return bestMove
+
+
+# a full iterative deepening search in a worker, odd workers aim one ply deeper so they don't all follow each other
+def searchWholePosition(task):
+    engine, fen, deadline, nodeLimit, worker, settings = task
+    gs = engine.from_fen(fen)
+    applySettings(settings)
+    workerSearcher.maxDepth += worker % 2
+    workerSearcher.ordering = moveOrdering.MoveOrdering(smartMoveFinder.pieceScore)
+    timeLimit = max(deadline - time.time(), 0) if deadline is not None else None
+    move, workerStats = workerSearcher.findBestMove(gs, gs.getValidMoves(), time_limit=timeLimit,
+                                                    node_limit=nodeLimit, return_stats=True)
+    # moves are sent back as codes, the pv of each iteration separately so the stats can be pickled cheaply
+    pvs = [[pvMove.encode() for pvMove in iteration['pv']] for iteration in workerStats.iterations]
+    for iteration in workerStats.iterations:
+        iteration['pv'] = []
+    workerStats.bestMove = None
+    return (move.encode() if move is not None else None), workerStats.score(), pvs, workerStats
+
+
+# turns a line of move codes played from gs into Move objects
+def decodeLine(gs, codes):
+    line = []
+    for code in codes:
+        move = chessEngine.Move.decode(code, gs.board)
+        line.append(move)
+        gs.makeMove(move)
+    for _ in line:
+        gs.undoMove()
+    return line
@@ -0,0 +1,126 @@
+# Perft, counts the leaf nodes of the move generation tree to a fixed depth
+# The counts are compared against known values, so any bug in getValidMoves, makeMove or undoMove shows up,
+# and the time taken gives the move generation speed in nodes per second
+#
+# python perft.py                          run every reference position to its default depth
+# python perft.py --position kiwipete --depth 2 --divide
+# python perft.py --engine mailbox --json results.json
+#
+# The engine always promotes to a queen, so positions whose counts depend on under promotions
+# (positions 4 and 5 of the usual set) are left out and the depths below stop before any promotion is possible
+
+import argparse
+import json
+import time
+
+import bitboardEngine
+import chessEngine
+
+engines = {'bitboard': bitboardEngine.GameState, 'mailbox': chessEngine.GameState}
+
+# name: (fen, {depth: nodes}, default depth)
+referencePositions = {
+    'startpos': ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                 {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}, 4),
+    'kiwipete': ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 {1: 48, 2: 2039, 3: 97862}, 3),
+    'position3': ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                  {1: 14, 2: 191, 3: 2812, 4: 43238}, 4),
+    'position6': ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                  {1: 46, 2: 2079, 3: 89890}, 3),
+}
+
+
+def perft(gs, depth):
+    if depth == 0:
+        return 1
+    moves = gs.getValidMoves()
+    if depth == 1:  # bulk count, no need to make the last moves
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        gs.makeMove(move)
+        nodes += perft(gs, depth - 1)
+        gs.undoMove()
+    return nodes
+
+
+# node counts for each root move, handy for finding which move a wrong total comes from
+def divide(gs, depth):
+    counts = {}
+    for move in gs.getValidMoves():
+        gs.makeMove(move)
+        counts[move.getChessNotation()] = perft(gs, depth - 1)
+        gs.undoMove()
+    return counts
+
+
+# runs one position to one depth and returns the result as a dictionary
+def runPosition(name, depth, engine='bitboard', showDivide=False, fen=None):
+    expected = None
+    if fen is None:
+        fen, counts, defaultDepth = referencePositions[name]
+        expected = counts.get(depth)
+    gs = engines[engine].from_fen(fen)
+    start = time.perf_counter()
+    if showDivide:
+        counts = divide(gs, depth)
+        nodes = sum(counts.values())
+    else:
+        counts = None
+        nodes = perft(gs, depth)
+    seconds = time.perf_counter() - start
+    result = {'position': name, 'fen': fen, 'engine': engine, 'depth': depth, 'nodes': nodes, 'expected': expected,
+              'passed': expected is None or nodes == expected, 'seconds': round(seconds, 4),
+              'nodesPerSecond': round(nodes / seconds) if seconds > 0 else None}
+    if counts is not None:
+        result['divide'] = counts
+    return result
+
+
+# runs the reference positions, returns a list of results
+def runSuite(engine='bitboard', depth=None, positions=None, showDivide=False):
+    results = []
+    for name in positions or referencePositions:
+        fen, counts, defaultDepth = referencePositions[name]
+        results.append(runPosition(name, depth or defaultDepth, engine, showDivide))
+    return results
+
+
+def printResult(result):
+    if result['expected'] is None:
+        status = 'n/a '
+    else:
+        status = 'ok  ' if result['passed'] else 'FAIL'
+    print(status, result['engine'], result['position'], 'depth', result['depth'], 'nodes', result['nodes'],
+          'expected', result['expected'], '%.2fs' % result['seconds'], result['nodesPerSecond'], 'nodes/s')
+    if 'divide' in result:
+        for move, nodes in sorted(result['divide'].items()):
+            print('   ', move, nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perft correctness and speed check for the move generators')
+    parser.add_argument('--engine', choices=sorted(engines), default='bitboard')
+    parser.add_argument('--position', action='append', choices=sorted(referencePositions),
+                        help='reference position to run, can be given more than once (default all)')
+    parser.add_argument('--fen', help='run a custom position instead, there is no expected count to check')
+    parser.add_argument('--depth', type=int, help='depth to search (default depends on the position)')
+    parser.add_argument('--divide', action='store_true', help='print node counts for each root move')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    if args.fen:
+        results = [runPosition('fen', args.depth or 3, args.engine, args.divide, fen=args.fen)]
+    else:
+        results = runSuite(args.engine, args.depth, args.position, args.divide)
+    for result in results:
+        printResult(result)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, file, indent=2)
+    return 0 if all(result['passed'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
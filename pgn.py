@@ -0,0 +1,154 @@
+# Standard algebraic notation (SAN) and PGN files, for saving games in a form other chess programs can read
+
+import chessEngine
+
+startFen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+# SAN of move, e.g. Nbd2, exd5, e8=Q+ or O-O, validMoves are the legal moves of gs before the move is made
+def moveToSan(gs, move, validMoves):
+    if move.isCastleMove:
+        san = "O-O" if move.endColumn > move.startColumn else "O-O-O"
+    else:
+        target = move.getRankFile(move.endRow, move.endColumn)
+        capture = "x" if move.pieceCaptured != "--" else ""
+        if move.pieceMoved[1] == 'p':
+            san = (move.columnsToFiles[move.startColumn] + capture if capture else "") + target
+            if move.isPawnPromotion:
+                san += "=Q"
+        else:
+            # another piece of the same type that can go to the same square has to be told apart
+            others = [other for other in validMoves if other.pieceMoved == move.pieceMoved and
+                      other.endRow == move.endRow and other.endColumn == move.endColumn and
+                      (other.startRow, other.startColumn) != (move.startRow, move.startColumn)]
+            disambiguation = ""
+            if others:
+                if all(other.startColumn != move.startColumn for other in others):
+                    disambiguation = move.columnsToFiles[move.startColumn]
+                elif all(other.startRow != move.startRow for other in others):
+                    disambiguation = move.rowToRanks[move.startRow]
+                else:
+                    disambiguation = move.getRankFile(move.startRow, move.startColumn)
+            san = move.pieceMoved[1] + disambiguation + capture + target
+    gs.makeMove(move)
+    replies = gs.getValidMoves()
+    if len(replies) == 0 and gs.checkMate:
+        san += "#"
+    elif gs.inCheck():
+        san += "+"
+    gs.undoMove()
+    return san
+
+
+# writes one game, headers is a list of (name, value) pairs and sanMoves the moves from the start position
+def writeGame(file, headers, sanMoves, result, fen=startFen):
+    gs = chessEngine.GameState.from_fen(fen)
+    headers = list(headers) + [("Result", result)]
+    if fen != startFen:
+        headers += [("SetUp", "1"), ("FEN", fen)]
+    for name, value in headers:
+        file.write('[%s "%s"]\n' % (name, str(value).replace('"', "'")))
+    file.write("\n")
+    words = []
+    moveNumber = gs.fullMoveNumber
+    whiteToMove = gs.whiteToMove
+    if not whiteToMove:
+        words.append("%d..." % moveNumber)
+    for san in sanMoves:
+        if whiteToMove:
+            words.append("%d." % moveNumber)
+        else:
+            moveNumber += 1
+        words.append(san)
+        whiteToMove = not whiteToMove
+    words.append(result)
+    line = ""
+    for word in words:  # PGN lines are kept under 80 characters
+        if line and len(line) + 1 + len(word) > 79:
+            file.write(line + "\n")
+            line = word
+        else:
+            line = line + " " + word if line else word
+    file.write(line + "\n\n")
+
+
+# the legal move written as san in gs, or None, check and annotation marks are ignored
+# only queen promotions can be played by the engine, so an under promotion gives None
+def sanToMove(gs, san, validMoves):
+    san = san.rstrip("+#!?")
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        kingside = len(san) == 3
+        for move in validMoves:
+            if move.isCastleMove and (move.endColumn > move.startColumn) == kingside:
+                return move
+        return None
+    promotion = None
+    if "=" in san:
+        san, promotion = san.split("=")
+    elif len(san) > 2 and san[-1] in "QRBN" and san[-2] in "18":
+        san, promotion = san[:-1], san[-1]
+    if promotion is not None and promotion != "Q":
+        return None
+    pieceType = san[0] if san[0] in "NBRQK" else "p"
+    if pieceType != "p":
+        san = san[1:]
+    target = san[-2:]
+    if len(target) != 2 or target[0] not in chessEngine.Move.filesToColumns or \
+            target[1] not in chessEngine.Move.ranksToRows:
+        return None
+    endRow, endColumn = chessEngine.Move.ranksToRows[target[1]], chessEngine.Move.filesToColumns[target[0]]
+    disambiguation = san[:-2].replace("x", "")
+    for move in validMoves:
+        if move.pieceMoved[1] != pieceType or move.endRow != endRow or move.endColumn != endColumn:
+            continue
+        if any(move.columnsToFiles[move.startColumn] != symbol if symbol in move.filesToColumns else
+               move.rowToRanks[move.startRow] != symbol for symbol in disambiguation):
+            continue
+        return move
+    return None
+
+
+# reads every game in a PGN file, yields (headers, sanMoves, result) with headers as a dictionary
+# comments, variations, move numbers and numeric annotations are skipped
+def readGames(file):
+    headers = {}
+    words = []
+    inMoves = False
+    for line in file:
+        line = line.strip()
+        if line.startswith("[") and line.endswith("]"):
+            if inMoves:
+                yield parseGame(headers, words)
+                headers, words, inMoves = {}, [], False
+            name, _, value = line[1:-1].partition(" ")
+            headers[name] = value.strip().strip('"')
+        elif line and not line.startswith("%"):
+            inMoves = True
+            words.append(line)
+    if inMoves:
+        yield parseGame(headers, words)
+
+
+def parseGame(headers, lines):
+    text = " ".join(lines)
+    sanMoves = []
+    result = headers.get("Result", "*")
+    depth = 0  # inside how many comments and variations
+    word = ""
+    for character in text + " ":
+        if character in "{(":
+            depth += 1
+        elif character in "})":
+            depth -= 1
+        elif depth == 0:
+            if character.isspace():
+                if word in ("1-0", "0-1", "1/2-1/2", "*"):
+                    result = word
+                elif word and not word.startswith("$"):
+                    word = word.split(".")[-1]  # 12.e4 and 12...e5 as well as 12. e4
+                    if word:
+                        sanMoves.append(word)
+                word = ""
+            else:
+                word += character
+    return headers, sanMoves, result
@@ -0,0 +1,113 @@
+# Numbers collected by smartMoveFinder.findBestMove while it searches
+# Use them to tune maxDepth and the time limits, and to check whether a change to the search actually helped
+# Times are in seconds and only cover the work done inside the search, the time per phase (move generation,
+# evaluation, make/undo) is only measured with smartMoveFinder.timeSearchPhases on, it stays 0 otherwise
+
+
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0  # every position visited, quiescence included
+        self.quiescenceNodes = 0
+        self.leafNodes = 0  # positions scored statically, evaluated or found to be mate or stalemate
+        self.cutoffs = 0  # beta cutoffs in the main search
+        self.firstMoveCutoffs = 0  # beta cutoffs caused by the first move searched
+        self.nullMoveCutoffs = 0
+        self.reductions = 0  # late moves searched at reduced depth
+        self.reSearches = 0  # null window or reduced searches that had to be repeated with the full window or depth
+        self.extensions = 0  # checks searched one ply deeper
+        self.bitbaseHits = 0  # positions scored from the endgame bitbases
+        self.tableProbes = 0  # transposition table lookups, both stay 0 when the table is switched off
+        self.tableHits = 0
+        self.moveGenerationTime = 0.0  # getValidMoves and getCaptureMoves
+        self.evaluationTime = 0.0
+        self.makeUndoTime = 0.0  # makeMove and undoMove
+        self.totalTime = 0.0
+        self.iterations = []  # one entry per completed depth, see addIteration
+        self.bestMove = None
+        self.stopped = False  # True when the time or node limit cut the last iteration short
+        self.bookMove = False  # True when the move came from the opening book and nothing was searched
+
+    # records a completed iteration, score is from the point of view of the side to move
+    def addIteration(self, depth, score, pv, nodes, seconds):
+        self.iterations.append({'depth': depth, 'score': score, 'pv': pv, 'nodes': nodes, 'seconds': seconds})
+
+    # adds the counters and times of another search, e.g. one run by a parallelSearch worker
+    def add(self, other):
+        self.nodes += other.nodes
+        self.quiescenceNodes += other.quiescenceNodes
+        self.leafNodes += other.leafNodes
+        self.cutoffs += other.cutoffs
+        self.firstMoveCutoffs += other.firstMoveCutoffs
+        self.nullMoveCutoffs += other.nullMoveCutoffs
+        self.reductions += other.reductions
+        self.reSearches += other.reSearches
+        self.extensions += other.extensions
+        self.bitbaseHits += other.bitbaseHits
+        self.tableProbes += other.tableProbes
+        self.tableHits += other.tableHits
+        self.moveGenerationTime += other.moveGenerationTime
+        self.evaluationTime += other.evaluationTime
+        self.makeUndoTime += other.makeUndoTime
+
+    # deepest completed iteration
+    def depth(self):
+        return self.iterations[-1]['depth'] if self.iterations else 0
+
+    def score(self):
+        return self.iterations[-1]['score'] if self.iterations else None
+
+    def pv(self):
+        return self.iterations[-1]['pv'] if self.iterations else []
+
+    # fraction of cutoffs that came from the first move, close to 1 means the ordering is good
+    def firstMoveCutoffRatio(self):
+        if self.cutoffs == 0:
+            return 0.0
+        return self.firstMoveCutoffs / self.cutoffs
+
+    def tableHitRate(self):
+        if self.tableProbes == 0:
+            return 0.0
+        return self.tableHits / self.tableProbes
+
+    def nodesPerSecond(self):
+        if self.totalTime <= 0:
+            return 0
+        return round(self.nodes / self.totalTime)
+
+    # time spent in the search itself, alpha beta bookkeeping, move ordering and the rest
+    # parallel searches add up the time of every worker, so the phases can come to more than totalTime
+    def otherTime(self):
+        return max(self.totalTime - self.moveGenerationTime - self.evaluationTime - self.makeUndoTime, 0.0)
+
+    # plain dictionary of everything, handy for json dumps and logging
+    def asDict(self):
+        return {'nodes': self.nodes, 'quiescenceNodes': self.quiescenceNodes, 'leafNodes': self.leafNodes,
+                'cutoffs': self.cutoffs, 'firstMoveCutoffRatio': self.firstMoveCutoffRatio(),
+                'nullMoveCutoffs': self.nullMoveCutoffs, 'reductions': self.reductions,
+                'reSearches': self.reSearches, 'extensions': self.extensions, 'bitbaseHits': self.bitbaseHits,
+                'tableProbes': self.tableProbes, 'tableHits': self.tableHits,
+                'moveGenerationTime': self.moveGenerationTime, 'evaluationTime': self.evaluationTime,
+                'makeUndoTime': self.makeUndoTime, 'otherTime': self.otherTime(), 'totalTime': self.totalTime,
+                'nodesPerSecond': self.nodesPerSecond(), 'stopped': self.stopped, 'bookMove': self.bookMove,
+                'bestMove': self.bestMove.getChessNotation() if self.bestMove is not None else None,
+                'iterations': [dict(iteration, pv=[move.getChessNotation() for move in iteration['pv']])
+                               for iteration in self.iterations]}
+
+    def __str__(self):
+        if self.bookMove:
+            return 'book move ' + self.bestMove.getChessNotation()
+        lines = []
+        for iteration in self.iterations:
+            lines.append('depth %d score %.2f nodes %d time %.3fs pv %s' % (
+                iteration['depth'], iteration['score'], iteration['nodes'], iteration['seconds'],
+                ' '.join(move.getChessNotation() for move in iteration['pv'])))
+        lines.append('nodes %d (quiescence %d, leaves %d) %d nodes/s' % (self.nodes, self.quiescenceNodes,
+                                                                       self.leafNodes, self.nodesPerSecond()))
+        lines.append('cutoffs %d first move %.1f%%, table hits %d/%d' % (
+            self.cutoffs, 100 * self.firstMoveCutoffRatio(), self.tableHits, self.tableProbes))
+        lines.append('null move cutoffs %d, reductions %d, re-searches %d, extensions %d, bitbase hits %d' % (
+            self.nullMoveCutoffs, self.reductions, self.reSearches, self.extensions, self.bitbaseHits))
+        lines.append('time %.3fs: move generation %.3fs, evaluation %.3fs, make/undo %.3fs, other %.3fs' % (
+            self.totalTime, self.moveGenerationTime, self.evaluationTime, self.makeUndoTime, self.otherTime()))
+        return '\n'.join(lines)
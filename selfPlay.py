@@ -0,0 +1,328 @@
+# Headless engine against engine matches, played across a process pool
+# Every engine has its own configuration, any smartMoveFinder setting (maxDepth, useNullMove, ...) plus
+#   timeLimit  seconds per move, searches by depth when not given
+#   nodeLimit  nodes per move
+#   weights    {"pieceScore": {...}, "middleGame": {...}, "endGame": {...}} passed to evaluation.setWeights,
+#              or the name of a file of them written by texelTuner.py
+# Each pair of engines plays every opening twice, once with each colour. Searches limited by depth or nodes always
+# play the same game from the same position, so when there are fewer openings than pairs of games random moves are
+# played from them to make up the rest (see extendOpenings, --seed), no opening is played by a pair more than twice
+#
+# python selfPlay.py --engines engines.json --games 200 --openings openings.txt --pgn games.pgn
+# engines.json: {"new": {"maxDepth": 3}, "old": {"maxDepth": 3, "useNullMove": false}}
+# openings.txt: one FEN or one line of moves (e2e4 e7e5 g1f3) per line, lines starting with # are ignored
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import time
+
+import bitboardEngine
+import evaluation
+import pgn
+import smartMoveFinder
+
+defaultEngines = {"default": {"maxDepth": 3},
+                  "noPruning": {"maxDepth": 3, "useNullMove": False, "useLateMoveReductions": False}}
+matchTableSizeMB = 16  # transposition table of each engine unless its configuration says otherwise
+maxPlies = 400  # longer games are adjudicated as draws
+randomPlies = 8  # random moves played from a given opening to make a new one, see extendOpenings
+
+workerSearchers = {}  # Searcher of each engine in a worker process, kept between games
+installedWeights = None  # evaluation weights currently set in this process
+
+
+def getSearcher(name, config):
+    if name not in workerSearchers:
+        searcher = smartMoveFinder.Searcher()
+        searcher.transpositionTableSizeMB = matchTableSizeMB
+        for setting, value in config.items():
+            if setting in smartMoveFinder.settingNames:
+                setattr(searcher, setting, value)
+        workerSearchers[name] = searcher
+    return workerSearchers[name]
+
+
+# runs once in every worker process
+def initWorker(plies):
+    global maxPlies
+    maxPlies = plies
+
+
+# weights are remembered as given, so a file is only read again when a different one is asked for
+def installWeights(weights):
+    global installedWeights
+    if weights != installedWeights:
+        installedWeights = weights
+        if isinstance(weights, str):
+            weights = evaluation.readWeights(weights)
+        evaluation.setWeights(weights.get("pieceScore"), weights.get("middleGame"), weights.get("endGame"))
+
+
+# plays one game, task is (game number, white name, white config, black name, black config, opening)
+# returns a dictionary describing the game
+def playGame(task):
+    gameNumber, whiteName, whiteConfig, blackName, blackConfig, opening = task
+    installWeights({})
+    startFen = openingPosition(opening).to_fen()
+    referee = bitboardEngine.GameState.from_fen(startFen)  # keeps the real game and checks the rules
+    players = {'w': (whiteName, whiteConfig), 'b': (blackName, blackConfig)}
+    # every engine searches its own copy of the game, brought up to date with its own evaluation weights in place
+    states = {}
+    synced = {}
+    usage = {whiteName: [0, 0.0], blackName: [0, 0.0]}  # nodes and seconds of each engine
+    sanMoves = []
+    result, termination = None, None
+    validMoves = referee.getValidMoves()
+    while result is None:
+        colour = 'w' if referee.whiteToMove else 'b'
+        name, config = players[colour]
+        installWeights(config.get("weights", {}))
+        if colour not in states:
+            states[colour] = bitboardEngine.GameState.from_fen(startFen)
+            synced[colour] = 0
+        gs = states[colour]
+        for move in referee.moveLog[synced[colour]:]:
+            gs.makeMove(move)
+        synced[colour] = len(referee.moveLog)
+        searcher = getSearcher(name, config)
+        move, stats = searcher.findBestMove(gs, gs.getValidMoves(), time_limit=config.get("timeLimit"),
+                                            node_limit=config.get("nodeLimit"), return_stats=True)
+        usage[name][0] += stats.nodes
+        usage[name][1] += stats.totalTime
+        move = next(validMove for validMove in validMoves if validMove == move)
+        sanMoves.append(pgn.moveToSan(referee, move, validMoves))
+        referee.makeMove(move)
+        validMoves = referee.getValidMoves()
+        result, termination = adjudicate(referee, validMoves)
+    for searcher in (getSearcher(whiteName, whiteConfig), getSearcher(blackName, blackConfig)):
+        searcher.newGame()
+    return {"game": gameNumber, "white": whiteName, "black": blackName, "fen": startFen, "moves": sanMoves,
+            "result": result, "termination": termination, "usage": usage}
+
+
+# result and reason once the game is over, (None, None) while it goes on
+def adjudicate(gs, validMoves):
+    if len(validMoves) == 0:
+        if gs.checkMate:
+            return ("0-1" if gs.whiteToMove else "1-0"), "checkmate"
+        return "1/2-1/2", "stalemate"
+    if gs.insufficientMaterial():
+        return "1/2-1/2", "insufficient material"
+    if gs.isFiftyMoveDraw():
+        return "1/2-1/2", "50 move rule"
+    if gs.isRepetition(3):
+        return "1/2-1/2", "threefold repetition"
+    if len(gs.moveLog) >= maxPlies:
+        return "1/2-1/2", "adjudicated after %d plies" % maxPlies
+    return None, None
+
+
+# each line is a FEN or a list of moves from the start position
+def readOpenings(fileName):
+    openings = []
+    with open(fileName) as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "/" in line:
+                openings.append((line, []))
+            else:
+                openings.append((pgn.startFen, line.split()))
+    return openings
+
+
+# position an opening (fen, moves) starts the game from
+def openingPosition(opening):
+    fen, openingMoves = opening
+    gs = bitboardEngine.GameState.from_fen(fen)
+    for text in openingMoves:
+        move = next((move for move in gs.getValidMoves() if move.getChessNotation() == text[:4]), None)
+        if move is None:
+            raise ValueError("illegal opening move " + text + " in " + " ".join(openingMoves))
+        gs.makeMove(move)
+    return gs
+
+
+# the openings plus new ones made by playing randomPlies random moves from them, until there is one for every
+# two games. Positions are never repeated and a game that is already over is never made an opening
+def extendOpenings(openings, games, rng):
+    needed = (games + 1) // 2
+    extended = list(openings)
+    seen = {openingPosition(opening).zobristKey for opening in openings}
+    attempts = 0
+    while len(extended) < needed and attempts < 100 * needed:  # a short list can run out of new positions
+        attempts += 1
+        fen, openingMoves = rng.choice(openings)
+        gs = openingPosition((fen, openingMoves))
+        moves = list(openingMoves)
+        for ply in range(randomPlies):
+            validMoves = gs.getValidMoves()
+            if len(validMoves) == 0:
+                break
+            move = rng.choice(validMoves)
+            gs.makeMove(move)
+            moves.append(move.getChessNotation())
+        if len(gs.getValidMoves()) > 0 and gs.zobristKey not in seen:
+            seen.add(gs.zobristKey)
+            extended.append((fen, moves))
+    return extended
+
+
+# every pair of engines plays every opening with both colours until games games have been scheduled per pair
+def scheduleGames(engines, openings, games):
+    tasks = []
+    for first, second in itertools.combinations(sorted(engines), 2):
+        for index in range(games):
+            opening = openings[(index // 2) % len(openings)]
+            white, black = (first, second) if index % 2 == 0 else (second, first)
+            tasks.append((len(tasks) + 1, white, engines[white], black, engines[black], opening))
+    return tasks
+
+
+# Elo difference that gives the expected score
+def eloFromScore(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def expectedScore(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+# Elo difference with its 95% error margin, from the wins, draws and losses of the first engine
+def eloEstimate(wins, draws, losses):
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, 0.0
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return eloFromScore(score), (eloFromScore(min(score + margin, 1)) - eloFromScore(max(score - margin, 0))) / 2
+
+
+# sequential probability ratio test of H0: elo == elo0 against H1: elo == elo1, using the normal approximation
+# returns the log likelihood ratio and 'H1' or 'H0' once it crosses a bound, or None while more games are needed
+def sprt(wins, draws, losses, elo0=0, elo1=5, alpha=0.05, beta=0.05):
+    games = wins + draws + losses
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    if games == 0 or wins + losses == 0:
+        return 0.0, None
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if variance == 0:
+        return 0.0, None
+    score0, score1 = expectedScore(elo0), expectedScore(elo1)
+    llr = games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+    if llr >= upper:
+        return llr, "H1"
+    if llr <= lower:
+        return llr, "H0"
+    return llr, None
+
+
+# wins, draws and losses of first against second
+def pairResults(games, first, second):
+    wins = draws = losses = 0
+    for game in games:
+        if {game["white"], game["black"]} != {first, second}:
+            continue
+        if game["result"] == "1/2-1/2":
+            draws += 1
+        elif (game["result"] == "1-0") == (game["white"] == first):
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+def summary(games, engines, elo0=0, elo1=5):
+    lines = []
+    for first, second in itertools.combinations(sorted(engines), 2):
+        wins, draws, losses = pairResults(games, first, second)
+        elo, margin = eloEstimate(wins, draws, losses)
+        llr, decision = sprt(wins, draws, losses, elo0, elo1)
+        lines.append("%s vs %s: +%d =%d -%d  Elo %+.1f +/- %.1f  SPRT(%g, %g) LLR %.2f %s" % (
+            first, second, wins, draws, losses, elo, margin, elo0, elo1, llr,
+            {"H1": "(H1 accepted)", "H0": "(H0 accepted)"}.get(decision, "")))
+    nodes, seconds = {}, {}
+    for game in games:
+        for name, (engineNodes, engineSeconds) in game["usage"].items():
+            nodes[name] = nodes.get(name, 0) + engineNodes
+            seconds[name] = seconds.get(name, 0.0) + engineSeconds
+    for name in sorted(nodes):
+        lines.append("%s: %d nodes in %.1fs, %d nodes/s" % (name, nodes[name], seconds[name],
+                                                           nodes[name] / seconds[name] if seconds[name] > 0 else 0))
+    terminations = {}
+    for game in games:
+        terminations[game["termination"]] = terminations.get(game["termination"], 0) + 1
+    lines.append(", ".join("%s %d" % item for item in sorted(terminations.items())))
+    return "\n".join(lines)
+
+
+# plays the games on processes workers, writes them to pgnFile as they finish and returns them in game order
+# with fewer openings than pairs of games random ones are added, seed makes them the same from run to run
+def runMatch(engines, openings, games, processes=None, pgnFile=None, progress=True, plies=None, seed=1):
+    extended = extendOpenings(openings, games, random.Random(seed))
+    if progress and len(extended) > len(openings):
+        print("%d openings given, %d made with %d random moves" % (len(openings), len(extended) - len(openings),
+                                                                 randomPlies))
+    tasks = scheduleGames(engines, extended, games)
+    results = []
+    pgnOutput = open(pgnFile, "w") if pgnFile else None
+    try:
+        with multiprocessing.Pool(processes, initializer=initWorker, initargs=(plies or maxPlies,)) as pool:
+            for game in pool.imap_unordered(playGame, tasks):
+                results.append(game)
+                if pgnOutput:
+                    headers = [("Event", "selfPlay"), ("Site", "local"), ("Date", time.strftime("%Y.%m.%d")),
+                               ("Round", game["game"]), ("White", game["white"]), ("Black", game["black"]),
+                               ("Termination", game["termination"])]
+                    pgn.writeGame(pgnOutput, headers, game["moves"], game["result"], game["fen"])
+                    pgnOutput.flush()
+                if progress:
+                    print("game %d/%d %s %s-%s %s (%s)" % (len(results), len(tasks), game["result"], game["white"],
+                                                         game["black"], game["termination"], len(game["moves"])))
+    finally:
+        if pgnOutput:
+            pgnOutput.close()
+    return sorted(results, key=lambda game: game["game"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays engine configurations against each other')
+    parser.add_argument('--engines', help='JSON file of engine name: configuration (default %s)' % defaultEngines)
+    parser.add_argument('--games', type=int, default=10, help='games per pair of engines')
+    parser.add_argument('--openings', help='file of FENs or move lines to start the games from')
+    parser.add_argument('--processes', type=int, help='worker processes (default every core)')
+    parser.add_argument('--pgn', help='write the games to this PGN file')
+    parser.add_argument('--max-plies', type=int, default=maxPlies, help='games this long are drawn')
+    parser.add_argument('--elo0', type=float, default=0, help='SPRT null hypothesis Elo')
+    parser.add_argument('--elo1', type=float, default=5, help='SPRT alternative hypothesis Elo')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the random openings added when there are too few')
+    args = parser.parse_args()
+
+    engines = defaultEngines
+    if args.engines:
+        with open(args.engines) as file:
+            engines = json.load(file)
+    if len(engines) < 2:
+        parser.error("at least two engines are needed")
+    openings = readOpenings(args.openings) if args.openings else [(pgn.startFen, [])]
+    start = time.perf_counter()
+    games = runMatch(engines, openings, args.games, args.processes, args.pgn, plies=args.max_plies, seed=args.seed)
+    print(summary(games, engines, args.elo0, args.elo1))
+    print("%d games in %.1fs" % (len(games), time.perf_counter() - start))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"engines": engines, "games": games}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,183 +1,700 @@
-import random
-import chessEngine
-
-# gs = chessEngine.GameState()
-
-pieceScore = {"K": 0, "Q": 9, "R": 5, "B": 3.25, "N": 3, "p": 1}
-checkMate = 1000
-staleMate = 0
-maxDepth = 2
-# returns a random move
-def findRandomMove(validMoves):
-    return validMoves[random.randint(0, len(validMoves) - 1)]
-
-
-# helper method to make first recursive call
-def findBestMove(gs, validMoves):
-    global nextMove
-    nextMove = None
-    # return greedyAlgorithm(gs, validMoves)
-    # return minimaxNonRecursive(gs,validMoves)
-    # return minimaxRecursive(gs, validMoves, maxDepth, gs.whiteToMove)
-    # negaMax(gs, validMoves, maxDepth, 1 if gs.whiteToMove else -1)
-    negaMaxAlphaBeta(gs, validMoves, maxDepth, -checkMate, checkMate, 1 if gs.whiteToMove else -1)
-    return nextMove
-
-
-def greedyAlgorithm(gs, validMoves):
-    turnMultiplier = 1 if gs.whiteToMove else -1
-    maxScore = -checkMate  # lowest theoretical score
-    bestMove = None
-    for playerMove in validMoves:
-        gs.makeMove(playerMove)
-        if gs.checkMate:
-            score = checkMate
-        elif gs.staleMate:
-            score = staleMate
-        score = turnMultiplier * scoreMaterial(gs.board)
-        if score > maxScore:
-            maxScore = score
-            bestMove = playerMove
-        gs.undoMove()
-    return bestMove
-
-
-def minimaxNonRecursive(gs, validMoves):
-    turnMultiplier = 1 if gs.whiteToMove else -1
-    opponentMinMaxScore = checkMate  # lowest theoretical score
-    bestPlayerMove = None
-    random.shuffle(validMoves)
-    # finds best move by minimising the opponents maximum score
-    for playerMove in validMoves:
-        gs.makeMove(playerMove)  # get player moves
-        opponentsMoves = gs.getValidMoves()  # get opponents move
-        if gs.checkMate:
-            opponentsMaxScore = -checkMate
-        elif gs.staleMate:
-            opponentsMaxScore = staleMate
-        else:
-            opponentsMaxScore = -checkMate  # set to low value
-            # finds best move from opponent
-            for opponentsMoves in opponentsMoves:
-                gs.makeMove(opponentsMoves)
-                gs.getValidMoves()  # required to check for checkmate
-                if gs.checkMate:
-                    score = checkMate
-                elif gs.staleMate:
-                    score = staleMate
-                else:
-                    score = -turnMultiplier * scoreMaterial(gs.board)
-                if opponentsMaxScore < score:  # update best score
-                    opponentsMaxScore = score
-                gs.undoMove()
-            if opponentsMaxScore < opponentMinMaxScore:  # if opponents max score is lower with this move, make that move
-                opponentMinMaxScore = opponentsMaxScore
-                bestPlayerMove = playerMove
-            gs.undoMove()
-    return bestPlayerMove
-
-
-def minimaxRecursive(gs, validMoves, depth, whiteToMove):
-    global nextMove
-    if depth == 0:  # at terminal/leaf depth, no more children, go back up tree
-        return scoreMaterial(gs.board)
-
-    # alternates between white and black moves
-    if whiteToMove:
-        maxScore = - checkMate  # worst possible outcome
-        for move in validMoves:
-            gs.makeMove(move) # make the move
-            nextMoves = gs.getValidMoves() # find next moves
-            # moves up from terminal/leaf node with all possible moves by calling its own function recursively
-            score = minimaxRecursive(gs, nextMoves, depth - 1, False)
-            if score > maxScore:  # new best score
-                maxScore = score
-                if depth == maxDepth:  # if at surface level, no parents, move to other possible moves and go down
-                    nextMove = move
-            gs.undoMove()
-        return maxScore
-    else:
-        minScore = checkMate  # worst possible outcome
-        for move in validMoves:
-            gs.makeMove(move)
-            nextMoves = gs.getValidMoves()
-            score = minimaxRecursive(gs, nextMoves, depth - 1, True)
-            if score < minScore:
-                minScore = score
-                if depth == maxDepth:
-                    nextMove = move
-            gs.undoMove()
-        return minScore
-
-
-def negaMax(gs, validMoves, depth, turnMultiplier):
-    global nextMove
-    if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
-
-    maxScore = -checkMate
-    for move in validMoves:
-        gs.makeMove(move)
-        nextMoves = gs.getValidMoves()
-        score = -negaMax(gs, nextMoves, (depth - 1), (-1 * turnMultiplier))
-        if score > maxScore:
-            maxScore = score
-            if depth == maxDepth:
-                nextMove = move
-        gs.undoMove()
-    return maxScore
-
-
-def negaMaxAlphaBeta(gs, validMoves, depth, alpha, beta, turnMultiplier):
-    global nextMove
-    if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
-    # todo ordering moves e.g. start with a check
-    maxScore = -checkMate
-    for move in validMoves:
-        gs.makeMove(move)
-        nextMoves = gs.getValidMoves()
-        score = -negaMaxAlphaBeta(gs, nextMoves, (depth - 1), -beta, -alpha, (-1 * turnMultiplier))
-        if score > maxScore:
-            maxScore = score
-            if depth == maxDepth:
-                nextMove = move
-        gs.undoMove()
-        # pruning
-        if maxScore > alpha:
-            alpha = maxScore
-        if alpha >= beta:
-            break
-    return maxScore
-
-
-# Score the board based on material
-def scoreMaterial(board):
-    score = 0
-    for row in board:
-        for square in row:
-            if square[0] == 'w':
-                score += pieceScore[square[1]]
-            elif square[0] == 'b':
-                score -= pieceScore[square[1]]
-    return score
-
-
-# Positive score is good for white, negative for black
-def scoreBoard(gs):
-    if gs.checkMate:
-        if gs.whiteToMove:
-            return -checkMate  # black wins
-        else:
-            return checkMate  # white wins
-    elif gs.staleMate:
-        return staleMate
-    score = 0
-    for row in gs.board:
-        for square in row:
-            if square[0] == 'w':
-                score += pieceScore[square[1]]
-            elif square[0] == 'b':
-                score -= pieceScore[square[1]]
-    return score
-
+import random
+import time
+import bitbases
+import chessEngine
+import evaluation
+import transpositionTable
+import moveOrdering
+import openingBook
+import searchStats
+
+# gs = chessEngine.GameState()
+
+pieceScore = evaluation.pieceScore
+checkMate = 1000  # a mate is scored checkMate less the plies from the root to it, so a nearer mate scores higher
+mateScore = checkMate - 2 * moveOrdering.maxPly  # scores beyond this are mates
+staleMate = 0
+maxDepth = 2
+debugEvaluation = False  # when True every evaluation is checked against a full scan of the board
+timeSearchPhases = False  # when True the stats time move generation, evaluation and make/undo, which slows the search
+transpositionTableSizeMB = 64  # memory budget of the transposition table
+useTranspositionTable = True
+useQuiescence = True  # keep searching captures at depth 0 instead of scoring in the middle of an exchange
+quiescenceChecks = False  # also search quiet checking moves at the first ply of the quiescence search
+deltaMargin = 2  # captures that can't raise the score to alpha even with this much extra are skipped
+maxIterativeDepth = 64  # deepest iteration when searching against a time or node limit
+checkTimeEvery = 256  # nodes between looks at the clock
+usePrincipalVariationSearch = True  # search moves after the first with a null window, re-search if one does better
+useNullMove = True  # pass the turn, if a shallow search still beats beta the position is cut off
+nullMoveReduction = 2  # depth taken off the null move search, one more above depth 6
+nullMoveMinDepth = 3
+useLateMoveReductions = True  # quiet moves late in the ordering are searched shallower first
+lateMoveMinDepth = 3
+lateMoveMinMoves = 3  # moves before this index are never reduced, from twice this index they are reduced by 2
+lateMoveHistory = 64  # moves with at least this much history are reduced one ply less
+useCheckExtensions = True  # moves that give check are searched one ply deeper
+openingBookFile = None  # book built by openingBook.py, positions in it are played from the book without a search
+useBitbases = True  # score KQK, KRK and KPK positions from the bitbases built by bitbases.py instead of searching
+bitbaseFolder = "bitbases"
+# the settings above that every Searcher gets its own copy of
+settingNames = ('maxDepth', 'transpositionTableSizeMB', 'useTranspositionTable', 'useQuiescence', 'quiescenceChecks',
+                'deltaMargin', 'maxIterativeDepth', 'checkTimeEvery', 'usePrincipalVariationSearch', 'useNullMove',
+                'nullMoveReduction', 'nullMoveMinDepth', 'useLateMoveReductions', 'lateMoveMinDepth',
+                'lateMoveMinMoves', 'lateMoveHistory', 'useCheckExtensions', 'openingBookFile',
+                'useBitbases', 'bitbaseFolder')
+nullWindow = 1e-6  # width of the window used to test whether a move beats alpha
+searcher = None  # Searcher used by the module level functions, see getSearcher
+nextMove = None
+stats = searchStats.SearchStats()  # numbers from the last search, see searchStats.py
+
+
+# returns a random move
+def findRandomMove(validMoves):
+    return validMoves[random.randint(0, len(validMoves) - 1)]
+
+
+# One search with its own settings, tables and results, so several games can be searched at once in one process
+# The settings start as the module level values above and can be changed on the object
+# The transposition table, killers and history are kept between moves, so use one Searcher per game
+class Searcher:
+    def __init__(self, table=None):
+        for name in settingNames:
+            setattr(self, name, globals()[name])
+        self.table = table  # transposition table, allocated by the first search unless one is given
+        self.ordering = moveOrdering.MoveOrdering(pieceScore)  # killer and history tables, also counts cutoffs
+        self.nextMove = None  # best move of the iteration being searched
+        self.rootDepth = self.maxDepth  # depth of the iteration being searched, the root is where depth == rootDepth
+        self.rootBestMoveID = transpositionTable.noMove  # best move of the last completed iteration
+        self.rootInBitbase = False  # the position searched is already a bitbase ending, see negaMaxAlphaBeta
+        self.deadline = None  # perf_counter time the search has to stop at
+        self.nodeLimit = None
+        self.nodes = 0
+        self.searchStopped = False
+        self.stopRequested = False  # set by stop(), possibly from another thread
+        self.stats = searchStats.SearchStats()  # numbers from the last search, see searchStats.py
+
+    # the transposition table is only allocated when the first search needs it
+    def getTranspositionTable(self):
+        if self.table is None:
+            self.table = transpositionTable.TranspositionTable(self.transpositionTableSizeMB)
+        return self.table
+
+    # forgets everything learnt from earlier moves, call when the searcher moves on to a new game
+    def newGame(self):
+        if self.table is not None:
+            self.table.clear()
+        self.ordering = moveOrdering.MoveOrdering(pieceScore)
+
+    # asks a running search to finish, the best move of the last completed iteration is still returned
+    # a stop that comes just before the search starts counts too, clear stopRequested first when that isn't wanted
+    def stop(self):
+        self.stopRequested = True
+
+    # searches depth 1, 2, 3, ... until maxDepth is reached, or while time_limit (seconds) and node_limit allow
+    # the move from the last completed iteration is returned, an iteration cut short by a limit is thrown away
+    # callback(stats) is called after every completed iteration, and with return_stats the result is (move, stats)
+    def findBestMove(self, gs, validMoves, time_limit=None, node_limit=None, callback=None, return_stats=False):
+        self.stats = stats = searchStats.SearchStats()
+        if len(validMoves) == 0:
+            return (None, stats) if return_stats else None
+        bookMove = openingBook.probe(self.openingBookFile, gs, validMoves)
+        if bookMove is not None:
+            self.stopRequested = False
+            stats.bookMove = True
+            stats.bestMove = bookMove
+            return (bookMove, stats) if return_stats else bookMove
+        searchStart = time.perf_counter()
+        if self.useTranspositionTable:
+            table = self.getTranspositionTable()
+            table.newSearch()
+            tableProbes, tableHits = table.probes, table.hits
+        self.ordering.newSearch()
+        self.ordering.resetCounters()
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.nodeLimit = node_limit
+        self.nodes = 0
+        self.searchStopped = False
+        self.rootBestMoveID = transpositionTable.noMove
+        self.rootInBitbase = self.probeBitbase(gs) is not None
+        finalDepth = self.maxDepth if time_limit is None and node_limit is None else self.maxIterativeDepth
+        bestMove = None
+        for depth in range(1, finalDepth + 1):
+            self.nextMove = None
+            self.rootDepth = depth
+            iterationStart = time.perf_counter()
+            iterationNodes = self.nodes
+            score = self.negaMaxAlphaBeta(gs, validMoves, depth, -checkMate, checkMate, 1 if gs.whiteToMove else -1)
+            if self.searchStopped and bestMove is not None:  # unfinished iteration, keep the last complete one
+                break
+            bestMove = self.nextMove
+            self.rootBestMoveID = bestMove.moveID
+            stats.addIteration(depth, score, self.principalVariation(gs, bestMove, depth), self.nodes - iterationNodes,
+                               time.perf_counter() - iterationStart)
+            if callback is not None:
+                stats.nodes = self.nodes
+                stats.totalTime = time.perf_counter() - searchStart
+                callback(stats)
+            if self.searchStopped or abs(score) >= mateScore:  # out of budget or found a forced mate
+                break
+        self.deadline = None
+        self.nodeLimit = None
+        self.stopRequested = False
+        stats.nodes = self.nodes
+        stats.cutoffs = self.ordering.cutoffs
+        stats.firstMoveCutoffs = self.ordering.firstMoveCutoffs
+        if self.useTranspositionTable:
+            stats.tableProbes = table.probes - tableProbes
+            stats.tableHits = table.hits - tableHits
+        stats.stopped = self.searchStopped
+        stats.bestMove = bestMove
+        stats.totalTime = time.perf_counter() - searchStart
+        return (bestMove, stats) if return_stats else bestMove
+
+    # best line found by the last iteration, followed through the hash moves in the transposition table
+    def principalVariation(self, gs, bestMove, depth):
+        pv = [bestMove]
+        if self.useTranspositionTable:
+            table = self.getTranspositionTable()
+            probes, hits = table.probes, table.hits  # walking the line isn't part of the search
+            gs.makeMove(bestMove)
+            while len(pv) < depth:
+                entry = table.probe(gs.zobristKey)
+                if entry is None:
+                    break
+                moveID = entry[0]
+                move = next((move for move in gs.getValidMoves() if move.moveID == moveID), None)
+                if move is None:
+                    break
+                pv.append(move)
+                gs.makeMove(move)
+            for _ in pv:
+                gs.undoMove()
+            table.probes, table.hits = probes, hits
+        return pv
+
+    # called at every node, stops the search once the time or node budget is spent or stop() was called
+    def outOfBudget(self):
+        if self.rootDepth == 1:  # always finish the first iteration so there is a move to play
+            return False
+        if self.stopRequested:
+            self.searchStopped = True
+        elif self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            self.searchStopped = True
+        elif self.deadline is not None and self.nodes % self.checkTimeEvery == 0 and \
+                time.perf_counter() >= self.deadline:
+            self.searchStopped = True
+        return self.searchStopped
+
+    # ply counts moves from the root, allowNullMove is False straight after a null move so two aren't made in a row
+    # validMoves can be None, the moves are then only generated if the node searches deeper than a leaf
+    def negaMaxAlphaBeta(self, gs, validMoves, depth, alpha, beta, turnMultiplier, ply=0, allowNullMove=True):
+        stats = self.stats
+        self.nodes += 1
+        if self.searchStopped or self.outOfBudget():
+            return 0  # the result is thrown away
+        # a position seen before is scored as the draw it can be steered into, so the search doesn't go round in
+        # circles, in a won bitbase ending especially where every position has about the same score
+        if ply > 0 and gs.isRepetition(2):
+            stats.leafNodes += 1
+            return staleMate
+        if depth <= 0:
+            score = self.probeBitbase(gs)
+            # the bitbase scores a mated king as a loss like any other, it is left to quiescence to score the mate
+            if score is not None and not (score < 0 and gs.inCheck() and len(gs.getValidMoves()) == 0):
+                stats.bitbaseHits += 1
+                stats.leafNodes += 1
+                return score
+            # leaves are searched without their moves, quiescence finds mates and stalemates itself
+            if self.useQuiescence and (validMoves is None or len(validMoves) > 0):
+                return self.quiescence(gs, alpha, beta, turnMultiplier, 0, ply)
+            if validMoves is None:
+                gs.getValidMoves()  # sets checkMate and staleMate for scoreBoard
+            stats.leafNodes += 1
+            if gs.checkMate:
+                return -checkMate + ply
+            if timeSearchPhases:
+                start = time.perf_counter()
+            score = turnMultiplier * scoreBoard(gs)
+            if timeSearchPhases:
+                stats.evaluationTime += time.perf_counter() - start
+            return score
+        if validMoves is None:
+            if timeSearchPhases:
+                start = time.perf_counter()
+            validMoves = gs.getValidMoves()
+            if timeSearchPhases:
+                stats.moveGenerationTime += time.perf_counter() - start
+        if len(validMoves) == 0:
+            stats.leafNodes += 1
+            return -checkMate + ply if gs.checkMate else staleMate
+        isRoot = ply == 0
+        # a bitbase ending is scored without searching it, but once the game is in one the search carries on
+        # to its leaves and only stops at draws, the win scores alone can't tell how close a mate is
+        if not isRoot:
+            score = self.probeBitbase(gs)
+            if score is not None and (score == 0 or not self.rootInBitbase):
+                stats.bitbaseHits += 1
+                stats.leafNodes += 1
+                return score
+        alphaOriginal = alpha
+        hashMoveID = transpositionTable.noMove
+        if self.useTranspositionTable:
+            table = self.getTranspositionTable()
+            entry = table.probe(gs.zobristKey)
+            if entry is not None:
+                hashMoveID, entryDepth, score, bound = entry
+                score = scoreFromTable(score, ply)
+                # a deep enough result can be used straight away, except at the root where nextMove has to be set
+                if entryDepth >= depth and not isRoot:
+                    if bound == transpositionTable.exact:
+                        return score
+                    elif bound == transpositionTable.lowerBound:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if alpha >= beta:
+                        return score
+        if isRoot and hashMoveID == transpositionTable.noMove:
+            hashMoveID = self.rootBestMoveID  # principal variation move from the previous iteration
+        inCheck = gs.inCheck()
+
+        # null move pruning, if passing still beats beta a real move will too, unless it's zugzwang which is
+        # likely when the side to move only has pawns left
+        if self.useNullMove and allowNullMove and not isRoot and not inCheck and depth >= self.nullMoveMinDepth and \
+                beta < mateScore and hasNonPawnMaterial(gs, 'w' if gs.whiteToMove else 'b'):
+            reduction = self.nullMoveReduction + (1 if depth > 6 else 0)
+            gs.makeNullMove()
+            score = -self.negaMaxAlphaBeta(gs, None, depth - 1 - reduction, -beta, -beta + nullWindow,
+                                           -turnMultiplier, ply + 1, False)
+            gs.undoNullMove()
+            if self.searchStopped:
+                return 0
+            if score >= beta:
+                stats.nullMoveCutoffs += 1
+                return beta
+
+        maxScore = -checkMate
+        bestMove = None
+        for moveIndex, move in enumerate(self.ordering.orderMoves(validMoves, ply, hashMoveID)):
+            if timeSearchPhases:
+                start = time.perf_counter()
+            gs.makeMove(move)
+            if timeSearchPhases:
+                stats.makeUndoTime += time.perf_counter() - start
+            newDepth = depth - 1
+            givesCheck = (self.useCheckExtensions or self.useLateMoveReductions) and gs.inCheck()
+            if givesCheck and self.useCheckExtensions and ply < 2 * self.rootDepth:
+                newDepth += 1
+                stats.extensions += 1
+            # the child's moves are only needed when it searches deeper than a leaf, reductions always leave it
+            # at least one ply, and generating them here once serves the re-searches too
+            nextMoves = None
+            if newDepth > 0:
+                if timeSearchPhases:
+                    start = time.perf_counter()
+                nextMoves = gs.getValidMoves()
+                if timeSearchPhases:
+                    stats.moveGenerationTime += time.perf_counter() - start
+            score = None
+            reduction = 0
+            if self.useLateMoveReductions and depth >= self.lateMoveMinDepth and \
+                    moveIndex >= self.lateMoveMinMoves and not inCheck and not givesCheck:
+                reduction = self.lateMoveReduction(move, moveIndex, ply, newDepth)
+            if reduction > 0:  # a reduced search that beats alpha has to be checked at full depth
+                stats.reductions += 1
+                score = -self.negaMaxAlphaBeta(gs, nextMoves, newDepth - reduction, -alpha - nullWindow, -alpha,
+                                               -turnMultiplier, ply + 1)
+                if score > alpha:
+                    stats.reSearches += 1
+                    score = None
+            if score is None and self.usePrincipalVariationSearch and moveIndex > 0:
+                # only the first move gets the full window, the rest just have to be shown to be no better
+                score = -self.negaMaxAlphaBeta(gs, nextMoves, newDepth, -alpha - nullWindow, -alpha,
+                                               -turnMultiplier, ply + 1)
+                if alpha < score < beta:
+                    stats.reSearches += 1
+                    score = None
+            if score is None:
+                score = -self.negaMaxAlphaBeta(gs, nextMoves, newDepth, -beta, -alpha, -turnMultiplier, ply + 1)
+            if timeSearchPhases:
+                start = time.perf_counter()
+            gs.undoMove()
+            if timeSearchPhases:
+                stats.makeUndoTime += time.perf_counter() - start
+            if self.searchStopped:
+                return 0
+            if score > maxScore or bestMove is None:  # a lost position still has to play a move
+                maxScore = score
+                bestMove = move
+                if isRoot:
+                    self.nextMove = move
+            # pruning
+            if maxScore > alpha:
+                alpha = maxScore
+            if alpha >= beta:
+                self.ordering.cutoff(move, ply, depth, moveIndex)
+                break
+        if self.useTranspositionTable:
+            if maxScore <= alphaOriginal:
+                bound = transpositionTable.upperBound
+            elif maxScore >= beta:
+                bound = transpositionTable.lowerBound
+            else:
+                bound = transpositionTable.exact
+            table.store(gs.zobristKey, depth, scoreToTable(maxScore, ply), bound,
+                        bestMove.moveID if bestMove is not None else transpositionTable.noMove)
+        return maxScore
+
+    # bitbase score of gs from the point of view of the side to move, None when it isn't one of the endings
+    def probeBitbase(self, gs):
+        # every bitbase ending has a queen, a rook or a pawn as the only piece besides the kings
+        if not self.useBitbases or gs.gamePhase > evaluation.phaseWeights['Q']:
+            return None
+        return bitbases.probe(gs, self.bitbaseFolder)
+
+    # how many plies to take off a late move, 0 for moves that mustn't be reduced
+    def lateMoveReduction(self, move, moveIndex, ply, newDepth):
+        if move.pieceCaptured != "--" or move.isPawnPromotion:
+            return 0
+        if ply < moveOrdering.maxPly and move.moveID in self.ordering.killers[ply]:
+            return 0
+        reduction = 1 if moveIndex < 2 * self.lateMoveMinMoves else 2
+        if self.ordering.history[move.pieceMoved][move.endRow * 8 + move.endColumn] >= self.lateMoveHistory:
+            reduction -= 1
+        return max(min(reduction, newDepth - 1), 0)  # always leave at least one ply
+
+    # searches captures only until the position is quiet, so leaves aren't scored halfway through an exchange
+    def quiescence(self, gs, alpha, beta, turnMultiplier, qDepth=0, ply=0):
+        stats = self.stats
+        self.nodes += 1
+        stats.quiescenceNodes += 1
+        if self.searchStopped or self.outOfBudget():
+            return 0
+        if gs.inCheck():  # every evasion has to be looked at, standing pat isn't an option
+            if timeSearchPhases:
+                start = time.perf_counter()
+            moves = gs.getValidMoves()
+            if timeSearchPhases:
+                stats.moveGenerationTime += time.perf_counter() - start
+            if len(moves) == 0:
+                stats.leafNodes += 1
+                return -checkMate + ply
+            standPat = None
+            maxScore = -checkMate
+        else:
+            # with only a king and pawns left stalemate is a real possibility, and leaves come here without their
+            # moves having been generated, so the side to move is checked for a legal move
+            if not hasNonPawnMaterial(gs, 'w' if gs.whiteToMove else 'b') and len(gs.getValidMoves()) == 0:
+                stats.leafNodes += 1
+                return staleMate
+            stats.leafNodes += 1
+            if timeSearchPhases:
+                start = time.perf_counter()
+            standPat = turnMultiplier * evaluate(gs)
+            if timeSearchPhases:
+                stats.evaluationTime += time.perf_counter() - start
+            if standPat >= beta:
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            maxScore = standPat
+            if timeSearchPhases:
+                start = time.perf_counter()
+            moves = gs.getCaptureMoves()
+            if self.quiescenceChecks and qDepth == 0:
+                moves += getQuietChecks(gs)
+            if timeSearchPhases:
+                stats.moveGenerationTime += time.perf_counter() - start
+        for move in self.ordering.orderMoves(moves, moveOrdering.maxPly):
+            if standPat is not None and (move.pieceCaptured != "--" or move.isPawnPromotion):
+                gain = pieceScore[move.pieceCaptured[1]] if move.pieceCaptured != "--" else 0
+                if move.isPawnPromotion:
+                    gain += pieceScore['Q'] - pieceScore['p']
+                if standPat + gain + self.deltaMargin < alpha:  # delta pruning
+                    continue
+                if move.pieceCaptured != "--" and staticExchange(gs, move) < 0:  # losing capture
+                    continue
+            if timeSearchPhases:
+                start = time.perf_counter()
+            gs.makeMove(move)
+            if timeSearchPhases:
+                stats.makeUndoTime += time.perf_counter() - start
+            score = -self.quiescence(gs, -beta, -alpha, -turnMultiplier, qDepth + 1, ply + 1)
+            if timeSearchPhases:
+                start = time.perf_counter()
+            gs.undoMove()
+            if timeSearchPhases:
+                stats.makeUndoTime += time.perf_counter() - start
+            if self.searchStopped:
+                return 0
+            if score > maxScore:
+                maxScore = score
+            if maxScore > alpha:
+                alpha = maxScore
+            if alpha >= beta:
+                break
+        return maxScore
+
+
+# The functions below search with one shared Searcher that picks up the module level settings on every call,
+# so older code that sets smartMoveFinder.maxDepth and calls findBestMove keeps working
+def getSearcher():
+    global searcher
+    if searcher is None:
+        searcher = Searcher()
+    for name in settingNames:
+        setattr(searcher, name, globals()[name])
+    return searcher
+
+
+def getTranspositionTable():
+    return getSearcher().getTranspositionTable()
+
+
+# helper method to make first recursive call, see Searcher.findBestMove
+def findBestMove(gs, validMoves, time_limit=None, node_limit=None, callback=None, return_stats=False):
+    global nextMove, stats
+    moveSearcher = getSearcher()
+    result = moveSearcher.findBestMove(gs, validMoves, time_limit, node_limit, callback, return_stats)
+    nextMove = moveSearcher.nextMove
+    stats = moveSearcher.stats
+    return result
+
+
+def principalVariation(gs, bestMove, depth):
+    return getSearcher().principalVariation(gs, bestMove, depth)
+
+
+def negaMaxAlphaBeta(gs, validMoves, depth, alpha, beta, turnMultiplier, ply=0, allowNullMove=True):
+    return getSearcher().negaMaxAlphaBeta(gs, validMoves, depth, alpha, beta, turnMultiplier, ply, allowNullMove)
+
+
+def quiescence(gs, alpha, beta, turnMultiplier, qDepth=0, ply=0):
+    return getSearcher().quiescence(gs, alpha, beta, turnMultiplier, qDepth, ply)
+
+
+def greedyAlgorithm(gs, validMoves):
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    maxScore = -checkMate  # lowest theoretical score
+    bestMove = None
+    for playerMove in validMoves:
+        gs.makeMove(playerMove)
+        if gs.checkMate:
+            score = checkMate
+        elif gs.staleMate:
+            score = staleMate
+        score = turnMultiplier * scoreMaterial(gs.board)
+        if score > maxScore:
+            maxScore = score
+            bestMove = playerMove
+        gs.undoMove()
+    return bestMove
+
+
+def minimaxNonRecursive(gs, validMoves):
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    opponentMinMaxScore = checkMate  # lowest theoretical score
+    bestPlayerMove = None
+    random.shuffle(validMoves)
+    # finds best move by minimising the opponents maximum score
+    for playerMove in validMoves:
+        gs.makeMove(playerMove)  # get player moves
+        opponentsMoves = gs.getValidMoves()  # get opponents move
+        if gs.checkMate:
+            opponentsMaxScore = -checkMate
+        elif gs.staleMate:
+            opponentsMaxScore = staleMate
+        else:
+            opponentsMaxScore = -checkMate  # set to low value
+            # finds best move from opponent
+            for opponentsMoves in opponentsMoves:
+                gs.makeMove(opponentsMoves)
+                gs.getValidMoves()  # required to check for checkmate
+                if gs.checkMate:
+                    score = checkMate
+                elif gs.staleMate:
+                    score = staleMate
+                else:
+                    score = -turnMultiplier * scoreMaterial(gs.board)
+                if opponentsMaxScore < score:  # update best score
+                    opponentsMaxScore = score
+                gs.undoMove()
+            if opponentsMaxScore < opponentMinMaxScore:  # if opponents max score is lower with this move, make that move
+                opponentMinMaxScore = opponentsMaxScore
+                bestPlayerMove = playerMove
+            gs.undoMove()
+    return bestPlayerMove
+
+
+def minimaxRecursive(gs, validMoves, depth, whiteToMove):
+    global nextMove
+    if depth == 0:  # at terminal/leaf depth, no more children, go back up tree
+        return scoreMaterial(gs.board)
+
+    # alternates between white and black moves
+    if whiteToMove:
+        maxScore = - checkMate  # worst possible outcome
+        for move in validMoves:
+            gs.makeMove(move) # make the move
+            nextMoves = gs.getValidMoves() # find next moves
+            # moves up from terminal/leaf node with all possible moves by calling its own function recursively
+            score = minimaxRecursive(gs, nextMoves, depth - 1, False)
+            if score > maxScore:  # new best score
+                maxScore = score
+                if depth == maxDepth:  # if at surface level, no parents, move to other possible moves and go down
+                    nextMove = move
+            gs.undoMove()
+        return maxScore
+    else:
+        minScore = checkMate  # worst possible outcome
+        for move in validMoves:
+            gs.makeMove(move)
+            nextMoves = gs.getValidMoves()
+            score = minimaxRecursive(gs, nextMoves, depth - 1, True)
+            if score < minScore:
+                minScore = score
+                if depth == maxDepth:
+                    nextMove = move
+            gs.undoMove()
+        return minScore
+
+
+def negaMax(gs, validMoves, depth, turnMultiplier):
+    global nextMove
+    if depth == 0:
+        return turnMultiplier * scoreBoard(gs)
+
+    maxScore = -checkMate
+    for move in validMoves:
+        gs.makeMove(move)
+        nextMoves = gs.getValidMoves()
+        score = -negaMax(gs, nextMoves, (depth - 1), (-1 * turnMultiplier))
+        if score > maxScore:
+            maxScore = score
+            if depth == maxDepth:
+                nextMove = move
+        gs.undoMove()
+    return maxScore
+
+
+# null move pruning is turned off when the side to move only has its king and pawns
+def hasNonPawnMaterial(gs, colour):
+    for row in gs.board:
+        for piece in row:
+            if piece[0] == colour and piece[1] in 'NBRQ':
+                return True
+    return False
+
+
+# the transposition table keeps mate scores counted from the stored position instead of the root, so an entry
+# gives the right mate distance whatever ply it is found at
+def scoreToTable(score, ply):
+    if score >= mateScore:
+        return score + ply
+    if score <= -mateScore:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score, ply):
+    if score >= mateScore:
+        return score - ply
+    if score <= -mateScore:
+        return score + ply
+    return score
+
+
+# quiet moves that give check, only used when quiescenceChecks is on
+def getQuietChecks(gs):
+    checks = []
+    for move in gs.getValidMoves():
+        if move.pieceCaptured == "--" and not move.isPawnPromotion:
+            gs.makeMove(move)
+            if gs.inCheck():
+                checks.append(move)
+            gs.undoMove()
+    return checks
+
+
+# static exchange evaluation, material won or lost on the end square if both sides keep recapturing
+# with their cheapest piece, negative means the capture loses material
+def staticExchange(gs, move):
+    r, c = move.endRow, move.endColumn
+    removed = [(move.startRow, move.startColumn)]
+    gain = [pieceScore[move.pieceCaptured[1]]]
+    pieceOnSquare = pieceScore['Q'] if move.isPawnPromotion else exchangeValue(move.pieceMoved[1])
+    colour = 'b' if move.pieceMoved[0] == 'w' else 'w'
+    while True:
+        gain.append(pieceOnSquare - gain[-1])  # what colour wins if it recaptures
+        if max(-gain[-2], gain[-1]) < 0:  # neither side changes the outcome by carrying on
+            break
+        attacker = gs.getLeastValuableAttacker(r, c, colour, removed)
+        if attacker is None:
+            break
+        removed.append(attacker)
+        pieceOnSquare = exchangeValue(gs.board[attacker[0]][attacker[1]][1])
+        colour = 'b' if colour == 'w' else 'w'
+    gain.pop()  # the last entry assumes a recapture that can't happen
+    for d in range(len(gain) - 1, 0, -1):
+        gain[d - 1] = -max(-gain[d - 1], gain[d])
+    return gain[0]
+
+
+# a king can only recapture last, so it is worth more than anything it could win
+def exchangeValue(pieceType):
+    return checkMate if pieceType == 'K' else pieceScore[pieceType]
+
+
+# Score the board based on material
+def scoreMaterial(board):
+    score = 0
+    for row in board:
+        for square in row:
+            if square[0] == 'w':
+                score += pieceScore[square[1]]
+            elif square[0] == 'b':
+                score -= pieceScore[square[1]]
+    return score
+
+
+# Positive score is good for white, negative for black
+def scoreBoard(gs):
+    if gs.checkMate:
+        if gs.whiteToMove:
+            return -checkMate  # black wins
+        else:
+            return checkMate  # white wins
+    elif gs.staleMate:
+        return staleMate
+    return evaluate(gs)
+
+
+# material and piece square score from the totals GameState keeps up to date, so it doesn't look at the board
+def evaluate(gs):
+    score = gs.materialScore['w'] - gs.materialScore['b'] + \
+            evaluation.taperedScore(gs.middleGameScore['w'] - gs.middleGameScore['b'],
+                                    gs.endGameScore['w'] - gs.endGameScore['b'], gs.gamePhase)
+    if debugEvaluation:
+        scannedScore = scanEvaluation(gs.board)
+        if abs(score - scannedScore) > 1e-6:
+            raise AssertionError("incremental evaluation " + str(score) + " doesn't match board scan " +
+                                 str(scannedScore))
+    return score
+
+
+# the same score as evaluate, worked out by looking at all 64 squares
+def scanEvaluation(board):
+    score = 0
+    middleGame = 0
+    endGame = 0
+    phase = 0
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece != "--":
+                sign = 1 if piece[0] == 'w' else -1
+                score += sign * pieceScore[piece[1]]
+                middleGame += sign * evaluation.middleGameSquares[piece][r * 8 + c]
+                endGame += sign * evaluation.endGameSquares[piece][r * 8 + c]
+                phase += evaluation.phaseWeights[piece[1]]
+    return score + evaluation.taperedScore(middleGame, endGame, phase)
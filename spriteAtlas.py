@@ -0,0 +1,77 @@
+# Sprite atlas, every piece image scaled to one square size and packed side by side into a single PNG
+# Starting the GUI then loads one small file instead of loading and scaling twelve images, and each piece is a
+# subsurface of the atlas. An atlas is built the first time a size is asked for and again whenever one of the
+# piece images is newer than it, so editing the images needs no extra step
+# Atlases are kept in cacheFolder, not among the piece images. When one can't be written there the GUI still
+# starts, with the atlas built in memory from the piece images
+#
+# python spriteAtlas.py images2 --sizes 48 64 96   builds the atlases of several board sizes ahead of time
+
+import os
+
+import pygame as p
+
+pieces = ["wp", "wR", "wN", "wB", "wQ", "wK", "bp", "bR", "bN", "bB", "bQ", "bK"]
+cacheFolder = "spriteCache"
+
+
+# the atlas of the images in folder at size, named after the folder so each set of images has its own
+def atlasFile(folder, size):
+    return os.path.join(cacheFolder, "%s%d.png" % (os.path.basename(os.path.normpath(folder)), size))
+
+
+# true when the atlas of this size is missing or older than one of the piece images
+def isStale(folder, size):
+    fileName = atlasFile(folder, size)
+    if not os.path.exists(fileName):
+        return True
+    built = os.path.getmtime(fileName)
+    return any(os.path.getmtime(os.path.join(folder, piece + ".png")) > built for piece in pieces)
+
+
+# scales every piece to size x size and puts them in one row, in the order of pieces
+def buildAtlas(folder, size):
+    atlas = p.Surface((size * len(pieces), size), p.SRCALPHA)
+    for index, piece in enumerate(pieces):
+        image = p.transform.scale(p.image.load(os.path.join(folder, piece + ".png")), (size, size))
+        # added onto the transparent atlas so the pixels are copied as they are, alpha included, not blended
+        atlas.blit(image, (index * size, 0), special_flags=p.BLEND_RGBA_ADD)
+    return atlas
+
+
+def saveAtlas(atlas, folder, size):
+    os.makedirs(cacheFolder, exist_ok=True)
+    p.image.save(atlas, atlasFile(folder, size))
+
+
+# {piece: image} of the pieces at size, the display has to be set up first so the atlas can be converted to it
+def loadPieces(folder, size):
+    atlas = None
+    if not isStale(folder, size):
+        try:
+            atlas = p.image.load(atlasFile(folder, size))
+        except (OSError, p.error):  # unreadable, built again below
+            atlas = None
+    if atlas is None:
+        atlas = buildAtlas(folder, size)
+        try:
+            saveAtlas(atlas, folder, size)
+        except (OSError, p.error):  # read only cache, the atlas just gets built again next time
+            pass
+    atlas = atlas.convert_alpha()
+    return {piece: atlas.subsurface(p.Rect(index * size, 0, size, size)) for index, piece in enumerate(pieces)}
+
+
+def main():
+    import argparse  # not needed when chessMain imports this
+    parser = argparse.ArgumentParser(description='Builds the piece sprite atlases of the GUI')
+    parser.add_argument('folder', nargs='?', default='images2', help='folder of the piece images')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64], help='square sizes in pixels')
+    args = parser.parse_args()
+    for size in args.sizes:
+        saveAtlas(buildAtlas(args.folder, size), args.folder, size)
+        print("wrote " + atlasFile(args.folder, size))
+
+
+if __name__ == "__main__":
+    main()
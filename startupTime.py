@@ -0,0 +1,72 @@
+# Cold start times, how long it takes from starting python until each entry point is ready to use
+# Every check runs in a fresh process a few times and the fastest run is kept, the script exits with status 1 when
+# a check is over its target or fails, so a slow import creeping back in gets noticed
+#
+# python startupTime.py [--runs 5] [--json startup.json]
+#
+# The engine checks also fail if pygame gets loaded, only chessMain should need it. The GUI check opens the window
+# with SDL's dummy video driver and draws the first frame, it needs the piece images in images2
+# Times are with the bytecode already compiled (python -m compileall .), a fresh checkout compiles every module once
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+noPygame = "; import sys; assert 'pygame' not in sys.modules, 'pygame was imported'"
+
+# name: (code run in a fresh process, target in seconds)
+checks = {
+    'engine': ("import bitboardEngine, smartMoveFinder" + noPygame, 0.1),
+    'uci': ("import uciMain" + noPygame, 0.1),
+    'selfPlay': ("import selfPlay" + noPygame, 0.12),
+    'gui': ("import chessMain; chessMain.drawGameState(chessMain.initDisplay(), [], "
+            "chessMain.bitboardEngine.GameState()); chessMain.p.display.flip()", 0.4),
+}
+
+
+# fastest wall time of runs fresh processes running code, or the error it ended with
+def timeCheck(code, runs):
+    folder = os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    best = None
+    for run in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=folder, env=environment, capture_output=True,
+                                text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, lines[-1] if lines else "exit status %d" % result.returncode
+        best = elapsed if best is None else min(best, elapsed)
+    return best, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the cold start time of the engine, tools and GUI')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', help='file to write the times to')
+    args = parser.parse_args()
+
+    results = {}
+    passed = True
+    for name, (code, target) in checks.items():
+        seconds, error = timeCheck(code, args.runs)
+        if error is not None:
+            print("%-9s failed: %s" % (name, error))
+            passed = False
+        else:
+            ok = seconds <= target
+            passed = passed and ok
+            print("%-9s %6.0f ms  target %4.0f ms  %s" % (name, seconds * 1000, target * 1000, "ok" if ok else "SLOW"))
+        results[name] = {"seconds": seconds, "target": target, "error": error}
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=1)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Texel tuning, fits the piece values and piece square tables of evaluation.py to the results of real games
+# Every position gets the result of its game (1 white won, 0.5 draw, 0 black won) and the weights are moved by
+# gradient descent until sigmoid(scale * evaluation) predicts those results as well as it can
+# Positions are scored in batches through batchEvaluation's features, so it needs NumPy
+#
+# python texelTuner.py games.pgn --output tuned.json [--epochs 300] [--cache positions.npz]
+# python texelTuner.py positions.epd ...   EPD lines carry the result as c9 "1-0" or [1.0], [0.5], [0.0]
+# then evaluation.loadWeights("tuned.json"), or play it against the current weights with selfPlay.py and
+# {"tuned": {"weights": "tuned.json"}} in the engines file
+
+import argparse
+import json
+import os
+import re
+import time
+
+import batchEvaluation
+import bitboardEngine
+import evaluation
+import pgn
+from batchEvaluation import np
+
+skipPlies = 8  # opening moves are left out, they say more about the book than the evaluation
+chunkSize = 262144  # positions scored at a time, bounds the memory used
+resultValues = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+epdResult = re.compile(r'"(1-0|0-1|1/2-1/2)"|\[(1\.0|0\.5|0\.0|1|0)\]')
+
+
+# boards and white's results of the quiet positions of every finished game in a PGN file
+# positions in check or straight after a capture or promotion are skipped, the evaluation can't score those
+def readPgnPositions(fileName, boards, results):
+    with open(fileName, errors="replace") as file:
+        for headers, sanMoves, result in pgn.readGames(file):
+            if result not in resultValues:
+                continue
+            gs = bitboardEngine.GameState.from_fen(headers.get("FEN", pgn.startFen))
+            for ply, san in enumerate(sanMoves):
+                move = pgn.sanToMove(gs, san, gs.getValidMoves())
+                if move is None:
+                    break
+                gs.makeMove(move)
+                if ply + 1 < skipPlies or move.pieceCaptured != "--" or move.isPawnPromotion or gs.inCheck():
+                    continue
+                boards.append([boardRow[:] for boardRow in gs.board])
+                results.append(resultValues[result])
+
+
+def readEpdPositions(fileName, boards, results):
+    with open(fileName, errors="replace") as file:
+        for line in file:
+            match = epdResult.search(line)
+            if not line.strip() or match is None:
+                continue
+            result = resultValues[match.group(1)] if match.group(1) else float(match.group(2))
+            boards.append(batchEvaluation.boardFromFen(line))
+            results.append(result)
+
+
+# encoded positions and results of every file, EPD files are told apart by their extension
+def loadPositions(fileNames):
+    boards, results = [], []
+    for fileName in fileNames:
+        if fileName.lower().endswith(".epd"):
+            readEpdPositions(fileName, boards, results)
+        else:
+            readPgnPositions(fileName, boards, results)
+    columns, signs, phases = batchEvaluation.encodeBoards(boards)
+    return columns, signs, phases, np.array(results, dtype=np.float32)
+
+
+# the positions in slices of chunkSize, columns and signs widened once so they can index and multiply
+def chunks(data):
+    columns, signs, phases, results = data
+    for start in range(0, len(results), chunkSize):
+        end = start + chunkSize
+        yield columns[start:end], signs[start:end], phases[start:end], results[start:end]
+
+
+def prepare(data):
+    columns, signs, phases, results = data
+    return columns.astype(np.int32, copy=False), signs.astype(np.float32, copy=False), \
+        phases.astype(np.float32, copy=False), results
+
+
+# expected result for white from white's score in pawns, scale is fitted to the positions by fitScale
+def winProbability(scores, scale):
+    return 1 / (1 + 10 ** (-scale * scores / 4))
+
+
+# mean squared error between the results and the predicted scores, positions are scored once for all the scales
+def meanErrors(data, weights, scales):
+    errors = np.zeros(len(scales))
+    for columns, signs, phases, results in chunks(data):
+        scores = batchEvaluation.sparseScores(columns, signs, phases, weights)
+        for index, scale in enumerate(scales):
+            errors[index] += ((results - winProbability(scores, scale)) ** 2).sum()
+    return errors / len(data[3])
+
+
+# scale that makes the current weights fit the results best, found on a coarse grid then a fine one
+def fitScale(data, weights):
+    scales = np.linspace(0.1, 3, 30)
+    best = scales[np.argmin(meanErrors(data, weights, scales))]
+    scales = np.linspace(max(best - 0.1, 0.01), best + 0.1, 21)
+    return float(scales[np.argmin(meanErrors(data, weights, scales))])
+
+
+# error and its gradient with respect to the weights, over every position
+def errorGradient(data, weights, scale):
+    gradient = np.zeros_like(weights)
+    error = 0.0
+    for columns, signs, phases, results in chunks(data):
+        predicted = winProbability(batchEvaluation.sparseScores(columns, signs, phases, weights), scale)
+        residual = predicted - results
+        error += (residual ** 2).sum()
+        # d error / d score = 2 * residual * p * (1 - p) * ln(10) * scale / 4, then through the features
+        scoreGradient = 2 * residual * predicted * (1 - predicted) * np.log(10) * scale / 4
+        gradient += batchEvaluation.sparseTranspose(columns, signs, phases, scoreGradient)
+    count = len(data[3])
+    return error / count, gradient / count
+
+
+# weights only the data can't move stay put: the king's value, and pawns on the first and last rank
+def frozenMask():
+    mask = np.ones(batchEvaluation.featureCount, dtype=bool)
+    count = len(batchEvaluation.pieceTypes)
+    mask[batchEvaluation.pieceTypes.index('K')] = False
+    pawn = batchEvaluation.pieceTypes.index('p') * 64
+    for offset in (count, count + batchEvaluation.squareCount):
+        mask[offset + pawn:offset + pawn + 8] = False
+        mask[offset + pawn + 56:offset + pawn + 64] = False
+    return mask
+
+
+# Adam gradient descent, learningRate is in centipawns per step
+def tune(data, weights=None, epochs=300, learningRate=1.0, scale=None, progress=True):
+    weights = batchEvaluation.weightVector() if weights is None else weights.copy()
+    data = prepare(data)
+    if scale is None:
+        scale = fitScale(data, weights)
+    mask = frozenMask()
+    mean = np.zeros_like(weights)
+    variance = np.zeros_like(weights)
+    beta1, beta2 = 0.9, 0.999
+    start = time.perf_counter()
+    for epoch in range(1, epochs + 1):
+        error, gradient = errorGradient(data, weights, scale)
+        gradient *= mask
+        mean = beta1 * mean + (1 - beta1) * gradient
+        variance = beta2 * variance + (1 - beta2) * gradient ** 2
+        step = learningRate * (mean / (1 - beta1 ** epoch)) / (np.sqrt(variance / (1 - beta2 ** epoch)) + 1e-12)
+        weights -= np.where(mask, step, 0)
+        if progress and (epoch == 1 or epoch % 25 == 0 or epoch == epochs):
+            print("epoch %d error %.6f %.1fs" % (epoch, error, time.perf_counter() - start))
+    return weights, scale
+
+
+# writes tuned weights as JSON, the format evaluation.loadWeights and the selfPlay engine configs read
+def exportWeights(weights, fileName):
+    with open(fileName, "w") as file:
+        json.dump(batchEvaluation.weightsFromVector(weights), file, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tunes the evaluation weights to game results')
+    parser.add_argument('files', nargs='+', help='PGN or EPD files')
+    parser.add_argument('--output', default='tuned.json')
+    parser.add_argument('--epochs', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=1.0, help='learning rate in centipawns')
+    parser.add_argument('--start', help='weights file to start from instead of evaluation.py')
+    parser.add_argument('--cache', help='npz file the encoded positions are saved to and loaded from')
+    args = parser.parse_args()
+    batchEvaluation.requireNumpy()
+
+    start = time.perf_counter()
+    if args.cache and os.path.exists(args.cache):
+        saved = np.load(args.cache)
+        data = saved["columns"], saved["signs"], saved["phases"], saved["results"]
+    else:
+        data = loadPositions(args.files)
+        if args.cache:
+            np.savez(args.cache, columns=data[0], signs=data[1], phases=data[2], results=data[3])
+    data = prepare(data)
+    print("%d positions loaded in %.1fs" % (len(data[3]), time.perf_counter() - start))
+    if args.start:
+        evaluation.loadWeights(args.start)
+    initial = batchEvaluation.weightVector()
+    weights, scale = tune(data, initial, args.epochs, args.rate)
+    print("scale %.3f, error %.6f before and %.6f after" % (scale, meanErrors(data, initial, [scale])[0],
+                                                           meanErrors(data, weights, [scale])[0]))
+    exportWeights(weights, args.output)
+    print("weights written to " + args.output)
+
+
+if __name__ == "__main__":
+    main()
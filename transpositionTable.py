@@ -0,0 +1,119 @@
+# Fixed size transposition table for smartMoveFinder
+# Entries are stored in flat arrays so the memory used is set by the budget and not by python object overhead
+# Each bucket holds two entries, a depth preferred slot and an always replace slot
+
+from array import array
+
+exact = 0  # score is the exact value of the position
+lowerBound = 1  # search failed high, the position is worth at least score
+upperBound = 2  # search failed low, the position is worth at most score
+noMove = -1
+keyMask = 0xFFFFFFFFFFFFFFFF
+
+# bytes used by one entry: key, score, move, depth, bound and age
+entrySize = 8 + 8 + 4 + 1 + 1 + 1
+
+
+class TranspositionTable:
+    # with shared=True the entries live in shared memory, so worker processes given the table search with one table
+    def __init__(self, sizeMB=64, shared=False):
+        buckets = 1
+        while buckets * 2 * 2 * entrySize <= sizeMB * 1024 * 1024:  # largest power of two that fits the budget
+            buckets *= 2
+        self.bucketMask = buckets - 1
+        entries = buckets * 2
+        self.shared = shared
+        if shared:
+            from multiprocessing import sharedctypes  # only imported here, it costs more to import than the rest
+            self.keys = sharedctypes.RawArray('Q', entries)
+            self.scores = sharedctypes.RawArray('d', entries)
+            self.moves = sharedctypes.RawArray('i', entries)
+            self.depths = sharedctypes.RawArray('b', entries)
+            self.bounds = sharedctypes.RawArray('B', entries)
+            self.ages = sharedctypes.RawArray('B', entries)
+            self.clear()
+        else:
+            self.keys = array('Q', [0]) * entries
+            self.scores = array('d', [0.0]) * entries
+            self.moves = array('i', [noMove]) * entries
+            self.depths = array('b', [-1]) * entries
+            self.bounds = array('B', [exact]) * entries
+            self.ages = array('B', [0]) * entries
+        self.age = 0  # entries written by earlier searches can be replaced even if deeper
+        self.probes = 0
+        self.hits = 0
+
+    # call once per search, so entries from old searches lose their place in the depth preferred slot
+    def newSearch(self):
+        self.age = (self.age + 1) & 0xFF
+
+    def clear(self):
+        if self.shared:  # the arrays have to stay where they are, every byte of -1 is 0xFF
+            import ctypes
+            ctypes.memset(self.keys, 0, ctypes.sizeof(self.keys))
+            ctypes.memset(self.depths, 0xFF, ctypes.sizeof(self.depths))
+            ctypes.memset(self.moves, 0xFF, ctypes.sizeof(self.moves))
+        else:
+            entries = len(self.keys)
+            self.keys = array('Q', [0]) * entries
+            self.depths = array('b', [-1]) * entries
+            self.moves = array('i', [noMove]) * entries
+        self.age = 0
+
+    # (moveID, depth, score, bound) of the entry for key, or None if the position isn't stored
+    def probe(self, key):
+        self.probes += 1
+        index = (key & self.bucketMask) << 1
+        if self.shared:
+            return self.probeShared(key, index)
+        if self.keys[index] != key or self.depths[index] < 0:
+            index += 1
+            if self.keys[index] != key or self.depths[index] < 0:
+                return None
+        self.hits += 1
+        return self.moves[index], self.depths[index], self.scores[index], self.bounds[index]
+
+    # other processes write to a shared table while it is read, without a lock, so an entry can be half written
+    # the stored key is the real key xor'ed with entryCheck of the rest of the entry, the fields are read once and
+    # only trusted when they give back the key, a mix of two writes practically never does (lockless hashing)
+    def probeShared(self, key, index):
+        for slot in (index, index + 1):
+            moveID, depth, score, bound = self.moves[slot], self.depths[slot], self.scores[slot], self.bounds[slot]
+            if depth >= 0 and self.keys[slot] ^ entryCheck(moveID, depth, score, bound) == key:
+                self.hits += 1
+                return moveID, depth, score, bound
+        return None
+
+    # key of the entry in slot index, see probeShared
+    def storedKey(self, index):
+        if self.shared:
+            return self.keys[index] ^ entryCheck(self.moves[index], self.depths[index], self.scores[index],
+                                                 self.bounds[index])
+        return self.keys[index]
+
+    def store(self, key, depth, score, bound, moveID):
+        index = (key & self.bucketMask) << 1
+        # depth preferred slot keeps the deepest result unless it's the same position or left over from an old search
+        if self.storedKey(index) != key and self.depths[index] > depth and self.ages[index] == self.age:
+            index += 1  # always replace slot
+        self.depths[index] = depth
+        self.scores[index] = score
+        self.bounds[index] = bound
+        self.moves[index] = moveID
+        self.ages[index] = self.age
+        self.keys[index] = key ^ entryCheck(moveID, depth, score, bound) if self.shared else key
+
+
+    # fraction of the table in use, useful to check the budget is sensible
+    def usage(self):
+        used = 0
+        for depth in self.depths:
+            if depth >= 0:
+                used += 1
+        return used / len(self.depths)
+
+
+# 64 bit mix of the fields of an entry, hash of a float is the same in every process unlike hash of a string
+def entryCheck(moveID, depth, score, bound):
+    return ((hash(score) * 0x9E3779B97F4A7C15) ^ (moveID * 0xC2B2AE3D27D4EB4F) ^ (depth * 0x165667B19E3779F9) ^
+            (bound * 0x27D4EB2F165667C5)) & keyMask
@@ -0,0 +1,213 @@
+# Headless UCI (Universal Chess Interface) front end, so the engine can be used from chess GUIs and match runners
+# python uciMain.py, then talk UCI on stdin and stdout
+# Nothing here imports pygame, the game window is only opened by chessMain.py
+#
+# Supported: uci, isready, ucinewgame, setoption (Hash, BookFile), position startpos/fen ... moves ..., go (depth, movetime,
+# wtime, btime, winc, binc, movestogo, nodes, infinite, ponder), stop, ponderhit, quit
+# Under go infinite and go ponder bestmove is only sent after stop (or ponderhit), even when the search ends first
+# The engine always promotes to a queen, an under promotion from the GUI is played as a queen promotion
+
+import sys
+import threading
+import time
+
+import bitboardEngine
+import smartMoveFinder
+
+engineName = "Chess-AI-with-Pruning"
+engineAuthor = "WillPowellUk"
+defaultMovesToGo = 30  # moves the remaining clock time is shared between when the GUI doesn't say
+moveOverhead = 0.05  # seconds kept back for communication with the GUI
+
+
+class UciEngine:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.outputLock = threading.Lock()  # info lines come from the search thread
+        self.searcher = smartMoveFinder.Searcher()
+        self.gs = bitboardEngine.GameState()
+        self.searchThread = None
+        self.released = threading.Event()  # set when bestmove may be sent, go infinite and go ponder wait for it
+        self.ponderTimer = None  # stops a ponder search once its time is up after ponderhit
+        self.ponderTimeLimit = None
+
+    def send(self, line):
+        with self.outputLock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    # handles one line from the GUI, returns False on quit
+    # a command that can't be parsed is reported and ignored, the position and settings stay as they were
+    def command(self, line):
+        words = line.split()
+        if not words:
+            return True
+        try:
+            return self.runCommand(words[0], words[1:])
+        except ValueError as error:
+            self.send("info string error in " + words[0] + ": " + str(error))
+            return True
+
+    def runCommand(self, name, arguments):
+        if name == "uci":
+            self.send("id name " + engineName)
+            self.send("id author " + engineAuthor)
+            self.send("option name Hash type spin default %d min 1 max 4096" % smartMoveFinder.transpositionTableSizeMB)
+            self.send("option name BookFile type string default <empty>")
+            self.send("uciok")
+        elif name == "isready":
+            self.send("readyok")
+        elif name == "ucinewgame":
+            self.stopSearch()
+            self.searcher.newGame()
+        elif name == "setoption":
+            self.setOption(arguments)
+        elif name == "position":
+            self.stopSearch()
+            self.setPosition(arguments)
+        elif name == "go":
+            self.stopSearch()
+            self.go(arguments)
+        elif name == "stop":
+            self.stopSearch()
+        elif name == "ponderhit":
+            self.ponderHit()
+        elif name == "quit":
+            self.stopSearch()
+            return False
+        return True
+
+    def setOption(self, arguments):
+        # setoption name <id> [value <x>]
+        if "name" not in arguments:
+            return
+        valueIndex = arguments.index("value") if "value" in arguments else len(arguments)
+        optionName = " ".join(arguments[arguments.index("name") + 1:valueIndex]).lower()
+        value = " ".join(arguments[valueIndex + 1:])
+        if optionName == "hash" and value.isdigit():
+            self.stopSearch()
+            self.searcher.transpositionTableSizeMB = int(value)
+            self.searcher.table = None  # allocated again at the new size by the next search
+        elif optionName == "bookfile":
+            self.searcher.openingBookFile = value if value and value != "<empty>" else None
+
+    def setPosition(self, arguments):
+        # position startpos [moves ...] or position fen <6 fields> [moves ...]
+        # the new position is built on its own and only replaces self.gs once it has loaded
+        movesIndex = arguments.index("moves") if "moves" in arguments else len(arguments)
+        if arguments and arguments[0] == "fen":
+            gs = bitboardEngine.GameState.from_fen(" ".join(arguments[1:movesIndex]))
+        else:
+            gs = bitboardEngine.GameState()
+        for text in arguments[movesIndex + 1:]:
+            move = findMove(gs, text)
+            if move is None:
+                self.send("info string illegal move " + text)
+                break
+            gs.makeMove(move)
+        self.gs = gs
+
+    def go(self, arguments):
+        limits = {}
+        for index, word in enumerate(arguments):
+            if word in ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes") and \
+                    index + 1 < len(arguments):
+                limits[word] = int(arguments[index + 1])  # a bad number raises ValueError before any search starts
+        timeLimit = None
+        if "movetime" in limits:
+            timeLimit = limits["movetime"] / 1000
+        elif "infinite" not in arguments:
+            clock, increment = ("wtime", "winc") if self.gs.whiteToMove else ("btime", "binc")
+            if clock in limits:
+                remaining = limits[clock] / 1000
+                timeLimit = remaining / limits.get("movestogo", defaultMovesToGo) + limits.get(increment, 0) / 2000
+                timeLimit = min(timeLimit, remaining / 2)
+        if timeLimit is not None:
+            timeLimit = max(timeLimit - moveOverhead, 0.01)
+        self.released.clear()
+        if "infinite" not in arguments and "ponder" not in arguments:
+            self.released.set()
+        # a ponder search has no time limit until ponderhit, then it gets the time it would have had
+        self.ponderTimeLimit = None
+        if "ponder" in arguments:
+            self.ponderTimeLimit, timeLimit = timeLimit, None
+        depth = limits.get("depth", smartMoveFinder.maxIterativeDepth)
+        self.searcher.maxDepth = depth
+        self.searcher.maxIterativeDepth = depth
+        self.searcher.stopRequested = False
+        self.searchThread = threading.Thread(target=self.search, args=(timeLimit, limits.get("nodes")), daemon=True)
+        self.searchThread.start()
+
+    # runs on the search thread, until a limit is reached or stop is called
+    def search(self, timeLimit, nodeLimit):
+        validMoves = self.gs.getValidMoves()
+        bestMove = None
+        if len(validMoves) > 0:
+            start = time.perf_counter()
+            bestMove = self.searcher.findBestMove(self.gs, validMoves, time_limit=timeLimit, node_limit=nodeLimit,
+                                                  callback=lambda stats: self.sendInfo(stats, start))
+        self.released.wait()
+        self.send("bestmove " + (uciMove(bestMove) if bestMove is not None else "0000"))
+
+    def sendInfo(self, stats, start):
+        seconds = time.perf_counter() - start
+        pv = stats.pv()
+        score = stats.score()
+        if abs(score) >= smartMoveFinder.mateScore:  # checkMate less the plies to the mate
+            mateIn = (round(smartMoveFinder.checkMate - abs(score)) + 1) // 2
+            scoreText = "mate %d" % (mateIn if score > 0 else -mateIn)
+        else:
+            scoreText = "cp %d" % round(score * 100)
+        self.send("info depth %d score %s nodes %d nps %d time %d pv %s" % (
+            stats.depth(), scoreText, stats.nodes, stats.nodes / seconds if seconds > 0 else 0, seconds * 1000,
+            " ".join(uciMove(move) for move in pv)))
+
+    # a running search is told to stop and has sent its bestmove by the time this returns
+    def stopSearch(self):
+        if self.searchThread is not None:
+            self.searcher.stop()
+            self.released.set()
+            self.waitForSearch()
+
+    # the opponent played the move that was pondered on, the search goes on as a normal timed search
+    def ponderHit(self):
+        if self.searchThread is None:
+            return
+        if self.ponderTimeLimit is not None:
+            self.ponderTimer = threading.Timer(self.ponderTimeLimit, self.searcher.stop)
+            self.ponderTimer.daemon = True
+            self.ponderTimer.start()
+        self.released.set()
+
+    def waitForSearch(self):
+        if self.searchThread is not None:
+            self.searchThread.join()
+            self.searchThread = None
+        if self.ponderTimer is not None:  # it mustn't stop the next search
+            self.ponderTimer.cancel()
+            self.ponderTimer = None
+
+
+# long algebraic notation used by UCI, e.g. e2e4 or e7e8q
+def uciMove(move):
+    return move.getChessNotation() + ("q" if move.isPawnPromotion else "")
+
+
+# the legal move in gs written as text, or None
+def findMove(gs, text):
+    for move in gs.getValidMoves():
+        if move.getChessNotation() == text[:4]:
+            return move
+    return None
+
+
+def main():
+    engine = UciEngine()
+    for line in sys.stdin:
+        if not engine.command(line):
+            break
+    engine.stopSearch()
+
+
+if __name__ == "__main__":
+    main()